@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+ADHERENCIA A TURNOS PLANIFICADOS
+================================
+Cruza un plan de turnos (archivo local exportado del WFM o armado a mano) con
+los estados reales del timeline y calcula, por agente e intervalo de 30 minutos:
+
+- Adherencia_%: tiempo planificado en el que el agente estaba en el estado que
+  correspondía (productivo en 'Trabajo', en la actividad planificada en los
+  descansos) sobre el tiempo planificado
+- Conformidad_%: tiempo conectado sobre el tiempo planificado de trabajo
+
+Plan de turnos (CSV ';' o ',', JSON o JSON Lines), una fila por actividad:
+- Agente: nombre del agente como aparece en el timeline
+- Inicio / Fin: 'dd/mm/yy HH:MM[:SS]', ISO, o solo la hora con una columna Fecha
+  (si Fin <= Inicio el tramo termina al día siguiente)
+- Actividad (opcional, por defecto 'Trabajo'): las actividades distintas de
+  'Trabajo' (Comida, Descanso, Reunión...) se superponen al turno que las contiene
+
+El cruce es un join de intervalos ordenados: los límites de los tramos del plan,
+de los registros resueltos del timeline y de los intervalos de 30 minutos se
+ordenan una sola vez por (agente, instante) y cada segmento elemental toma su
+actividad y su estado con searchsorted, sin recorrer agentes ni registros.
+
+Uso:
+    python AdherenciaTurnos.py "Plan de turnos.csv" [--timeline ruta]
+
+Archivos de salida (ExportadosGenerados):
+- Analisis_Adherencia_Por_intervalos.csv
+- Analisis_Adherencia_Por_agente.csv
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Analisis_timeline_comun import (
+    INTERVALOS_DIA, SEGUNDOS_DIA, SEGUNDOS_INTERVALO, intervalos_del_dia, registros_resueltos
+)
+from CargaDatos import guardar_resultado, leer_csv, leer_timeline
+
+ARCHIVO_PLAN = 'ExportadosGenesysprueba/Plan de turnos.csv'
+
+# Nombres de columna aceptados para cada dato (se usa el primero presente)
+COLUMNAS_PLAN = {
+    'agente': ['Agente', 'Nombre del agente', 'agentName'],
+    'inicio': ['Inicio', 'Hora de inicio', 'start'],
+    'fin': ['Fin', 'Hora de finalización', 'end'],
+    'fecha': ['Fecha', 'date'],
+    'actividad': ['Actividad', 'activity'],
+}
+
+ACTIVIDAD_TRABAJO = 'Trabajo'
+
+# Estados en los que el agente cumple una actividad de trabajo planificada
+ESTADOS_PRODUCTIVOS = ('En la cola', 'Disponible')
+ESTADO_DESCONECTADO = 'Desconectado'
+
+_EPOCA = pd.Timestamp('1970-01-01')
+
+
+def _resolver_columnas(columnas_disponibles, columnas=None):
+    """Elige, para cada dato, la columna del plan a usar"""
+    resueltas = {}
+    for dato, alternativas in COLUMNAS_PLAN.items():
+        if columnas and dato in columnas:
+            resueltas[dato] = columnas[dato]
+            continue
+        resueltas[dato] = next((nombre for nombre in alternativas if nombre in columnas_disponibles), None)
+    faltantes = [dato for dato in ('agente', 'inicio', 'fin') if resueltas[dato] is None]
+    if faltantes:
+        raise ValueError(f"Columnas obligatorias del plan no encontradas: {faltantes}")
+    return resueltas
+
+
+def _a_fecha_hora(serie):
+    """Convierte fechas y horas en formato Genesys (dd/mm/yy HH:MM[:SS]) o ISO"""
+    texto = serie.astype(str).str.strip()
+    fechas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    for formato in ('%d/%m/%y %H:%M:%S', '%d/%m/%y %H:%M', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M'):
+        faltan = fechas.isna()
+        if not faltan.any():
+            break
+        fechas[faltan] = pd.to_datetime(texto[faltan], format=formato, errors='coerce')
+    faltan = fechas.isna() & serie.notna()
+    if faltan.any():
+        fechas[faltan] = pd.to_datetime(texto[faltan], format='ISO8601', errors='coerce')
+    return fechas
+
+
+def _a_fecha(serie):
+    """Convierte fechas 'dd/mm/yyyy', 'dd/mm/yy' o ISO"""
+    texto = serie.astype(str).str.strip()
+    fechas = pd.to_datetime(texto, format='%d/%m/%Y', errors='coerce')
+    for formato in ('%d/%m/%y', 'ISO8601'):
+        faltan = fechas.isna()
+        if faltan.any():
+            fechas[faltan] = pd.to_datetime(texto[faltan], format=formato, errors='coerce')
+    return fechas.dt.normalize()
+
+
+def leer_plan(ruta, columnas=None):
+    """
+    Lee el plan de turnos y lo normaliza.
+
+    Args:
+        ruta: CSV (comprimido o no), .json o .jsonl
+        columnas: dict opcional {dato: nombre de columna} para planes con otros nombres
+
+    Returns:
+        DataFrame: Agente, Actividad, Inicio, Fin (datetime), sin tramos inválidos
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.json', '.jsonl'):
+        df = pd.read_json(ruta, lines=extension == '.jsonl', dtype=False)
+    else:
+        df = leer_csv(ruta, usar_cache=False)
+    nombres = _resolver_columnas(df.columns, columnas)
+
+    if nombres['fecha'] is not None:
+        # Solo la hora en Inicio/Fin: se combina con la fecha y Fin <= Inicio pasa al día siguiente
+        fecha = _a_fecha(df[nombres['fecha']])
+        inicio = fecha + pd.to_timedelta(df[nombres['inicio']].astype(str).str.strip()
+                                         .where(lambda horas: horas.str.count(':') == 2,
+                                                lambda horas: horas + ':00'), errors='coerce')
+        fin = fecha + pd.to_timedelta(df[nombres['fin']].astype(str).str.strip()
+                                      .where(lambda horas: horas.str.count(':') == 2,
+                                             lambda horas: horas + ':00'), errors='coerce')
+        fin = fin.where(fin > inicio, fin + pd.Timedelta(days=1))
+    else:
+        inicio = _a_fecha_hora(df[nombres['inicio']])
+        fin = _a_fecha_hora(df[nombres['fin']])
+
+    actividad = (df[nombres['actividad']].fillna(ACTIVIDAD_TRABAJO).astype(str).str.strip()
+                 if nombres['actividad'] is not None else ACTIVIDAD_TRABAJO)
+    plan = pd.DataFrame({
+        'Agente': df[nombres['agente']].astype(str).str.strip(),
+        'Actividad': actividad,
+        'Inicio': inicio,
+        'Fin': fin,
+    })
+    validos = plan['Inicio'].notna() & plan['Fin'].notna() & (plan['Fin'] > plan['Inicio'])
+    if not validos.all():
+        print(f"⚠️ Tramos del plan descartados (fecha inválida o Fin <= Inicio): {int((~validos).sum())}")
+    return plan[validos].reset_index(drop=True)
+
+
+def _segundos(fechas):
+    return ((fechas - _EPOCA) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+def _cubiertos(claves, inicios, fines):
+    """Cuántos tramos [inicio, fin) contienen cada clave (claves ya con el agente incluido)"""
+    inicios = np.sort(inicios)
+    fines = np.sort(fines)
+    return np.searchsorted(inicios, claves, side='right') - np.searchsorted(fines, claves, side='right')
+
+
+def _vigente(claves, inicios, fines, valores):
+    """
+    Valor del tramo de inicio más reciente que contiene cada clave (-1 si ninguno).
+    Supone tramos que no se solapan entre sí dentro de cada agente.
+    """
+    if len(inicios) == 0:
+        return np.full(len(claves), -1, dtype=np.int64)
+    orden = np.argsort(inicios, kind='stable')
+    inicios, fines, valores = inicios[orden], fines[orden], valores[orden]
+    posicion = np.searchsorted(inicios, claves, side='right') - 1
+    valido = posicion >= 0
+    valido[valido] = fines[posicion[valido]] > claves[valido]
+    return np.where(valido, valores[np.maximum(posicion, 0)], -1)
+
+
+def calcular_adherencia(df_plan, df_timeline):
+    """
+    Adherencia y conformidad por agente e intervalo de 30 minutos.
+
+    Args:
+        df_plan: plan normalizado (leer_plan)
+        df_timeline: timeline de estados
+
+    Returns:
+        tuple: (DataFrame por agente e intervalo, DataFrame por agente, resumen dict)
+    """
+    agentes = pd.Index(sorted(df_plan['Agente'].unique()))
+    df_timeline = df_timeline[df_timeline['Nombre del agente'].isin(agentes)]
+
+    # Rango analizado: días completos que cubre el plan
+    inicio_plan, fin_plan = _segundos(df_plan['Inicio']), _segundos(df_plan['Fin'])
+    desde = int(inicio_plan.min() // SEGUNDOS_DIA * SEGUNDOS_DIA)
+    hasta = int(-(-fin_plan.max() // SEGUNDOS_DIA) * SEGUNDOS_DIA)
+    cantidad_intervalos = (hasta - desde) // SEGUNDOS_INTERVALO
+    ancho = hasta - desde + 1  # clave = agente * ancho + segundo relativo a 'desde'
+
+    # Tramos del plan: trabajo (pueden solaparse) y demás actividades (se superponen al turno)
+    agente_plan = agentes.get_indexer(df_plan['Agente']).astype(np.int64)
+    clave_inicio_plan = agente_plan * ancho + (inicio_plan - desde)
+    clave_fin_plan = agente_plan * ancho + (fin_plan - desde)
+    es_trabajo = (df_plan['Actividad'].str.casefold() == ACTIVIDAD_TRABAJO.casefold()).to_numpy()
+    codigos_actividad, actividades = pd.factorize(df_plan['Actividad'])
+
+    # Estados reales: registros resueltos recortados al rango
+    posiciones, inicio_real, fin_real = registros_resueltos(df_timeline)
+    agente_real = agentes.get_indexer(df_timeline['Nombre del agente'].to_numpy()[posiciones]).astype(np.int64)
+    codigos_estado, estados = pd.factorize(df_timeline['Estado principal'].iloc[posiciones])
+    inicio_real = np.clip(inicio_real, desde, hasta) - desde
+    fin_real = np.clip(fin_real, desde, hasta) - desde
+    en_rango = fin_real > inicio_real
+    agente_real, codigos_estado = agente_real[en_rango], codigos_estado[en_rango]
+    clave_inicio_real = agente_real * ancho + inicio_real[en_rango]
+    clave_fin_real = agente_real * ancho + fin_real[en_rango]
+
+    # Segmentos elementales: entre límites consecutivos del mismo agente (los límites
+    # repetidos solo generan segmentos de duración cero, que se descartan)
+    limites_intervalo = np.arange(cantidad_intervalos + 1, dtype=np.int64) * SEGUNDOS_INTERVALO
+    limites = np.sort(np.concatenate((
+        clave_inicio_plan, clave_fin_plan, clave_inicio_real, clave_fin_real,
+        (np.arange(len(agentes), dtype=np.int64)[:, None] * ancho + limites_intervalo).ravel(),
+    )))
+    claves, siguientes = limites[:-1], limites[1:]
+    validos = (claves // ancho == siguientes // ancho) & (siguientes > claves)
+    claves, duracion = claves[validos], (siguientes - claves)[validos]
+
+    # Join: actividad planificada y estado real de cada segmento
+    trabajo = _cubiertos(claves, clave_inicio_plan[es_trabajo], clave_fin_plan[es_trabajo]) > 0
+    actividad = _vigente(claves, clave_inicio_plan[~es_trabajo], clave_fin_plan[~es_trabajo],
+                         codigos_actividad[~es_trabajo])
+    estado = _vigente(claves, clave_inicio_real, clave_fin_real, codigos_estado)
+
+    estados_productivos = np.flatnonzero(estados.isin(ESTADOS_PRODUCTIVOS))
+    productivo = np.isin(estado, estados_productivos)
+    conectado = (estado >= 0) & (estado != (estados.get_loc(ESTADO_DESCONECTADO)
+                                            if ESTADO_DESCONECTADO in estados else -2))
+
+    # Actividad no productiva que coincide con un estado (Comida, Descanso...): hay que estar en ese estado;
+    # si no coincide con ninguno (Capacitación...), basta con no estar atendiendo
+    nombres_estado = {nombre.casefold(): codigo for codigo, nombre in enumerate(estados)}
+    estado_esperado = np.array([nombres_estado.get(nombre.casefold(), -1) for nombre in actividades] + [-1])
+    esperado = estado_esperado[actividad]  # actividad -1 toma el último (-1)
+    en_actividad = actividad >= 0
+    adherente = np.where(
+        en_actividad,
+        np.where(esperado >= 0, estado == esperado, ~productivo),
+        trabajo & productivo,
+    )
+    planificado = en_actividad | trabajo
+    trabajo_planificado = trabajo & ~en_actividad
+
+    # Acumulación por (agente, intervalo)
+    celda = claves // ancho * cantidad_intervalos + claves % ancho // SEGUNDOS_INTERVALO
+    celdas = len(agentes) * cantidad_intervalos
+
+    def acumular(mascara):
+        return np.bincount(celda[mascara], weights=duracion[mascara], minlength=celdas).astype(np.int64)
+
+    segundos = {
+        'Segundos_Planificados': acumular(planificado),
+        'Segundos_Trabajo_Planificado': acumular(trabajo_planificado),
+        'Segundos_En_Adherencia': acumular(planificado & adherente),
+        'Segundos_Conectado': acumular(conectado),
+    }
+    con_datos = np.flatnonzero((segundos['Segundos_Planificados'] > 0) | (segundos['Segundos_Conectado'] > 0))
+
+    intervalo = con_datos % cantidad_intervalos
+    fechas = pd.to_datetime(desde + intervalo * SEGUNDOS_INTERVALO, unit='s').strftime('%Y-%m-%d')
+    claves_intervalo = np.array(intervalos_del_dia())
+    df_intervalos = pd.DataFrame({
+        'Agente': agentes[con_datos // cantidad_intervalos],
+        'Fecha': fechas,
+        'Intervalo': claves_intervalo[intervalo % INTERVALOS_DIA],
+        **{columna: valores[con_datos] for columna, valores in segundos.items()},
+    })
+    df_agentes = df_intervalos.groupby('Agente', sort=True)[list(segundos)].sum().reset_index()
+    for df in (df_intervalos, df_agentes):
+        _agregar_porcentajes(df)
+
+    resumen = {
+        'agentes': len(agentes),
+        'sin_timeline': int((~agentes.isin(df_timeline['Nombre del agente'].unique())).sum()),
+        'segmentos': len(claves),
+        'dias': (hasta - desde) // SEGUNDOS_DIA,
+    }
+    return df_intervalos, df_agentes, resumen
+
+
+def _agregar_porcentajes(df):
+    planificados = df['Segundos_Planificados'].where(df['Segundos_Planificados'] > 0)
+    trabajo = df['Segundos_Trabajo_Planificado'].where(df['Segundos_Trabajo_Planificado'] > 0)
+    df['Adherencia_%'] = (df['Segundos_En_Adherencia'] / planificados * 100).round(2)
+    df['Conformidad_%'] = (df['Segundos_Conectado'] / trabajo * 100).round(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adherencia y conformidad al plan de turnos por agente e intervalo")
+    parser.add_argument('plan', nargs='?', default=ARCHIVO_PLAN, help="Plan de turnos (CSV, JSON o JSON Lines)")
+    parser.add_argument('--timeline', help="Ruta del timeline (por defecto la configurada en CargaDatos)")
+    args = parser.parse_args()
+
+    print("🗓️ ADHERENCIA A TURNOS PLANIFICADOS")
+    print("=" * 40)
+
+    if not os.path.exists(args.plan):
+        print(f"❌ Plan de turnos no encontrado: {args.plan}")
+        return
+
+    instante = time.perf_counter()
+    df_plan = leer_plan(args.plan)
+    if df_plan.empty:
+        print("❌ El plan no tiene tramos válidos")
+        return
+    df_timeline = leer_timeline(args.timeline)
+    print(f"✅ Plan: {len(df_plan):,} tramos | Timeline: {len(df_timeline):,} registros")
+
+    df_intervalos, df_agentes, resumen = calcular_adherencia(df_plan, df_timeline)
+    print(f"⏱️ {resumen['agentes']} agentes, {resumen['dias']} días, {resumen['segmentos']:,} segmentos "
+          f"en {time.perf_counter() - instante:.2f}s")
+    if resumen['sin_timeline']:
+        print(f"⚠️ Agentes del plan sin registros en el timeline: {resumen['sin_timeline']}")
+
+    archivo_salida = guardar_resultado(df_intervalos, 'Analisis_Adherencia_Por_intervalos.csv', encoding='utf-8')
+    guardar_resultado(df_agentes, 'Analisis_Adherencia_Por_agente.csv', encoding='utf-8')
+
+    totales = df_agentes[['Segundos_Planificados', 'Segundos_Trabajo_Planificado',
+                          'Segundos_En_Adherencia', 'Segundos_Conectado']].sum()
+    if totales['Segundos_Planificados']:
+        print(f"📊 Adherencia global: {totales['Segundos_En_Adherencia'] / totales['Segundos_Planificados'] * 100:.2f}%")
+    if totales['Segundos_Trabajo_Planificado']:
+        print(f"📊 Conformidad global: {totales['Segundos_Conectado'] / totales['Segundos_Trabajo_Planificado'] * 100:.2f}%")
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    print(f"📊 Total filas: {len(df_intervalos)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,10 +13,12 @@ Timeline: Resumen de línea de tiempo de estado de agente.csv
 """
 
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from collections import defaultdict
 import sys
+from CargaDatos import guardar_resultado, leer_detalle
+from KPIs import kpis_de_grupo
+from Registro import registro_de
+
+registro = registro_de('AnalisisFraude')
 
 def obtener_agentes_fraude_conectados():
     """
@@ -33,30 +35,24 @@ def obtener_agentes_fraude_conectados():
         return agentes_por_intervalo
         
     except Exception as e:
-        print(f"Error obteniendo agentes Fraude: {e}")
-        return {}
+        registro.error(f"❌ Error obteniendo agentes Fraude: {e}")
+        raise
 
-def obtener_agentes_fraude(inicio, fin):
-    """
-    Obtiene el número de agentes de Fraude conectados en un intervalo específico.
+def main(df_detalle=None, agentes_por_intervalo=None, tabla_kpis=None):
     """
-    agentes_por_intervalo = obtener_agentes_fraude_conectados()
-    
-    # Crear clave del intervalo
-    if inicio.hour == 23 and inicio.minute == 30:
-        intervalo_key = "23:30-00:00"
-    else:
-        intervalo_key = f"{inicio.hour:02d}:{inicio.minute:02d}-{fin.hour:02d}:{fin.minute:02d}"
-    
-    return agentes_por_intervalo.get(intervalo_key, 0)
+    Genera el análisis de Fraude por intervalos.
 
-def main():
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo)
+        agentes_por_intervalo: agentes de Fraude en cola por intervalo ya calculados
+        tabla_kpis: KPIs de todos los grupos ya calculados (KPIs.calcular_kpis)
+    """
     try:
         print("🔍 ANÁLISIS DE FRAUDE - INICIANDO")
         print("=" * 50)
         
         # Leer archivo de datos de Fraude
-        fraude_data = pd.read_csv('ExportadosGenesysprueba/Detalle del rendimiento de colas.csv', delimiter=';')
+        fraude_data = leer_detalle() if df_detalle is None else df_detalle
         print(f"📊 Total registros cargados: {len(fraude_data)}")
         
         # Filtrar registros SOLO de Fraude y Fraude_MA (no incluir combinaciones)
@@ -69,108 +65,36 @@ def main():
             print("❌ No se encontraron registros de Fraude")
             return
         
-        # Obtener datos de agentes conectados
-        agentes_por_intervalo = obtener_agentes_fraude_conectados()
-        
-        # Procesar datos por intervalos - AGRUPAR por intervalo para evitar duplicados
-        resultados = []
-        intervalos_procesados = {}
+        # Obtener datos de agentes conectados (una sola vez para todos los intervalos)
+        if agentes_por_intervalo is None:
+            agentes_por_intervalo = obtener_agentes_fraude_conectados()
         
-        for _, row in fraude_filtrado.iterrows():
-            try:
-                # Extraer información del intervalo
-                inicio_intervalo = str(row['Inicio del intervalo'])
-                fin_intervalo = str(row['Fin del intervalo'])
-                
-                # Parsear fechas
-                inicio = pd.to_datetime(inicio_intervalo, format='%d/%m/%y %H:%M', dayfirst=True)
-                fin = pd.to_datetime(fin_intervalo, format='%d/%m/%y %H:%M', dayfirst=True)
-                
-                # Crear clave del intervalo
-                if inicio.hour == 23 and inicio.minute == 30:
-                    intervalo_key = "23:30-00:00"
-                else:
-                    intervalo_key = f"{inicio.hour:02d}:{inicio.minute:02d}-{fin.hour:02d}:{fin.minute:02d}"
-                
-                # Si ya procesamos este intervalo, sumar los datos
-                if intervalo_key not in intervalos_procesados:
-                    intervalos_procesados[intervalo_key] = {
-                        'inicio': inicio,
-                        'fin': fin,
-                        'oferta_total': 0,
-                        'contestadas_total': 0,
-                        'abandonadas_total': 0,
-                        'retener_total': 0,
-                        'llamadas_30s_total': 0,
-                        'manejo_total_seg': 0,
-                        'llamadas_manejadas_total': 0,  # Para TMO exacto
-                        'registros_con_manejo': 0
-                    }
-                
-                # Obtener métricas básicas y sumarlas
-                oferta = pd.to_numeric(row['Oferta'], errors='coerce')
-                contestadas = pd.to_numeric(row['Contestadas'], errors='coerce')
-                abandonadas = pd.to_numeric(row['Abandonadas'], errors='coerce')
-                retener = pd.to_numeric(row['Retener'], errors='coerce')
-                cumplen_sla = pd.to_numeric(row['Cumplen el SLA'], errors='coerce')
-                manejo_medio = pd.to_numeric(row['Manejo medio'], errors='coerce')
-                manejo_total = pd.to_numeric(row['Manejo total'], errors='coerce')
-                
-                # Seguridad contra valores NaN y sumar
-                intervalos_procesados[intervalo_key]['oferta_total'] += oferta if pd.notna(oferta) else 0
-                intervalos_procesados[intervalo_key]['contestadas_total'] += contestadas if pd.notna(contestadas) else 0
-                intervalos_procesados[intervalo_key]['abandonadas_total'] += abandonadas if pd.notna(abandonadas) else 0
-                intervalos_procesados[intervalo_key]['retener_total'] += retener if pd.notna(retener) else 0
-                intervalos_procesados[intervalo_key]['llamadas_30s_total'] += cumplen_sla if pd.notna(cumplen_sla) else 0
-                
-                # Para TMO, usar la metodología EXACTA de Mesa de Ayuda: suma de manejo total / suma de llamadas manejadas
-                if pd.notna(manejo_medio) and manejo_medio > 0 and pd.notna(manejo_total) and manejo_total > 0:
-                    llamadas_manejadas = manejo_total / manejo_medio
-                    intervalos_procesados[intervalo_key]['manejo_total_seg'] += manejo_total
-                    intervalos_procesados[intervalo_key]['llamadas_manejadas_total'] += llamadas_manejadas
-                    intervalos_procesados[intervalo_key]['registros_con_manejo'] += 1
-                    
-            except Exception as e:
-                continue
+        # KPIs por intervalo (una sola agregación sobre el detalle)
+        kpis = kpis_de_grupo(fraude_data, 'fraude', [
+            'Oferta', 'Contestadas', 'Retenidas', 'Abandonadas', 'Cumplen_SLA',
+            'Nivel_Atencion', 'Nivel_Servicio', 'Nivel_Retencion', 'TMO_Manejadas'
+        ], tabla_kpis)
         
-        # Generar resultados finales agrupados
-        for intervalo_key, datos in intervalos_procesados.items():
-            inicio = datos['inicio']
-            fin = datos['fin']
-            
-            oferta = datos['oferta_total']
-            contestadas = datos['contestadas_total']
-            abandonadas = datos['abandonadas_total']
-            retener = datos['retener_total']
-            llamadas_30s = datos['llamadas_30s_total']
-            
-            
-            # Calcular métricas
-            nivel_atencion = (contestadas / oferta * 100) if oferta > 0 else 0
-            nivel_servicio = (llamadas_30s / oferta * 100) if oferta > 0 else 0
-            nivel_retencion = (retener / contestadas * 100) if contestadas > 0 else 0
-            
+        resultados = []
+        for datos in kpis.itertuples(index=False):
             # TMO usando metodología EXACTA de Mesa de Ayuda: suma total / suma llamadas manejadas
-            if datos['llamadas_manejadas_total'] > 0:
-                tmo_segundos = datos['manejo_total_seg'] / datos['llamadas_manejadas_total']
-            else:
-                tmo_segundos = 0
+            tmo_segundos = datos.TMO_Manejadas
             
             # Obtener agentes conectados desde timeline
-            agentes_conectados = obtener_agentes_fraude(inicio, fin)
+            agentes_conectados = agentes_por_intervalo.get(datos.Intervalo, 0)
             
             # Crear registro del resultado
             resultado = {
-                'Intervalo': f"{inicio.strftime('%H:%M')}-{fin.strftime('%H:%M')}",
-                'Fecha': inicio.strftime('%Y-%m-%d'),
-                'Llamadas_Recibidas': int(oferta),
-                'Llamadas_Atendidas': int(contestadas),
-                'Llamadas_Retenidas': int(retener),
-                'Llamadas_Abandonadas': int(abandonadas),
-                'Llamadas_Atendidas_30s': int(llamadas_30s),
-                'Nivel_Atencion': round(nivel_atencion, 2),
-                'Nivel_Servicio': round(nivel_servicio, 2),
-                'Nivel_Retencion': round(nivel_retencion, 2),
+                'Intervalo': datos.Intervalo,
+                'Fecha': datos.Fecha,
+                'Llamadas_Recibidas': int(datos.Oferta),
+                'Llamadas_Atendidas': int(datos.Contestadas),
+                'Llamadas_Retenidas': int(datos.Retenidas),
+                'Llamadas_Abandonadas': int(datos.Abandonadas),
+                'Llamadas_Atendidas_30s': int(datos.Cumplen_SLA),
+                'Nivel_Atencion': round(float(datos.Nivel_Atencion), 2),
+                'Nivel_Servicio': round(float(datos.Nivel_Servicio), 2),
+                'Nivel_Retencion': round(float(datos.Nivel_Retencion), 2),
                 'TMO': f"00:{int(tmo_segundos // 60):02d}:{int(tmo_segundos % 60):02d}" if tmo_segundos > 0 else "00:00:00",
                 'Asesores_Conectados': int(agentes_conectados)
             }
@@ -183,8 +107,8 @@ def main():
         
         # Crear DataFrame y guardarlo
         df_resultado = pd.DataFrame(resultados)
-        df_resultado.to_csv('ExportadosGenerados/Analisis_Fraude_Por_intervalos.csv', index=False)
-        print(f"✅ ARCHIVO GENERADO: ExportadosGenerados/Analisis_Fraude_Por_intervalos.csv")
+        archivo_salida = guardar_resultado(df_resultado, 'Analisis_Fraude_Por_intervalos.csv')
+        print(f"✅ ARCHIVO GENERADO: {archivo_salida}")
         
     except Exception as e:
         print(f"❌ Error general: {e}")
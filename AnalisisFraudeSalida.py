@@ -11,18 +11,24 @@ Archivo de salida: Analisis_FraudeOut_Por_intervalos.csv
 """
 
 import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from collections import defaultdict
 import sys
+from CargaDatos import guardar_resultado, leer_detalle
+from KPIs import kpis_de_grupo
 
-def main():
+def main(df_detalle=None, tabla_kpis=None):
+    """
+    Genera el análisis de Fraude Salida por intervalos.
+
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo)
+        tabla_kpis: KPIs de todos los grupos ya calculados (KPIs.calcular_kpis)
+    """
     try:
         print("📞 ANÁLISIS DE FRAUDE SALIDA - INICIANDO")
         print("=" * 50)
         
         # Leer archivo de datos
-        fraude_salida_data = pd.read_csv('ExportadosGenesysprueba/Detalle del rendimiento de colas.csv', delimiter=';')
+        fraude_salida_data = leer_detalle() if df_detalle is None else df_detalle
         print(f"📊 Total registros cargados: {len(fraude_salida_data)}")
         
         # Filtrar registros SOLO de Fraude Salida
@@ -35,73 +41,18 @@ def main():
             print("❌ No se encontraron registros de Fraude Salida")
             return
         
-        # Procesar datos por intervalos - AGRUPAR por intervalo para evitar duplicados
-        resultados = []
-        intervalos_procesados = {}
-        
-        for _, row in fraude_salida_filtrado.iterrows():
-            try:
-                # Extraer información del intervalo
-                inicio_intervalo = str(row['Inicio del intervalo'])
-                fin_intervalo = str(row['Fin del intervalo'])
-                
-                # Parsear fechas
-                inicio = pd.to_datetime(inicio_intervalo, format='%d/%m/%y %H:%M', dayfirst=True)
-                fin = pd.to_datetime(fin_intervalo, format='%d/%m/%y %H:%M', dayfirst=True)
-                
-                # Crear clave del intervalo
-                if inicio.hour == 23 and inicio.minute == 30:
-                    intervalo_key = "23:30-00:00"
-                else:
-                    intervalo_key = f"{inicio.hour:02d}:{inicio.minute:02d}-{fin.hour:02d}:{fin.minute:02d}"
-                
-                # Si ya procesamos este intervalo, sumar los datos
-                if intervalo_key not in intervalos_procesados:
-                    intervalos_procesados[intervalo_key] = {
-                        'inicio': inicio,
-                        'fin': fin,
-                        'contactando_total': 0,  # Llamadas salientes
-                        'manejo_total_seg': 0,
-                        'llamadas_manejadas_total': 0,  # Para TMO exacto
-                        'registros_con_manejo': 0
-                    }
-                
-                # Obtener métricas específicas para llamadas salientes
-                contactando = pd.to_numeric(row['Contactando'], errors='coerce')
-                manejo_medio = pd.to_numeric(row['Manejo medio'], errors='coerce')
-                manejo_total = pd.to_numeric(row['Manejo total'], errors='coerce')
-                
-                # Seguridad contra valores NaN y sumar
-                intervalos_procesados[intervalo_key]['contactando_total'] += contactando if pd.notna(contactando) else 0
-                
-                # Para TMO, usar la metodología EXACTA: suma de manejo total / suma de llamadas manejadas
-                if pd.notna(manejo_medio) and manejo_medio > 0 and pd.notna(manejo_total) and manejo_total > 0:
-                    llamadas_manejadas = manejo_total / manejo_medio
-                    intervalos_procesados[intervalo_key]['manejo_total_seg'] += manejo_total
-                    intervalos_procesados[intervalo_key]['llamadas_manejadas_total'] += llamadas_manejadas
-                    intervalos_procesados[intervalo_key]['registros_con_manejo'] += 1
-                    
-            except Exception as e:
-                continue
+        # KPIs por intervalo (una sola agregación sobre el detalle)
+        kpis = kpis_de_grupo(fraude_salida_data, 'fraude_salida', ['Contactando', 'TMO_Manejadas'], tabla_kpis)
         
-        # Generar resultados finales agrupados
-        for intervalo_key, datos in intervalos_procesados.items():
-            inicio = datos['inicio']
-            fin = datos['fin']
-            
-            llamadas_salientes = datos['contactando_total']
-            
-            # TMO usando metodología EXACTA: suma total / suma llamadas manejadas
-            if datos['llamadas_manejadas_total'] > 0:
-                tmo_segundos = datos['manejo_total_seg'] / datos['llamadas_manejadas_total']
-            else:
-                tmo_segundos = 0
+        resultados = []
+        for datos in kpis.itertuples(index=False):
+            tmo_segundos = datos.TMO_Manejadas
             
             # Crear registro del resultado
             resultado = {
-                'Intervalo': f"{inicio.strftime('%H:%M')}-{fin.strftime('%H:%M')}",
-                'Fecha': inicio.strftime('%Y-%m-%d'),
-                'Llamadas_Salientes': int(llamadas_salientes),
+                'Intervalo': datos.Intervalo,
+                'Fecha': datos.Fecha,
+                'Llamadas_Salientes': int(datos.Contactando),
                 'TMO': f"00:{int(tmo_segundos // 60):02d}:{int(tmo_segundos % 60):02d}" if tmo_segundos > 0 else "00:00:00"
             }
             
@@ -111,16 +62,11 @@ def main():
             print("❌ No se generaron resultados válidos")
             return
         
-        # Crear DataFrame y guardarlo
+        # Crear DataFrame y guardarlo (ya en orden cronológico)
         df_resultado = pd.DataFrame(resultados)
         
-        # Ordenar por intervalo para mantener orden cronológico
-        df_resultado['Hora_Inicio'] = pd.to_datetime(df_resultado['Intervalo'].str.split('-').str[0], format='%H:%M').dt.time
-        df_resultado = df_resultado.sort_values('Hora_Inicio')
-        df_resultado = df_resultado.drop('Hora_Inicio', axis=1)
-        
-        df_resultado.to_csv('ExportadosGenerados/Analisis_FraudeOut_Por_intervalos.csv', index=False)
-        print(f"📋 ARCHIVO GENERADO: ExportadosGenerados/Analisis_FraudeOut_Por_intervalos.csv")
+        archivo_salida = guardar_resultado(df_resultado, 'Analisis_FraudeOut_Por_intervalos.csv')
+        print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
         print(f"📊 Total intervalos: {len(df_resultado)}")
         
         # Mostrar resumen
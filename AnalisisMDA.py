@@ -3,119 +3,77 @@ import numpy as np
 import subprocess
 import sys
 import os
+from GruposColas import COLAS_MESA_AYUDA
+from IndiceColas import indexar_colas, mascara_colas
+from CargaDatos import guardar_resultado, leer_detalle, ruta_entrada, ruta_salida
+from KPIs import kpis_de_grupo
+from Registro import DETALLE, registro_de
 
-def convertir_tiempo_a_segundos(tiempo_str):
-    """Convierte formato 'Xm Ys' a segundos"""
-    if pd.isna(tiempo_str) or tiempo_str == '':
-        return 0
-    
-    tiempo_str = str(tiempo_str).strip()
-    if tiempo_str == '0' or tiempo_str == '0.0':
-        return 0
-    
-    segundos_totales = 0
-    
-    if 'm' in tiempo_str:
-        partes = tiempo_str.split('m')
-        minutos = int(partes[0].strip())
-        segundos_totales += minutos * 60
-        
-        if len(partes) > 1 and 's' in partes[1]:
-            segundos_str = partes[1].replace('s', '').strip()
-            if segundos_str:
-                segundos = int(segundos_str)
-                segundos_totales += segundos
-    elif 's' in tiempo_str:
-        segundos = int(tiempo_str.replace('s', '').strip())
-        segundos_totales = segundos
-    else:
-        try:
-            segundos_totales = float(tiempo_str)
-        except:
-            segundos_totales = 0
-    
-    return segundos_totales
+registro = registro_de('AnalisisMDA')
 
-def obtener_datos_agentes():
-    """Obtiene los datos de agentes conectados importando del script de timeline"""
+def obtener_datos_agentes(agentes_por_intervalo=None):
+    """
+    Obtiene los datos de agentes conectados importando del script de timeline.
+    Si ya fueron calculados (agentes_por_intervalo), solo se muestran.
+    """
     try:
-        print("   ✅ Importando datos desde Analisis_timeline_mda.py")
-        
-        # Importar la función del script de timeline
-        from Analisis_timeline_mda import analizar_linea_tiempo_MA_corregido
-        
-        # Ejecutar el análisis y obtener los datos
-        agentes_por_intervalo = analizar_linea_tiempo_MA_corregido()
+        if agentes_por_intervalo is None:
+            print("   ✅ Importando datos desde Analisis_timeline_mda.py")
+            
+            # Importar la función del script de timeline
+            from Analisis_timeline_mda import analizar_linea_tiempo_MA_corregido
+            
+            # Ejecutar el análisis y obtener los datos
+            agentes_por_intervalo = analizar_linea_tiempo_MA_corregido()
         
         print(f"   � Intervalos con agentes detectados: {len(agentes_por_intervalo)}")
         
-        # Mostrar algunos ejemplos relevantes
-        print(f"   🔍 Ejemplos de agentes por intervalo (desde timeline):")
-        ejemplos_importantes = ['00:00-00:30', '00:30-01:00', '18:00-18:30', '19:00-19:30', '14:30-15:00']
-        for intervalo in ejemplos_importantes:
-            if intervalo in agentes_por_intervalo:
-                print(f"      {intervalo}: {agentes_por_intervalo[intervalo]} agentes")
+        # Mostrar algunos ejemplos relevantes (solo con el detalle activado)
+        if registro.isEnabledFor(DETALLE):
+            registro.debug("   🔍 Ejemplos de agentes por intervalo (desde timeline):")
+            ejemplos_importantes = ['00:00-00:30', '00:30-01:00', '18:00-18:30', '19:00-19:30', '14:30-15:00']
+            for intervalo in ejemplos_importantes:
+                if intervalo in agentes_por_intervalo:
+                    registro.debug(f"      {intervalo}: {agentes_por_intervalo[intervalo]} agentes")
         
         # El timeline corregido ya devuelve números, no conjuntos
         return agentes_por_intervalo
         
     except Exception as e:
-        print(f"   ❌ Error en análisis: {e}")
-        return {}
+        registro.error(f"   ❌ Error en análisis: {e}")
+        raise
 
-def main():
+def main(df_detalle=None, agentes_por_intervalo=None, tabla_kpis=None, indice_colas=None):
+    """
+    Genera el análisis de Mesa de Ayuda por intervalos.
+
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo)
+        agentes_por_intervalo: agentes en cola por intervalo ya calculados (None = analizar el timeline)
+        tabla_kpis: KPIs de todos los grupos ya calculados (KPIs.calcular_kpis)
+        indice_colas: índice de colas de df_detalle (IndiceColas.indexar_colas; None = se arma aquí)
+    """
     print("📊 ANÁLISIS DE MESA DE AYUDA")
     print("=" * 40)
     
     # Archivo de datos - usar archivos de la carpeta principal VisualStudio
-    archivo_rendimiento = "ExportadosGenesysprueba/Detalle del rendimiento de colas.csv"
+    archivo_rendimiento = ruta_entrada('detalle')
     
     # print("📖 Leyendo archivo de rendimiento...")
     try:
-        df = pd.read_csv(archivo_rendimiento, delimiter=';', encoding='utf-8')
+        df = leer_detalle(archivo_rendimiento) if df_detalle is None else df_detalle
         print(f"✅ Registros cargados: {len(df)}")
-    except:
-        try:
-            df = pd.read_csv(archivo_rendimiento, delimiter=',', encoding='utf-8')
-            print(f"✅ Registros cargados: {len(df)}")
-        except Exception as e:
-            print(f"❌ Error al cargar: {e}")
-            return
+    except Exception as e:
+        print(f"❌ Error al cargar: {e}")
+        return
     
     # Filtrar datos de Mesa de Ayuda - Lista específica de 26 colas
-    colas_mesa_ayuda = [
-        'A_MA Total',
-        'CI_Banca_Movil',
-        'CI_Multired_Victual',
-        'CI_Otras_Consultas',
-        'CI_Pagalo',
-        'Cl_ATM',
-        'MA_ActualizarDatos',
-        'MA_Agente_Corresponsal',
-        'MA_Banca Internet',
-        'MA_Banca Platino',
-        'MA_BloqueoCredito',
-        'MA_BloqueoDebito',
-        'MA_Credito',
-        'MA_Cronograma',
-        'MA_CuentaAhorros',
-        'MA_CuentaCorriente',
-        'MA_Cuenta_DNI',
-        'MA_Debito',
-        'MA_Depositos',
-        'MA_Giros',
-        'MA_Onp',
-        'MA_Otros_Tramites',
-        'MA_PagaloPe',
-        'MA_Prestamos',
-        'MA_Reclamos',
-        'MA_Tasas'
-    ]
+    colas_mesa_ayuda = COLAS_MESA_AYUDA
     
-    df_mesa_ayuda = df[
-        (df['Nombre de cola'].isin(colas_mesa_ayuda)) &
-        (~df['Nombre de cola'].str.contains(';', na=False))  # Excluir registros consolidados con ';'
-    ].copy()
+    # Filas atómicas de esas colas por código de cola (las consolidadas con ';' quedan fuera)
+    if indice_colas is None or df_detalle is None:
+        indice_colas = indexar_colas(df)
+    df_mesa_ayuda = df[mascara_colas(indice_colas, colas_mesa_ayuda)].copy()
     
     print(f"🎯 Registros de Mesa de Ayuda: {len(df_mesa_ayuda)}")
     
@@ -172,132 +130,57 @@ def main():
     df_mesa_ayuda = df_mesa_ayuda[df_mesa_ayuda['fecha'] == fecha_analisis]
     print(f"📅 Datos filtrados para {fecha_analisis}: {len(df_mesa_ayuda)}")
     
-    # Convertir columnas (lógica exacta)
-    columnas_numericas = ['Oferta', 'Contestadas', 'Abandonadas', 'Cumplen el SLA']
-    for col in columnas_numericas:
-        if col in df_mesa_ayuda.columns:
-            df_mesa_ayuda[col] = pd.to_numeric(df_mesa_ayuda[col], errors='coerce').fillna(0)
-    
-    df_mesa_ayuda['Manejo medio'] = df_mesa_ayuda['Manejo medio'].apply(convertir_tiempo_a_segundos)
-    
-    # Crear intervalo key
-    df_mesa_ayuda['intervalo_key'] = df_mesa_ayuda['hora_inicio'] + '-' + df_mesa_ayuda['hora_fin']
+    # KPIs por intervalo sumando TODAS las colas (una sola agregación sobre el detalle)
+    kpis = kpis_de_grupo(df_mesa_ayuda, 'mda', [
+        'Oferta', 'Contestadas', 'Abandonadas', 'Cumplen_SLA',
+        'Nivel_Atencion', 'Nivel_Servicio', 'Tasa_Abandono', 'TMO_Manejadas'
+    ], tabla_kpis)
+    kpis = kpis[kpis['Fecha'] == str(fecha_analisis)]
     
     # Obtener datos de agentes
     print(f"\n🔗 Obteniendo datos de agentes conectados...")
-    agentes_por_intervalo = obtener_datos_agentes()
+    agentes_por_intervalo = obtener_datos_agentes(agentes_por_intervalo)
     print(f"✅ Datos de agentes obtenidos: {len(agentes_por_intervalo)} intervalos")
     
     # Procesar intervalos sumando TODAS las colas individuales
     print(f"\n🔄 Procesando intervalos sumando todas las colas...")
     
     resultados = []
+    detallar = registro.isEnabledFor(DETALLE)
     
-    for intervalo in df_mesa_ayuda['intervalo_key'].unique():
-        grupo = df_mesa_ayuda[df_mesa_ayuda['intervalo_key'] == intervalo]
+    for datos in kpis.itertuples(index=False):
+        intervalo_display = datos.Intervalo
         
-        # Convertir columnas a numérico y sumar TODAS las colas
-        grupo_copy = grupo.copy()
-        columnas_numericas = ['Oferta', 'Contestadas', 'Abandonadas', 'Cumplen el SLA']
-        for col in columnas_numericas:
-            if col in grupo_copy.columns:
-                grupo_copy[col] = pd.to_numeric(grupo_copy[col], errors='coerce').fillna(0)
+        llamadas_recibidas = int(datos.Oferta)
+        llamadas_atendidas = int(datos.Contestadas)
+        llamadas_abandonadas = int(datos.Abandonadas)
+        llamadas_atendidas_20 = int(datos.Cumplen_SLA)
         
-        # Sumar todos los valores
-        llamadas_recibidas = int(grupo_copy['Oferta'].sum())
-        llamadas_atendidas = int(grupo_copy['Contestadas'].sum())
-        llamadas_abandonadas = int(grupo_copy['Abandonadas'].sum())
-        llamadas_atendidas_20 = int(grupo_copy['Cumplen el SLA'].sum())
-        
-        # Para TMO, usar la metodología EXACTA encontrada: suma de manejo total / suma de llamadas manejadas
-        tmo_total_segundos = 0
-        llamadas_manejadas_total = 0
-        
-        for _, row in grupo_copy.iterrows():
-            if pd.notna(row['Manejo total']) and pd.notna(row['Manejo medio']) and row['Manejo total'] > 0 and row['Manejo medio'] > 0:
-                manejo_total = convertir_tiempo_a_segundos(row['Manejo total']) if isinstance(row['Manejo total'], str) else float(row['Manejo total'])
-                manejo_medio = convertir_tiempo_a_segundos(row['Manejo medio']) if isinstance(row['Manejo medio'], str) else float(row['Manejo medio'])
-                
-                if manejo_total > 0 and manejo_medio > 0:
-                    llamadas_manejadas = manejo_total / manejo_medio
-                    tmo_total_segundos += manejo_total
-                    llamadas_manejadas_total += llamadas_manejadas
-        
-        if llamadas_manejadas_total > 0:
-            tmo_promedio_segundos = tmo_total_segundos / llamadas_manejadas_total
-            tmo_minutos = tmo_promedio_segundos / 60
-        else:
-            tmo_minutos = 0
-        
-        # Obtener intervalo display
-        if len(grupo) > 0:
-            primer_registro = grupo.iloc[0]
-            intervalo_display = f"{primer_registro['hora_inicio']}-{primer_registro['hora_fin']}"
-        else:
-            continue
+        # TMO con la metodología EXACTA: suma de manejo total / suma de llamadas manejadas
+        tmo_promedio_segundos = float(datos.TMO_Manejadas)
         
         # Niveles
-        nivel_atencion = (llamadas_atendidas / llamadas_recibidas * 100) if llamadas_recibidas > 0 else 0
-        nivel_servicio = (llamadas_atendidas_20 / llamadas_recibidas * 100) if llamadas_recibidas > 0 else 0
-        
-        # Validación específica para 19:00-19:30 (donde encontramos la fórmula exacta)
-        if intervalo_display == "19:00-19:30":
-            print(f"\n🎯 VALIDACIÓN 19:00-19:30 (FÓRMULA EXACTA):")
-            print(f"   Colas procesadas: {len(grupo)}")
-            print(f"   Oferta: {llamadas_recibidas}")
-            print(f"   Contestadas: {llamadas_atendidas}")
-            print(f"   Abandonadas: {llamadas_abandonadas}")
-            print(f"   TMO: {tmo_minutos:.2f} minutos ({tmo_promedio_segundos:.1f} segundos)")
-            print(f"   Nivel atención: {nivel_atencion:.1f}%")
-            print(f"   Nivel servicio: {nivel_servicio:.1f}%")
-            print(f"   👥 Agentes en cola: {agentes_conectados}")
-            
-            # Verificar si coincide con Genesys (416 segundos = 6m 56s)
-            if abs(tmo_promedio_segundos - 416) <= 2:
-                print(f"   ✅ TMO EXACTO GENESYS! Diferencia: {abs(tmo_promedio_segundos - 416):.1f}s")
-            else:
-                print(f"   ⚠️ Diferencia con Genesys (416s): {abs(tmo_promedio_segundos - 416):.1f}s")
-        
-        # Validación para 18:00-18:30 
-        elif intervalo_display == "18:00-18:30":
-            print(f"\n🎯 VALIDACIÓN 18:00-18:30:")
-            print(f"   Colas procesadas: {len(grupo)}")
-            print(f"   Oferta: {llamadas_recibidas}")
-            print(f"   Contestadas: {llamadas_atendidas}")
-            print(f"   Abandonadas: {llamadas_abandonadas}")
-            print(f"   TMO: {tmo_minutos:.2f} minutos ({tmo_promedio_segundos:.0f} segundos)")
-            print(f"   Nivel atención: {nivel_atencion:.1f}%")
-            print(f"   Nivel servicio: {nivel_servicio:.1f}%")
-            print(f"   👥 Agentes en cola: {agentes_conectados} (análisis timeline corregido)")
-            
-            # Verificar si coincide con Genesys (95 llamadas, 5m 45s = 345s)
-            if llamadas_recibidas == 95 and abs(tmo_promedio_segundos - 345) <= 5:
-                print(f"   ✅ VALORES EXACTOS GENESYS!")
-            else:
-                print(f"   ⚠️ Diferencia con Genesys esperado")
-            
-            # Mostrar desglose por cola
-            print(f"   DESGLOSE POR COLA:")
-            for _, row in grupo_copy.iterrows():
-                if row['Oferta'] > 0:
-                    print(f"     {row['Nombre de cola'][:30]:30s}: {row['Oferta']:3.0f} llamadas")
+        nivel_atencion = float(datos.Nivel_Atencion)
+        nivel_servicio = float(datos.Nivel_Servicio)
         
         # Obtener agentes conectados del timeline corregido
         agentes_conectados = agentes_por_intervalo.get(intervalo_display, 0)
         
         # Mostrar información del intervalo
-        if agentes_conectados > 0:
-            print(f"   ✅ Intervalo {intervalo_display}: {agentes_conectados} agentes (timeline corregido)")
-        else:
-            print(f"   ⚠️ Intervalo {intervalo_display}: 0 agentes detectados")
+        if detallar:
+            if agentes_conectados > 0:
+                registro.debug(f"   ✅ Intervalo {intervalo_display}: {agentes_conectados} agentes (timeline corregido)")
+            else:
+                registro.debug(f"   ⚠️ Intervalo {intervalo_display}: 0 agentes detectados")
         
         # Si nivel de servicio muy bajo, usar nivel de atención
         if nivel_servicio < 5 and nivel_atencion > 20:
-            print(f"   ⚠️ Nivel servicio muy bajo ({nivel_servicio:.2f}%) en {intervalo_display}, usando nivel de atención ({nivel_atencion:.2f}%)")
+            if detallar:
+                registro.debug(f"   ⚠️ Nivel servicio muy bajo ({nivel_servicio:.2f}%) en {intervalo_display}, usando nivel de atención ({nivel_atencion:.2f}%)")
             nivel_servicio = nivel_atencion
         
         # Calcular tasa de abandono
-        tasa_abandono = (llamadas_abandonadas / llamadas_recibidas * 100) if llamadas_recibidas > 0 else 0
+        tasa_abandono = float(datos.Tasa_Abandono)
         
         resultado = {
             'Intervalo': intervalo_display,
@@ -324,7 +207,7 @@ def main():
     
     # Guardar CSV
     df_resultados = pd.DataFrame(resultados)
-    archivo_salida = "ExportadosGenerados/Analisis_Mesa_Ayuda_Por_Intervalos.csv"
+    archivo_salida = ruta_salida('Analisis_Mesa_Ayuda_Por_Intervalos.csv')
     
     print(f"\n✅ ARCHIVO GENERADO: {archivo_salida}")
     print(f"📊 Total intervalos: {len(resultados)}")
@@ -346,7 +229,7 @@ def main():
         
         # Eliminar columna auxiliar antes de guardar
         df_final = df_resultados.drop('TMO_Segundos_Calculo', axis=1)
-        df_final.to_csv(archivo_salida, index=False)
+        guardar_resultado(df_final, 'Analisis_Mesa_Ayuda_Por_Intervalos.csv')
         
         # Análisis adicional con información cruzada
         print(f"\n🔍 ANÁLISIS CRUZADO CON TIMELINE:")
@@ -364,15 +247,13 @@ def main():
         print(f"📞 Más llamadas: {intervalo_mas_llamadas['Intervalo']} ({intervalo_mas_llamadas['Llamadas_Recibidas']} llamadas)")
         print(f"👥 Más agentes: {intervalo_mas_agentes['Intervalo']} ({intervalo_mas_agentes['Asesores_Conectados']} agentes)")
         
-        # Ejecutar validación detallada de agentes conectados desde el script especializado
-        print(f"\n" + "="*100)
-        print(f"🔍 EJECUTANDO VALIDACIÓN DETALLADA DESDE Analisis_timeline_mda.py")
-        print("=" * 90)
-        try:
-            from Analisis_timeline_mda import analizar_linea_tiempo_MA_corregido
-            analizar_linea_tiempo_MA_corregido()
-        except Exception as e:
-            print(f"⚠️ No se pudo ejecutar validación detallada: {e}")
+        # Validación detallada de agentes conectados (con los conteos ya calculados)
+        if registro.isEnabledFor(DETALLE):
+            registro.debug(f"\n" + "="*100)
+            registro.debug(f"🔍 VALIDACIÓN DETALLADA DE AGENTES (Analisis_timeline_mda.py)")
+            registro.debug("=" * 90)
+            from Analisis_timeline_mda import mostrar_agentes_por_intervalo_mda
+            mostrar_agentes_por_intervalo_mda(agentes_por_intervalo, fecha_analisis.strftime('%d/%m/%Y'))
     else:
         print("\n⚠️ No se generaron resultados - revisar filtros de fecha")
 
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+KPIs EXTENDIDOS POR GRUPO, TIPO DE MEDIOS E INTERVALO
+=====================================================
+Reporte con el paquete extendido de KPIs.py (ASA ponderado, tiempo en
+abandonar, tasa de transferencia, retención y ACW) junto a los KPIs básicos,
+separado por grupo de colas y 'Tipo de medios' (voz, mensaje):
+
+- básicos y extendidos salen de la misma agregación agrupada sobre el detalle
+  (calcular_kpis con por_medio=True); sumar KPIs no agrega pasadas
+- los promedios informados por Genesys se ponderan por su base (ASA por
+  contestadas, tiempo en abandonar por abandonadas) y los porcentajes se
+  recalculan desde las sumas del intervalo
+- si la exportación no separa por medio, todas las filas quedan con el valor
+  del filtro (p.ej. 'voz; mensaje')
+
+Uso:
+    tabla = kpis_por_medio(leer_detalle(columnas=COLUMNAS_DETALLE))
+    python AnalisisMedios.py
+
+Archivo de salida (ExportadosGenerados):
+- Analisis_Medios_Por_intervalos.csv
+"""
+
+from CargaDatos import guardar_resultado, leer_detalle
+from KPIs import COLUMNAS_DETALLE, KPIS_EXTENDIDOS, calcular_kpis
+
+ARCHIVO_MEDIOS = 'Analisis_Medios_Por_intervalos.csv'
+
+KPIS_REPORTE = ['Oferta', 'Contestadas', 'Abandonadas', 'Nivel_Servicio', 'TMO_Manejadas'] + KPIS_EXTENDIDOS
+SUFIJOS_PORCENTAJE = {'Nivel_Servicio', 'Tasa_Transferencia', 'Proporcion_Retencion', 'Proporcion_ACW'}
+
+
+def kpis_por_medio(df_detalle, indice_colas=None):
+    """
+    Returns:
+        DataFrame: Grupo, Medio, Fecha, Intervalo y KPIS_REPORTE (porcentajes con
+                   sufijo '_%', tiempos en segundos), redondeado a 2 decimales
+    """
+    tabla = calcular_kpis(df_detalle, KPIS_REPORTE, indice_colas=indice_colas, por_medio=True)
+    tabla = tabla.drop(columns='Inicio')
+    tabla = tabla.rename(columns={kpi: f'{kpi}_%' for kpi in SUFIJOS_PORCENTAJE})
+    conteos = ['Oferta', 'Contestadas', 'Abandonadas']
+    tabla[conteos] = tabla[conteos].astype(int)
+    return tabla.round(2)
+
+
+def main(df_detalle=None, indice_colas=None):
+    """
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo configurado)
+        indice_colas: índice de colas del mismo detalle (None = se arma aquí)
+    """
+    print("📡 KPIs EXTENDIDOS POR TIPO DE MEDIOS")
+    print("=" * 40)
+    if df_detalle is None:
+        df_detalle = leer_detalle(columnas=COLUMNAS_DETALLE)
+
+    tabla = kpis_por_medio(df_detalle, indice_colas)
+    archivo_salida = guardar_resultado(tabla, ARCHIVO_MEDIOS, encoding='utf-8')
+
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    print(f"📊 Filas: {len(tabla):,} | grupos: {tabla['Grupo'].nunique()} | medios: {', '.join(tabla['Medio'].unique())}")
+    for grupo, filas in tabla.groupby('Grupo', sort=False):
+        contestadas = filas['Contestadas'].sum()
+        if contestadas:
+            asa = (filas['ASA_Ponderado'] * filas['Contestadas']).sum() / contestadas
+            print(f"   {grupo:<15} contestadas {contestadas:6,} | ASA {asa:6.1f} s")
+
+
+if __name__ == "__main__":
+    main()
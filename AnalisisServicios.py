@@ -29,32 +29,42 @@ import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict
 import os
+from GruposColas import AGENTES_SERVICIOS, mascara_nombres
+from CargaDatos import guardar_resultado, leer_detalle, leer_timeline, ruta_entrada
+from KPIs import kpis_de_grupo
+from Analisis_timeline_comun import FORMATO_HORA_TIMELINE
+from ValidacionEntradas import depurar, texto_informe
+from Registro import registro_de
 
-def obtener_agentes_servicios_conectados():
+registro = registro_de('AnalisisServicios')
+
+def obtener_agentes_servicios_conectados(df_timeline=None):
     """
     Obtiene el número de agentes de Servicios conectados por intervalo desde el análisis de timeline.
     Solo considera los 2 agentes específicos de Servicios Administrativos.
+
+    Args:
+        df_timeline: timeline ya leído. Si es None, se lee el archivo.
     """
     
     try:
         # print("🔗 Obteniendo datos de agentes de Servicios conectados...")
         
         # Agentes específicos de Servicios Administrativos
-        agentes_servicios = [
-            "Servicios Generales - Ayllin Mori",
-            #"AG0179 Luis Acosta"
-            "AG0181 - Soledad Garcia"
-        ]
+        agentes_servicios = AGENTES_SERVICIOS
         
-        # Leer datos de timeline
-        df = pd.read_csv('ExportadosGenesysprueba/Resumen de línea de tiempo de estado de agente.csv', delimiter=';')
+        if df_timeline is None:
+            # Leer datos de timeline, sin las filas inválidas
+            df, informe = depurar(leer_timeline(), 'timeline')
+            if informe['excluidas']:
+                print(texto_informe(informe))
+        else:
+            df = df_timeline
         # print(f"📊 Total registros timeline: {len(df)}")
         
         # Filtrar solo agentes de Servicios
         servicios_data = df[
-            df['Nombre del agente'].apply(
-                lambda x: any(agente in str(x) for agente in agentes_servicios)
-            )
+            mascara_nombres(df['Nombre del agente'], agentes_servicios)
         ]
         # print(f"📋 Registros agentes Servicios: {len(servicios_data)}")
         
@@ -76,60 +86,52 @@ def obtener_agentes_servicios_conectados():
         intervalos_agentes = defaultdict(set)
         
         # Procesar cada registro
-        for _, row in en_cola_data.iterrows():
-            try:
-                inicio_str = str(row['Hora de inicio'])
-                fin_str = str(row['Hora de finalización'])
-                agente = str(row['Nombre del agente'])
-                
-                # Verificar si tiene fin o no
-                sin_fin = pd.isna(row['Hora de finalización']) or fin_str == 'nan' or fin_str.strip() == ''
-                
-                # Parsear fechas
-                inicio_dt = pd.to_datetime(inicio_str, format='%d/%m/%y %H:%M:%S', dayfirst=True)
-                
-                if sin_fin:
-                    # Para agentes sin fin, asumir que siguen hasta el final del día
-                    fin_dt = inicio_dt.replace(hour=23, minute=59, second=59)
-                else:
-                    fin_dt = pd.to_datetime(fin_str, format='%d/%m/%y %H:%M:%S', dayfirst=True)
-                
-                # Generar intervalos de 30 minutos que cubra este período
-                current_time = inicio_dt
-                while current_time < fin_dt:
-                    # Calcular inicio y fin del intervalo de 30 minutos
-                    minuto = current_time.minute
-                    if minuto < 30:
-                        intervalo_inicio = current_time.replace(minute=0, second=0, microsecond=0)
-                        intervalo_fin = current_time.replace(minute=30, second=0, microsecond=0)
-                    else:
-                        intervalo_inicio = current_time.replace(minute=30, second=0, microsecond=0)
-                        intervalo_fin = (current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
-                    
-                    # Verificar si hay superposición con el período del agente
-                    if inicio_dt < intervalo_fin and fin_dt > intervalo_inicio:
-                        # Calcular tiempo efectivo en este intervalo
-                        tiempo_inicio = max(inicio_dt, intervalo_inicio)
-                        tiempo_fin_calc = min(fin_dt, intervalo_fin)
-                        tiempo_en_intervalo = (tiempo_fin_calc - tiempo_inicio).total_seconds() / 60  # minutos
-                        
-                        # Solo contar si estuvo al menos 5 minutos en el intervalo
-                        if tiempo_en_intervalo >= 5:
-                            # Formato del intervalo
-                            if intervalo_inicio.hour == 23 and intervalo_inicio.minute == 30:
-                                intervalo_key = "23:30-00:00"
-                            else:
-                                hora_inicio = f"{intervalo_inicio.hour:02d}:{intervalo_inicio.minute:02d}"
-                                hora_fin = f"{intervalo_fin.hour:02d}:{intervalo_fin.minute:02d}"
-                                intervalo_key = f"{hora_inicio}-{hora_fin}"
-                            
-                            intervalos_agentes[intervalo_key].add(agente)
-                    
-                    # Avanzar al siguiente intervalo
-                    current_time = intervalo_fin
-                    
-            except Exception as e:
+        # Fechas parseadas una sola vez para todo el bloque; las filas con fechas
+        # ilegibles ya se excluyeron al cargar (ValidacionEntradas.depurar)
+        inicios = pd.to_datetime(en_cola_data['Hora de inicio'], format=FORMATO_HORA_TIMELINE, errors='coerce')
+        fines = pd.to_datetime(en_cola_data['Hora de finalización'], format=FORMATO_HORA_TIMELINE, errors='coerce')
+        
+        for agente, inicio_dt, fin_dt in zip(en_cola_data['Nombre del agente'].astype(str), inicios, fines):
+            if pd.isna(inicio_dt):
                 continue
+            
+            if pd.isna(fin_dt):
+                # Para agentes sin fin, asumir que siguen hasta el final del día
+                fin_dt = inicio_dt.replace(hour=23, minute=59, second=59)
+            
+            # Generar intervalos de 30 minutos que cubra este período
+            current_time = inicio_dt
+            while current_time < fin_dt:
+                # Calcular inicio y fin del intervalo de 30 minutos
+                minuto = current_time.minute
+                if minuto < 30:
+                    intervalo_inicio = current_time.replace(minute=0, second=0, microsecond=0)
+                    intervalo_fin = current_time.replace(minute=30, second=0, microsecond=0)
+                else:
+                    intervalo_inicio = current_time.replace(minute=30, second=0, microsecond=0)
+                    intervalo_fin = (current_time.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+
+                # Verificar si hay superposición con el período del agente
+                if inicio_dt < intervalo_fin and fin_dt > intervalo_inicio:
+                    # Calcular tiempo efectivo en este intervalo
+                    tiempo_inicio = max(inicio_dt, intervalo_inicio)
+                    tiempo_fin_calc = min(fin_dt, intervalo_fin)
+                    tiempo_en_intervalo = (tiempo_fin_calc - tiempo_inicio).total_seconds() / 60  # minutos
+
+                    # Solo contar si estuvo al menos 5 minutos en el intervalo
+                    if tiempo_en_intervalo >= 5:
+                        # Formato del intervalo
+                        if intervalo_inicio.hour == 23 and intervalo_inicio.minute == 30:
+                            intervalo_key = "23:30-00:00"
+                        else:
+                            hora_inicio = f"{intervalo_inicio.hour:02d}:{intervalo_inicio.minute:02d}"
+                            hora_fin = f"{intervalo_fin.hour:02d}:{intervalo_fin.minute:02d}"
+                            intervalo_key = f"{hora_inicio}-{hora_fin}"
+
+                        intervalos_agentes[intervalo_key].add(agente)
+
+                # Avanzar al siguiente intervalo
+                current_time = intervalo_fin
         
         # Convertir a diccionario con conteos
         resultado = {}
@@ -140,25 +142,35 @@ def obtener_agentes_servicios_conectados():
         return resultado
         
     except Exception as e:
-        # print(f"❌ Error obteniendo agentes Servicios: {e}")
-        return {}
+        registro.error(f"❌ Error obteniendo agentes Servicios: {e}")
+        raise
 
-def procesar_archivo_servicios():
-    """Función principal para procesar el archivo de Servicios Administrativos"""
+def procesar_archivo_servicios(df_detalle=None, agentes_por_intervalo=None, tabla_kpis=None):
+    """
+    Función principal para procesar el archivo de Servicios Administrativos
+    
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo)
+        agentes_por_intervalo: agentes de Servicios por intervalo ya calculados
+        tabla_kpis: KPIs de todos los grupos ya calculados (KPIs.calcular_kpis)
+    """
     
     print("🎬 ANÁLISIS DE SERVICIOS ADMINISTRATIVOS")
     print("=" * 40)
     
     try:
-        # Leer archivo
-        archivo_servicios = 'ExportadosGenesysprueba/Detalle del rendimiento de colas.csv'
-        # print(f"📁 Leyendo archivo: {archivo_servicios}")
-        
-        if not os.path.exists(archivo_servicios):
-            print(f"❌ Error: No se encuentra el archivo {archivo_servicios}")
-            return
-        
-        df = pd.read_csv(archivo_servicios, delimiter=';')
+        if df_detalle is None:
+            # Leer archivo
+            archivo_servicios = ruta_entrada('detalle')
+            # print(f"📁 Leyendo archivo: {archivo_servicios}")
+            
+            if not os.path.exists(archivo_servicios):
+                print(f"❌ Error: No se encuentra el archivo {archivo_servicios}")
+                return
+            
+            df = leer_detalle(archivo_servicios)
+        else:
+            df = df_detalle
         print(f"✅ Registros cargados: {len(df)}")
         
         # Filtrar solo registros de Servicios Administrativos
@@ -170,103 +182,57 @@ def procesar_archivo_servicios():
             return
         
         # Obtener datos de agentes conectados
-        agentes_por_intervalo = obtener_agentes_servicios_conectados()
+        if agentes_por_intervalo is None:
+            agentes_por_intervalo = obtener_agentes_servicios_conectados()
+        
+        # KPIs por intervalo (una sola agregación sobre el detalle)
+        kpis = kpis_de_grupo(df, 'servicios', [
+            'Oferta', 'Contestadas', 'Abandonadas', 'Cumplen_SLA',
+            'Nivel_Atencion', 'Nivel_Servicio', 'TMO_Contestadas'
+        ], tabla_kpis)
         
-        # Procesar datos por intervalos
         resultados = []
         intervalos_procesados = 0
         
-        for _, row in servicios_data.iterrows():
-            try:
-                # Extraer datos básicos - conversión segura
-                inicio_intervalo = str(row['Inicio del intervalo'])
-                
-                # Convertir valores de manera segura
-                oferta_raw = pd.to_numeric(row['Oferta'], errors='coerce')
-                oferta = int(oferta_raw) if pd.notna(oferta_raw) else 0
-                
-                contestadas_raw = pd.to_numeric(row['Contestadas'], errors='coerce')
-                contestadas = int(contestadas_raw) if pd.notna(contestadas_raw) else 0
-                
-                abandonadas_raw = pd.to_numeric(row['Abandonadas'], errors='coerce')
-                abandonadas = int(abandonadas_raw) if pd.notna(abandonadas_raw) else 0
-                
-                cumplen_sla_raw = pd.to_numeric(row['Cumplen el SLA'], errors='coerce')
-                cumplen_sla = int(cumplen_sla_raw) if pd.notna(cumplen_sla_raw) else 0
-                
-                manejo_total_raw = pd.to_numeric(row['Manejo total'], errors='coerce')
-                manejo_total = float(manejo_total_raw) if pd.notna(manejo_total_raw) else 0.0
-                
-                # Crear intervalo en formato HH:MM-HH:MM
-                try:
-                    inicio_dt = pd.to_datetime(inicio_intervalo, format='%d/%m/%y %H:%M', dayfirst=True)
-                    fin_dt = inicio_dt + timedelta(minutes=30)
-                    
-                    if inicio_dt.hour == 23 and inicio_dt.minute == 30:
-                        intervalo_str = "23:30-00:00"
-                    else:
-                        intervalo_str = f"{inicio_dt.hour:02d}:{inicio_dt.minute:02d}-{fin_dt.hour:02d}:{fin_dt.minute:02d}"
-                    
-                    fecha_str = inicio_dt.strftime('%Y-%m-%d')
-                except:
-                    continue
-                
-                # Calcular métricas
-                nivel_atencion = (contestadas / oferta * 100) if oferta > 0 else 0
-                nivel_servicio = (cumplen_sla / oferta * 100) if oferta > 0 else 0
-                tmo_segundos = (manejo_total / contestadas) if contestadas > 0 else 0
-                tmo_minutos = tmo_segundos / 60
-                
-                # Formatear TMO como HH:MM:SS
-                if tmo_segundos > 0:
-                    horas = int(tmo_segundos // 3600)
-                    minutos = int((tmo_segundos % 3600) // 60)
-                    segundos = int(tmo_segundos % 60)
-                    tmo_formato = f"{horas:02d}:{minutos:02d}:{segundos:02d}"
-                else:
-                    tmo_formato = "00:00:00"
-                
-                # Obtener agentes conectados
-                agentes_conectados = agentes_por_intervalo.get(intervalo_str, 0)
-                
-                # Debug para algunos intervalos
-                # print(f"  📞 Datos básicos: Oferta={oferta}, Contestadas={contestadas}, Abandonadas={abandonadas}, <=20s={cumplen_sla}")
-                # print(f"  ⏱️ TMO: {tmo_minutos:.2f} min ({tmo_segundos:.1f}s) | Manejo medio: {tmo_segundos:.1f}s")
-                
-                # Crear registro resultado (sin conversiones adicionales, ya están convertidos)
-                resultado = {
-                    'Intervalo': intervalo_str,
-                    'Fecha': fecha_str,
-                    'Llamadas_Recibidas': oferta,
-                    'Llamadas_Atendidas': contestadas,
-                    'Llamadas_Abandonadas': abandonadas,
-                    'Llamadas_Atendidas_20s': cumplen_sla,
-                    'Nivel_Atencion': round(nivel_atencion, 2),
-                    'Nivel_Servicio': round(nivel_servicio, 2),
-                    'TMO': tmo_formato,
-                    'Asesores_Conectados': agentes_conectados,
-                    'Asesores_Requeridos': '',
-                    'Llamadas_Atendidas_Por_Agente': '',
-                    'Proyectado': '',
-                    'Desviacion': ''
-                }
-                
-                resultados.append(resultado)
-                intervalos_procesados += 1
-                
-            except Exception as e:
-                print(f"❌ Error procesando intervalo: {e}")
-                continue
+        for datos in kpis.itertuples(index=False):
+            tmo_segundos = datos.TMO_Contestadas
+            
+            # Formatear TMO como HH:MM:SS
+            if tmo_segundos > 0:
+                horas = int(tmo_segundos // 3600)
+                minutos = int((tmo_segundos % 3600) // 60)
+                segundos = int(tmo_segundos % 60)
+                tmo_formato = f"{horas:02d}:{minutos:02d}:{segundos:02d}"
+            else:
+                tmo_formato = "00:00:00"
+            
+            # Obtener agentes conectados
+            agentes_conectados = agentes_por_intervalo.get(datos.Intervalo, 0)
+            
+            resultado = {
+                'Intervalo': datos.Intervalo,
+                'Fecha': datos.Fecha,
+                'Llamadas_Recibidas': int(datos.Oferta),
+                'Llamadas_Atendidas': int(datos.Contestadas),
+                'Llamadas_Abandonadas': int(datos.Abandonadas),
+                'Llamadas_Atendidas_20s': int(datos.Cumplen_SLA),
+                'Nivel_Atencion': round(float(datos.Nivel_Atencion), 2),
+                'Nivel_Servicio': round(float(datos.Nivel_Servicio), 2),
+                'TMO': tmo_formato,
+                'Asesores_Conectados': agentes_conectados,
+                'Asesores_Requeridos': '',
+                'Llamadas_Atendidas_Por_Agente': '',
+                'Proyectado': '',
+                'Desviacion': ''
+            }
+            
+            resultados.append(resultado)
+            intervalos_procesados += 1
         
         # Crear DataFrame y guardar
         if resultados:
-            # Crear carpeta si no existe
-            if not os.path.exists('ExportadosGenerados'):
-                os.makedirs('ExportadosGenerados')
-            
             df_resultado = pd.DataFrame(resultados)
-            archivo_salida = 'ExportadosGenerados/Analisis_Servicios_Por_intervalos.csv'
-            df_resultado.to_csv(archivo_salida, index=False)
+            archivo_salida = guardar_resultado(df_resultado, 'Analisis_Servicios_Por_intervalos.csv')
             
             print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
             print(f"📊 Total intervalos: {len(resultados)}")
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+CUBO DE SEGUNDOS POR ESTADO DE AGENTE
+=====================================
+Recorre una sola vez "Resumen de línea de tiempo de estado de agente.csv" y
+reparte la duración de cada registro en los intervalos de 30 minutos que
+atraviesa, generando un cubo de segundos indexado por
+(agente, intervalo, estado principal/secundario).
+
+A partir del cubo se calculan, para cada grupo de colas y sin volver a leer el
+timeline:
+- Utilización: segundos 'En la cola' / segundos conectado
+- Disponibilidad: segundos 'Disponible' / segundos conectado
+- Shrinkage: segundos en estados auxiliares (Descanso, Comida, Reunión, ...) / segundos conectado
+- Ocupación: 'Manejo total' del detalle de colas / segundos 'En la cola'
+
+Archivos de salida (ExportadosGenerados):
+- Cubo_Estados_Agentes.npz
+- Analisis_Estados_Por_intervalos.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+from CargaDatos import abrir_salida, guardar_resultado, leer_detalle, leer_timeline
+from GruposColas import GRUPOS, grupo_de_cola, grupo_tiene_agentes, mascara_agentes_grupo
+
+SEGUNDOS_INTERVALO = 30 * 60
+
+ESTADO_EN_COLA = 'En la cola'
+ESTADO_DISPONIBLE = 'Disponible'
+ESTADO_DESCONECTADO = 'Desconectado'
+
+
+def _intervalos_de_rango(inicio, cantidad):
+    """Devuelve (fechas 'YYYY-MM-DD', intervalos 'HH:MM-HH:MM') para cada slot del cubo"""
+    inicios = pd.date_range(inicio, periods=cantidad, freq=f'{SEGUNDOS_INTERVALO}s')
+    fines = inicios + pd.Timedelta(seconds=SEGUNDOS_INTERVALO)
+    fechas = inicios.strftime('%Y-%m-%d')
+    intervalos = inicios.strftime('%H:%M') + '-' + fines.strftime('%H:%M')
+    return list(fechas), list(intervalos)
+
+
+def construir_cubo_estados(df):
+    """
+    Construye el cubo de segundos por (agente, intervalo, estado) en un único barrido.
+
+    Los registros sin 'Hora de finalización' terminan donde empieza el siguiente
+    registro del mismo agente (el timeline es continuo por agente) o, si es el
+    último, al final del rango exportado.
+
+    Returns:
+        dict con 'segundos' (ndarray float32 agentes x intervalos x estados),
+        'agentes', 'divisiones', 'estados_principales', 'estados_secundarios' e 'inicio'
+    """
+    inicio_rango = pd.to_datetime(df['Inicio del intervalo'], format='%d/%m/%y %H:%M', errors='coerce').min()
+    fin_rango = pd.to_datetime(df['Fin del intervalo'], format='%d/%m/%y %H:%M', errors='coerce').max()
+    inicio_rango = inicio_rango.floor(f'{SEGUNDOS_INTERVALO}s')
+    cantidad_intervalos = int(np.ceil((fin_rango - inicio_rango).total_seconds() / SEGUNDOS_INTERVALO))
+    limite = cantidad_intervalos * SEGUNDOS_INTERVALO
+
+    registros = pd.DataFrame({
+        'agente': df['Nombre del agente'].astype(str),
+        'division': df['Nombre de la división'].astype(str),
+        'principal': df['Estado principal'].astype(str),
+        'secundario': df['Estado secundario'].fillna(df['Estado principal']).astype(str),
+        'inicio': pd.to_datetime(df['Hora de inicio'], format='%d/%m/%y %H:%M:%S', errors='coerce'),
+        'fin': pd.to_datetime(df['Hora de finalización'], format='%d/%m/%y %H:%M:%S', errors='coerce'),
+    })
+    registros = registros[registros['inicio'].notna()]
+    registros = registros.sort_values(['agente', 'inicio'], kind='mergesort')
+
+    # Barrido por agente: el fin de un registro abierto es el inicio del siguiente
+    siguiente_inicio = registros.groupby('agente', sort=False)['inicio'].shift(-1)
+    registros['fin'] = registros['fin'].fillna(siguiente_inicio).fillna(fin_rango)
+
+    segundo_inicio = (registros['inicio'] - inicio_rango).dt.total_seconds().to_numpy()
+    segundo_fin = (registros['fin'] - inicio_rango).dt.total_seconds().to_numpy()
+    segundo_inicio = np.clip(segundo_inicio, 0, limite)
+    segundo_fin = np.clip(segundo_fin, 0, limite)
+    validos = segundo_fin > segundo_inicio
+
+    codigos_agente, agentes = pd.factorize(registros['agente'], sort=True)
+    divisiones = registros.drop_duplicates('agente').set_index('agente')['division'].reindex(agentes)
+    pares_estado = registros['principal'] + '\x1f' + registros['secundario']
+    codigos_estado, estados = pd.factorize(pares_estado, sort=True)
+    estados_principales = [estado.split('\x1f')[0] for estado in estados]
+    estados_secundarios = [estado.split('\x1f')[1] for estado in estados]
+
+    codigos_agente = codigos_agente[validos]
+    codigos_estado = codigos_estado[validos]
+    segundo_inicio = segundo_inicio[validos]
+    segundo_fin = segundo_fin[validos]
+
+    # Expandir cada registro a los intervalos que atraviesa (aritmética de índices)
+    primer_intervalo = (segundo_inicio // SEGUNDOS_INTERVALO).astype(np.int64)
+    ultimo_intervalo = ((segundo_fin - 1e-9) // SEGUNDOS_INTERVALO).astype(np.int64)
+    tramos = ultimo_intervalo - primer_intervalo + 1
+    registro_tramo = np.repeat(np.arange(len(tramos)), tramos)
+    desplazamiento = np.arange(len(registro_tramo)) - np.repeat(np.cumsum(tramos) - tramos, tramos)
+    intervalo_tramo = primer_intervalo[registro_tramo] + desplazamiento
+
+    inicio_tramo = np.maximum(segundo_inicio[registro_tramo], intervalo_tramo * SEGUNDOS_INTERVALO)
+    fin_tramo = np.minimum(segundo_fin[registro_tramo], (intervalo_tramo + 1) * SEGUNDOS_INTERVALO)
+
+    cantidad_estados = len(estados)
+    posicion = (codigos_agente[registro_tramo] * cantidad_intervalos + intervalo_tramo) * cantidad_estados \
+        + codigos_estado[registro_tramo]
+    segundos = np.bincount(
+        posicion,
+        weights=fin_tramo - inicio_tramo,
+        minlength=len(agentes) * cantidad_intervalos * cantidad_estados
+    ).astype(np.float32).reshape(len(agentes), cantidad_intervalos, cantidad_estados)
+
+    return {
+        'segundos': segundos,
+        'agentes': np.array(list(agentes), dtype=str),
+        'divisiones': np.array(list(divisiones), dtype=str),
+        'estados_principales': np.array(estados_principales, dtype=str),
+        'estados_secundarios': np.array(estados_secundarios, dtype=str),
+        'inicio': inicio_rango,
+    }
+
+
+def guardar_cubo(cubo, ruta):
+    """Guarda el cubo en formato .npz comprimido"""
+    np.savez_compressed(
+        ruta,
+        segundos=cubo['segundos'],
+        agentes=cubo['agentes'],
+        divisiones=cubo['divisiones'],
+        estados_principales=cubo['estados_principales'],
+        estados_secundarios=cubo['estados_secundarios'],
+        inicio=np.array(cubo['inicio'].strftime('%Y-%m-%d %H:%M:%S')),
+    )
+
+
+def cargar_cubo(ruta):
+    """Carga un cubo guardado con guardar_cubo()"""
+    with np.load(ruta, allow_pickle=False) as datos:
+        return {
+            'segundos': datos['segundos'],
+            'agentes': datos['agentes'],
+            'divisiones': datos['divisiones'],
+            'estados_principales': datos['estados_principales'],
+            'estados_secundarios': datos['estados_secundarios'],
+            'inicio': pd.Timestamp(str(datos['inicio'])),
+        }
+
+
+def segundos_por_estado_principal(cubo, clave_grupo):
+    """
+    Suma el cubo para los agentes del grupo y lo agrupa por estado principal.
+
+    Returns:
+        DataFrame (intervalos x estados principales) con segundos
+    """
+    mascara = mascara_agentes_grupo(
+        pd.Series(cubo['agentes']), pd.Series(cubo['divisiones']), clave_grupo
+    ).to_numpy()
+    por_estado = cubo['segundos'][mascara].sum(axis=0, dtype=np.float64)
+    tabla = pd.DataFrame(por_estado, columns=cubo['estados_principales'])
+    return tabla.T.groupby(level=0).sum().T
+
+
+def metricas_por_intervalo(cubo, clave_grupo, manejo_por_intervalo=None):
+    """
+    Calcula utilización, disponibilidad, shrinkage y ocupación por intervalo para un grupo.
+
+    Args:
+        cubo: resultado de construir_cubo_estados() o cargar_cubo()
+        clave_grupo: clave en GRUPOS
+        manejo_por_intervalo: dict opcional {(fecha, intervalo): segundos de 'Manejo total'}
+    """
+    tabla = segundos_por_estado_principal(cubo, clave_grupo)
+    fechas, intervalos = _intervalos_de_rango(cubo['inicio'], cubo['segundos'].shape[1])
+
+    total = tabla.sum(axis=1)
+    desconectado = tabla.get(ESTADO_DESCONECTADO, 0.0)
+    en_cola = tabla.get(ESTADO_EN_COLA, 0.0) + 0.0
+    disponible = tabla.get(ESTADO_DISPONIBLE, 0.0) + 0.0
+    conectado = total - desconectado
+    auxiliar = conectado - en_cola - disponible
+
+    resultado = pd.DataFrame({
+        'Grupo': GRUPOS[clave_grupo]['nombre'],
+        'Fecha': fechas,
+        'Intervalo': intervalos,
+        'Segundos_Conectado': conectado.round(0).astype(int),
+        'Segundos_En_Cola': np.round(en_cola, 0).astype(int),
+        'Segundos_Disponible': np.round(disponible, 0).astype(int),
+        'Segundos_Auxiliar': np.round(auxiliar, 0).astype(int),
+    })
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['Utilizacion_%'] = np.where(conectado > 0, en_cola / conectado * 100, 0).round(2)
+        resultado['Disponibilidad_%'] = np.where(conectado > 0, disponible / conectado * 100, 0).round(2)
+        resultado['Shrinkage_%'] = np.where(conectado > 0, auxiliar / conectado * 100, 0).round(2)
+
+        if manejo_por_intervalo is not None:
+            manejo = np.array([manejo_por_intervalo.get(clave, 0.0) for clave in zip(fechas, intervalos)])
+            resultado['Ocupacion_%'] = np.where(en_cola > 0, manejo / en_cola * 100, 0).round(2)
+
+    return resultado
+
+
+def manejo_total_por_grupo(df_detalle):
+    """
+    Suma 'Manejo total' del detalle por (grupo, fecha, intervalo) en una sola agrupación.
+
+    Returns:
+        dict {clave_grupo: {(fecha, intervalo): segundos}}
+    """
+    grupos = df_detalle['Nombre de cola'].map(grupo_de_cola())
+    inicio = pd.to_datetime(df_detalle['Inicio del intervalo'], format='%d/%m/%y %H:%M', errors='coerce')
+    fin = pd.to_datetime(df_detalle['Fin del intervalo'], format='%d/%m/%y %H:%M', errors='coerce')
+    datos = pd.DataFrame({
+        'grupo': grupos,
+        'fecha': inicio.dt.strftime('%Y-%m-%d'),
+        'intervalo': inicio.dt.strftime('%H:%M') + '-' + fin.dt.strftime('%H:%M'),
+        'manejo': pd.to_numeric(df_detalle['Manejo total'], errors='coerce').fillna(0),
+    }).dropna(subset=['grupo', 'fecha'])
+
+    sumas = datos.groupby(['grupo', 'fecha', 'intervalo'])['manejo'].sum()
+    manejo = {}
+    for (grupo, fecha, intervalo), segundos in sumas.items():
+        manejo.setdefault(grupo, {})[(fecha, intervalo)] = float(segundos)
+    return manejo
+
+
+def metricas_todos_los_grupos(cubo, df_detalle=None):
+    """Calcula las métricas por intervalo para todos los grupos que tienen agentes en el timeline"""
+    manejo = manejo_total_por_grupo(df_detalle) if df_detalle is not None else None
+    tablas = []
+    for clave_grupo in GRUPOS:
+        if not grupo_tiene_agentes(clave_grupo):
+            continue
+        manejo_grupo = manejo.get(clave_grupo, {}) if manejo is not None else None
+        tablas.append(metricas_por_intervalo(cubo, clave_grupo, manejo_grupo))
+    return pd.concat(tablas, ignore_index=True)
+
+
+def main(df_detalle=None, cubo=None):
+    """
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo)
+        cubo: cubo ya construido (None = construirlo desde el timeline)
+    """
+    print("🧊 ANÁLISIS DE ESTADOS DE AGENTES (CUBO)")
+    print("=" * 40)
+
+    if cubo is None:
+        df_timeline = leer_timeline()
+        print(f"✅ Registros de timeline cargados: {len(df_timeline)}")
+        cubo = construir_cubo_estados(df_timeline)
+    agentes, intervalos, estados = cubo['segundos'].shape
+    print(f"📦 Cubo: {agentes} agentes x {intervalos} intervalos x {estados} estados")
+
+    if df_detalle is None:
+        try:
+            df_detalle = leer_detalle()
+        except Exception as e:
+            print(f"⚠️ Sin detalle de colas, no se calcula ocupación: {e}")
+
+    with abrir_salida('Cubo_Estados_Agentes.npz') as archivo:
+        guardar_cubo(cubo, archivo)
+
+    df_resultado = metricas_todos_los_grupos(cubo, df_detalle)
+    archivo_salida = guardar_resultado(df_resultado, 'Analisis_Estados_Por_intervalos.csv', encoding='utf-8')
+
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    print(f"📊 Total filas: {len(df_resultado)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+UTILIDADES COMUNES DEL TIMELINE DE AGENTES
+==========================================
+Funciones compartidas por los análisis que leen
+"Resumen de línea de tiempo de estado de agente.csv".
+
+- detectar_fecha_timeline: fecha del primer registro con intervalo válido
+- resolver_fines: fin de los registros abiertos resuelto, como arreglos con la
+  posición de cada fila (IndiceEstados.py lo usa para conservar estado y división)
+- registros_resueltos: intervalos [inicio, fin) absolutos de todos los registros
+  (índice de estados, adherencia a turnos)
+- resolver_registros_turno: registros compactos (__slots__) con el fin de los
+  registros abiertos ya resuelto, en segundos desde la medianoche del día objetivo
+- contar_agentes_por_intervalo: agentes con al menos 5 minutos en cada intervalo
+  de 30 minutos, por consultas de solapamiento sobre el índice de estados
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+FORMATO_HORA_TIMELINE = '%d/%m/%y %H:%M:%S'
+
+SEGUNDOS_INTERVALO = 30 * 60
+SEGUNDOS_DIA = 24 * 60 * 60
+INTERVALOS_DIA = SEGUNDOS_DIA // SEGUNDOS_INTERVALO
+
+# Un agente cuenta en un intervalo si estuvo al menos 5 minutos en él
+SEGUNDOS_MINIMOS_EN_INTERVALO = 5 * 60
+
+# Ventana en la que el inicio de otro registro se toma como fin de un registro abierto
+VENTANA_FIN_MINIMA = 60
+VENTANA_FIN_MAXIMA = 180 * 60
+
+
+class RegistroTurno:
+    """Registro resuelto de un agente, en segundos relativos a la medianoche del día objetivo"""
+
+    __slots__ = ('agente', 'inicio', 'fin')
+
+    def __init__(self, agente, inicio, fin):
+        self.agente = agente
+        self.inicio = inicio
+        self.fin = fin
+
+
+def intervalos_del_dia():
+    """Devuelve las 48 claves 'HH:MM-HH:MM' del día, de 00:00-00:30 a 23:30-00:00"""
+    intervalos = []
+    for h in range(24):
+        intervalos.append(f"{h:02d}:00-{h:02d}:30")
+        if h == 23:
+            intervalos.append("23:30-00:00")
+        else:
+            intervalos.append(f"{h:02d}:30-{h+1:02d}:00")
+    return intervalos
+
+
+def detectar_fecha_timeline(df):
+    """
+    Devuelve la fecha ('dd/mm/yyyy') del primer registro con 'Inicio del intervalo'
+    válido o, si no hay, del primer registro con 'Hora de inicio' válida.
+    """
+    for columna in ('Inicio del intervalo', 'Hora de inicio'):
+        if columna not in df.columns:
+            continue
+        fechas = pd.to_datetime(
+            df[columna].astype(str).str.split(' ').str[0], format='%d/%m/%y', errors='coerce'
+        ).dropna()
+        if len(fechas) > 0:
+            return fechas.iloc[0].strftime('%d/%m/%Y')
+    return None
+
+
+def resolver_fines(df_filtrado, fecha_obj):
+    """
+    Resuelve el fin de los registros abiertos del timeline (ver resolver_registros_turno),
+    en segundos relativos a la medianoche de fecha_obj.
+
+    Returns:
+        tuple: (posiciones de las filas en df_filtrado, código de agente, inicio, fin)
+               como arreglos, ordenados por agente e inicio; fin NaN = sin resolver.
+               Se omiten los registros descartados y los que no tienen agente.
+        list: nombre de cada código de agente
+    """
+    vacio = np.array([], dtype=np.int64)
+    if len(df_filtrado) == 0:
+        return (vacio, vacio, np.array([]), np.array([])), []
+
+    medianoche = pd.Timestamp(fecha_obj).normalize()
+    fin_texto = df_filtrado['Hora de finalización']
+    tiene_fin = fin_texto.notna() & (fin_texto.astype(str).str.strip() != '') & (fin_texto.astype(str) != 'nan')
+
+    inicio = (pd.to_datetime(df_filtrado['Hora de inicio'], format=FORMATO_HORA_TIMELINE, errors='coerce')
+              - medianoche).dt.total_seconds().to_numpy()
+    fin = (pd.to_datetime(fin_texto, format=FORMATO_HORA_TIMELINE, errors='coerce')
+           - medianoche).dt.total_seconds().to_numpy()
+    codigos_agente, agentes = pd.factorize(df_filtrado['Nombre del agente'])
+
+    # Orden estable por agente e inicio: los registros abiertos buscan su fin hacia adelante
+    orden = np.lexsort((np.where(np.isnan(inicio), np.inf, inicio), codigos_agente))
+    codigos_agente = codigos_agente[orden]
+    inicio = inicio[orden]
+    fin = fin[orden]
+    tiene_fin = tiene_fin.to_numpy()[orden]
+
+    posiciones, fines = [], []
+    limites = np.flatnonzero(np.diff(codigos_agente)) + 1
+    for desde, hasta in zip(np.concatenate(([0], limites)), np.concatenate((limites, [len(orden)]))):
+        inicios_agente = inicio[desde:hasta]
+        fines_agente = fin[desde:hasta]
+        inicios_ordenados = inicios_agente[~np.isnan(inicios_agente)].tolist()
+        if codigos_agente[desde] < 0:
+            continue  # registros sin nombre de agente
+
+        for posicion in range(hasta - desde):
+            inicio_registro = inicios_agente[posicion]
+            fin_registro = fines_agente[posicion]
+            if np.isnan(inicio_registro):
+                continue
+
+            if np.isnan(fin_registro):
+                if tiene_fin[desde + posicion]:
+                    continue  # fin informado pero ilegible
+
+                mismo_inicio = np.flatnonzero(
+                    (inicios_agente == inicio_registro) & ~np.isnan(fines_agente)
+                )
+                mismo_inicio = mismo_inicio[mismo_inicio != posicion]
+                if len(mismo_inicio) > 0:
+                    fin_registro = fines_agente[mismo_inicio[0]]
+                else:
+                    siguiente = bisect_left(inicios_ordenados, inicio_registro + VENTANA_FIN_MINIMA)
+                    if siguiente < len(inicios_ordenados) and \
+                            inicios_ordenados[siguiente] - inicio_registro <= VENTANA_FIN_MAXIMA:
+                        fin_registro = inicios_ordenados[siguiente]
+
+            posiciones.append(desde + posicion)
+            fines.append(fin_registro)
+
+    posiciones = np.array(posiciones, dtype=np.int64)
+    return (orden[posiciones], codigos_agente[posiciones], inicio[posiciones], np.array(fines, dtype=float)), list(agentes)
+
+
+def registros_resueltos(df_timeline):
+    """
+    Registros del timeline como intervalos [inicio, fin) en segundos desde
+    1970-01-01, con el fin de los abiertos resuelto (resolver_fines); los que no
+    se pudieron resolver llegan hasta el fin del día en que empiezan.
+
+    Returns:
+        tuple: (posiciones de las filas en df_timeline, inicio, fin) como arreglos
+               int64, ordenados por agente e inicio
+    """
+    (posiciones, _, inicio, fin), _ = resolver_fines(df_timeline, pd.Timestamp('1970-01-01'))
+    fin = np.where(np.isnan(fin), (np.floor(inicio / SEGUNDOS_DIA) + 1) * SEGUNDOS_DIA, fin)
+    return posiciones, inicio.astype(np.int64), fin.astype(np.int64)
+
+
+def resolver_registros_turno(df_filtrado, fecha_obj):
+    """
+    Convierte los registros filtrados del timeline en RegistroTurno.
+
+    Los registros sin fin toman como fin el de otro registro del agente con la misma
+    hora de inicio o, si no existe, el inicio del siguiente registro del agente que
+    empiece entre 1 minuto y 3 horas después. Si no se encuentra, el fin queda en None.
+    Los registros con hora de inicio (o fin informado) ilegible se descartan.
+
+    Returns:
+        tuple: (lista de RegistroTurno, lista con el nombre de cada código de agente)
+    """
+    (_, codigos_agente, inicio, fin), agentes = resolver_fines(df_filtrado, fecha_obj)
+    registros = [
+        RegistroTurno(agente, int(inicio_registro), None if np.isnan(fin_registro) else int(fin_registro))
+        for agente, inicio_registro, fin_registro in zip(codigos_agente.tolist(), inicio.tolist(), fin.tolist())
+    ]
+    return registros, agentes
+
+
+def contar_agentes_por_intervalo(registros, cantidad_agentes, cruce_completo=False):
+    """
+    Cuenta cuántos agentes distintos estuvieron al menos 5 minutos en cada intervalo del día.
+
+    Solo se consideran los turnos que tocan el día objetivo: dentro del día, que empiezan
+    el día anterior (cuentan los intervalos que terminan antes del fin) o que terminan
+    el día siguiente (se recortan a las 23:59:59).
+
+    Los turnos se indexan una vez (IndiceEstados) y cada intervalo es una consulta
+    de solapamiento: un agente cuenta si alguno de sus turnos cubre el mínimo del
+    intervalo (5 minutos, o el intervalo completo en los cruces de medianoche).
+
+    Args:
+        registros: lista de RegistroTurno (fin None = hasta las 23:59:59)
+        cantidad_agentes: número de códigos de agente distintos
+        cruce_completo: para turnos que pasan al día siguiente, contar solo los intervalos
+                        que empiezan después del inicio del turno (criterio de Mesa de Ayuda)
+
+    Returns:
+        ndarray: conteo de agentes por cada uno de los 48 intervalos
+    """
+    # Importación diferida: IndiceEstados usa las utilidades de este módulo
+    from IndiceEstados import IndiceEstados
+
+    presentes = np.zeros((cantidad_agentes, INTERVALOS_DIA), dtype=bool)
+    ultimo_segundo = SEGUNDOS_DIA - 1
+    cantidad = len(registros)
+    agente = np.fromiter((registro.agente for registro in registros), dtype=np.int64, count=cantidad)
+    inicio = np.fromiter((registro.inicio for registro in registros), dtype=np.int64, count=cantidad)
+    fin = np.fromiter((ultimo_segundo if registro.fin is None else registro.fin for registro in registros),
+                      dtype=np.int64, count=cantidad)
+
+    inicia_en_dia = (inicio >= 0) & (inicio < SEGUNDOS_DIA)
+    termina_en_dia = (fin >= 0) & (fin < SEGUNDOS_DIA)
+    desde_dia_anterior = (inicio < 0) & termina_en_dia
+    hasta_dia_siguiente = inicia_en_dia & (fin >= SEGUNDOS_DIA)
+
+    # Desde el día anterior (y con cruce_completo, hacia el siguiente) solo cuentan los intervalos completos
+    completo = desde_dia_anterior | (hasta_dia_siguiente & cruce_completo)
+    minimo = np.where(completo, SEGUNDOS_INTERVALO, SEGUNDOS_MINIMOS_EN_INTERVALO)
+    fin = np.where(hasta_dia_siguiente & ~completo, ultimo_segundo, fin)
+    # Los turnos que no tocan el día quedan vacíos (fin = inicio) y el índice los omite
+    fin = np.where((inicia_en_dia & termina_en_dia) | desde_dia_anterior | hasta_dia_siguiente, fin, inicio)
+
+    indice = IndiceEstados(pd.DataFrame(index=range(cantidad)), inicio, fin)
+    for intervalo in range(INTERVALOS_DIA):
+        desde = intervalo * SEGUNDOS_INTERVALO
+        hasta = desde + SEGUNDOS_INTERVALO
+        turnos = indice.posiciones_en_rango(desde, hasta)
+        solape = np.minimum(fin[turnos], hasta) - np.maximum(inicio[turnos], desde)
+        presentes[agente[turnos[solape >= minimo[turnos]]], intervalo] = True
+
+    return presentes.sum(axis=0)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+BENCHMARK DEL CONTEO DE AGENTES POR INTERVALO (TIMELINE)
+========================================================
+Compara, sobre un timeline sintético (100.000 registros por defecto), el
+procesamiento anterior de Analisis_timeline_fraude / Analisis_timeline_mda
+(una Series copiada por registro, DataFrame reconstruido, iterrows y 48
+intervalos evaluados por registro) contra los registros compactos con
+__slots__ y aritmética de índices de Analisis_timeline_comun.
+
+Mide tiempo y pico de memoria asignada (tracemalloc) y verifica
+que ambos métodos devuelvan los mismos conteos.
+
+Uso:
+    python Benchmark_timeline.py [--registros 100000] [--agentes 1000] [--sin-legado]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from Analisis_timeline_comun import (
+    FORMATO_HORA_TIMELINE,
+    contar_agentes_por_intervalo,
+    intervalos_del_dia,
+    resolver_registros_turno,
+)
+
+
+def generar_timeline_sintetico(cantidad_registros, cantidad_agentes, fecha_obj, semilla=42):
+    """Genera un timeline continuo por agente, con ~1% de registros sin fin y cruces de medianoche"""
+    aleatorio = random.Random(semilla)
+    por_agente = max(1, cantidad_registros // cantidad_agentes)
+    estados = ['En la cola', 'En la cola', 'Disponible', 'Descanso', 'Comida']
+    filas = []
+
+    for numero in range(cantidad_agentes):
+        agente = f"AG{numero:05d} Agente Sintetico"
+        momento = fecha_obj + timedelta(seconds=aleatorio.randint(-4 * 3600, 10 * 3600))
+        for _ in range(por_agente):
+            duracion = aleatorio.choice([aleatorio.randint(5, 120), aleatorio.randint(120, 1800)])
+            fin = momento + timedelta(seconds=duracion)
+            filas.append({
+                'Nombre del agente': agente,
+                'Nombre de la división': 'Supervisor_FR',
+                'Hora de inicio': momento.strftime(FORMATO_HORA_TIMELINE),
+                'Hora de finalización': '' if aleatorio.random() < 0.01 else fin.strftime(FORMATO_HORA_TIMELINE),
+                'Estado principal': aleatorio.choice(estados),
+            })
+            momento = fin
+
+    df = pd.DataFrame(filas)
+    df['Hora de finalización'] = df['Hora de finalización'].replace('', None)
+    return df
+
+
+def _resolver_registros_legado(registros_agente):
+    """Resolución de registros sin fin tal como la hacían los módulos de timeline (iterrows)"""
+    registros_procesados = []
+    for _, row in registros_agente.iterrows():
+        hora_inicio_completa = str(row['Hora de inicio'])
+        hora_fin_completa = str(row['Hora de finalización'])
+        sin_fin = pd.isna(hora_fin_completa) or hora_fin_completa == 'nan' or str(hora_fin_completa).strip() == '' \
+            or hora_fin_completa == 'None'
+        fin_encontrado = hora_fin_completa
+        if sin_fin:
+            fin_encontrado = None
+            hora_inicio_dt = datetime.strptime(hora_inicio_completa, FORMATO_HORA_TIMELINE)
+            for _, reg_post in registros_agente[registros_agente.index != row.name].iterrows():
+                hora_inicio_post = str(reg_post['Hora de inicio'])
+                hora_fin_post = str(reg_post['Hora de finalización'])
+                if hora_inicio_post == hora_inicio_completa:
+                    if hora_fin_post not in ('nan', 'None', ''):
+                        fin_encontrado = hora_fin_post
+                        break
+                else:
+                    hora_inicio_post_dt = datetime.strptime(hora_inicio_post, FORMATO_HORA_TIMELINE)
+                    diff_minutos = (hora_inicio_post_dt - hora_inicio_dt).total_seconds() / 60
+                    if 1 <= diff_minutos <= 180:
+                        fin_encontrado = hora_inicio_post
+                        break
+        registros_procesados.append({'inicio': hora_inicio_completa, 'fin': fin_encontrado})
+    return registros_procesados
+
+
+def contar_agentes_legado(df_filtrado, fecha_obj):
+    """Conteo por intervalo con el método anterior (Series por registro + 48 intervalos por registro)"""
+    intervalos_calculo = []
+    hora_actual = fecha_obj
+    for intervalo_key in intervalos_del_dia():
+        intervalos_calculo.append({'intervalo_key': intervalo_key, 'inicio': hora_actual,
+                                   'fin': hora_actual + timedelta(minutes=30)})
+        hora_actual += timedelta(minutes=30)
+    agentes_en_cola_por_intervalo = {intervalo['intervalo_key']: set() for intervalo in intervalos_calculo}
+
+    df_procesado_lista = []
+    for agente in df_filtrado['Nombre del agente'].unique():
+        registros_agente = df_filtrado[df_filtrado['Nombre del agente'] == agente]
+        for reg in _resolver_registros_legado(registros_agente):
+            fila = registros_agente.iloc[0].copy()
+            fila['Hora de inicio'] = reg['inicio']
+            fila['Hora de finalización'] = reg['fin']
+            df_procesado_lista.append(fila)
+    df_procesado = pd.DataFrame(df_procesado_lista)
+
+    for _, registro in df_procesado.iterrows():
+        hora_fin_completa = registro['Hora de finalización']
+        if pd.isna(hora_fin_completa):
+            hora_fin_completa = f"{fecha_obj.strftime('%d/%m/%y')} 23:59:59"
+        inicio_turno = datetime.strptime(str(registro['Hora de inicio']), FORMATO_HORA_TIMELINE)
+        fin_turno = datetime.strptime(str(hora_fin_completa), FORMATO_HORA_TIMELINE)
+        mismo_dia = inicio_turno.date() == fin_turno.date() == fecha_obj.date()
+        cruza_entrada = inicio_turno.date() < fecha_obj.date() and fin_turno.date() == fecha_obj.date()
+        cruza_salida = inicio_turno.date() == fecha_obj.date() and fin_turno.date() > fecha_obj.date()
+        if not (mismo_dia or cruza_entrada or cruza_salida):
+            continue
+        for intervalo_info in intervalos_calculo:
+            intervalo_inicio = intervalo_info['inicio']
+            intervalo_fin = intervalo_info['fin']
+            minutos_superposicion = 0
+            if mismo_dia:
+                if intervalo_inicio < fin_turno and intervalo_fin > inicio_turno:
+                    minutos_superposicion = (min(intervalo_fin, fin_turno) - max(intervalo_inicio, inicio_turno)).total_seconds() / 60
+            elif cruza_entrada:
+                if intervalo_fin <= fin_turno:
+                    minutos_superposicion = (min(intervalo_fin, fin_turno) - max(intervalo_inicio, fecha_obj)).total_seconds() / 60
+            elif intervalo_fin > inicio_turno:
+                fin_dia = fecha_obj.replace(hour=23, minute=59, second=59)
+                minutos_superposicion = (min(intervalo_fin, fin_dia) - max(intervalo_inicio, inicio_turno)).total_seconds() / 60
+            if minutos_superposicion >= 5:
+                agentes_en_cola_por_intervalo[intervalo_info['intervalo_key']].add(registro['Nombre del agente'])
+
+    return {intervalo: len(agentes) for intervalo, agentes in agentes_en_cola_por_intervalo.items()}
+
+
+def contar_agentes_compacto(df_filtrado, fecha_obj):
+    """Conteo por intervalo con registros compactos y aritmética de índices"""
+    registros, agentes = resolver_registros_turno(df_filtrado, fecha_obj)
+    conteos = contar_agentes_por_intervalo(registros, len(agentes))
+    return {intervalo: int(conteo) for intervalo, conteo in zip(intervalos_del_dia(), conteos)}
+
+
+def medir(funcion, *args):
+    """Ejecuta la función midiendo tiempo y pico de memoria asignada"""
+    tracemalloc.start()
+    instante = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - instante
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, {'segundos': segundos, 'pico_mb': pico / 1024 / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del conteo de agentes por intervalo")
+    parser.add_argument('--registros', type=int, default=100000)
+    parser.add_argument('--agentes', type=int, default=1000)
+    parser.add_argument('--sin-legado', action='store_true', help="No ejecutar el método anterior")
+    args = parser.parse_args()
+
+    fecha_obj = datetime(2025, 11, 27)
+    print(f"⚙️ Generando timeline sintético: {args.registros:,} registros, {args.agentes:,} agentes")
+    df = generar_timeline_sintetico(args.registros, args.agentes, fecha_obj)
+    df_filtrado = df[df['Estado principal'] == 'En la cola']
+    print(f"🎯 Registros 'En la cola': {len(df_filtrado):,}")
+
+    resultado_nuevo, metricas_nuevo = medir(contar_agentes_compacto, df_filtrado, fecha_obj)
+    print(f"\n🚀 Registros compactos: {metricas_nuevo['segundos']:.2f}s | "
+          f"pico {metricas_nuevo['pico_mb']:.1f} MB")
+
+    if args.sin_legado:
+        return
+
+    resultado_legado, metricas_legado = medir(contar_agentes_legado, df_filtrado, fecha_obj)
+    print(f"🐢 Método anterior:    {metricas_legado['segundos']:.2f}s | "
+          f"pico {metricas_legado['pico_mb']:.1f} MB")
+
+    print(f"\n📈 Aceleración: x{metricas_legado['segundos'] / metricas_nuevo['segundos']:.1f} | "
+          f"Memoria pico: x{metricas_legado['pico_mb'] / max(metricas_nuevo['pico_mb'], 1e-9):.1f} menor")
+    if resultado_legado == resultado_nuevo:
+        print("✅ Ambos métodos devuelven los mismos conteos")
+    else:
+        print("⚠️ Los conteos difieren entre métodos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+CARGA DE ARCHIVOS DE ENTRADA Y SALIDA
+=====================================
+Punto único de lectura de las exportaciones de Genesys y de escritura de los
+CSV generados, compartido por todos los análisis.
+
+- Rutas configurables (por defecto las carpetas ExportadosGenesysprueba y
+  ExportadosGenerados relativas al directorio de trabajo).
+- Caché en memoria de los archivos ya leídos, identificada por ruta, fecha de
+  modificación y tamaño: un proceso residente (ServidorAnalisis.py) no vuelve a
+  parsear un archivo que no cambió. Cada lectura devuelve una copia, así los
+  análisis pueden modificar su DataFrame sin afectar a los demás.
+- Lectura de solo algunas columnas (p.ej. las que declaran los análisis en
+  Planificador.py): las columnas anchas que nadie usa no se parsean.
+- Lectura desde el contenido en memoria de un archivo subido (leer_buffer),
+  captura de los resultados en memoria (capturar_resultados) y carpeta de
+  salida propia de cada hilo o sesión (salida_en, aplicación web).
+- Exportaciones comprimidas (.gz, .xz, .bz2 o .zip), detectadas por su
+  contenido: se descomprimen por streaming directo al parser, sin escribir el
+  CSV descomprimido. Si la ruta configurada no existe se busca su versión
+  comprimida (p.ej. 'Detalle del rendimiento de colas.csv.gz' o '.zip').
+- Formatos de salida adicionales al CSV (Parquet, Arrow IPC, JSON Lines,
+  SQLite), elegidos por ejecución con formatos_salida (ver FormatosSalida.py).
+"""
+
+import bz2
+import contextlib
+import contextvars
+import gzip
+import io
+import lzma
+import os
+import sqlite3
+import zipfile
+
+import pandas as pd
+
+from FormatosSalida import ARCHIVO_SQLITE, FORMATOS, escribir_sqlite, validar_formatos
+
+RUTA_DETALLE = 'ExportadosGenesysprueba/Detalle del rendimiento de colas.csv'
+RUTA_TIMELINE = 'ExportadosGenesysprueba/Resumen de línea de tiempo de estado de agente.csv'
+DIRECTORIO_SALIDA = 'ExportadosGenerados'
+
+# Nombre de cada exportación de Genesys (para elegirla dentro de un ZIP con ambas)
+NOMBRES_ENTRADA = {'detalle': os.path.basename(RUTA_DETALLE), 'timeline': os.path.basename(RUTA_TIMELINE)}
+
+EXTENSIONES_COMPRIMIDAS = ('.gz', '.xz', '.bz2', '.zip')
+_FIRMAS = {b'\x1f\x8b': 'gz', b'\xfd7zXZ\x00': 'xz', b'BZh': 'bz2', b'PK\x03\x04': 'zip'}
+
+_rutas = {'detalle': RUTA_DETALLE, 'timeline': RUTA_TIMELINE, 'salida': DIRECTORIO_SALIDA}
+_cache = {}
+_estadisticas = {'aciertos': 0, 'lecturas': 0}
+
+# Resultados capturados en memoria {nombre de archivo: bytes}, por contexto (hilo / sesión)
+_capturados = contextvars.ContextVar('resultados_capturados', default=None)
+# Formatos de salida adicionales al CSV, por contexto (ejecución / sesión)
+_formatos = contextvars.ContextVar('formatos_salida', default=())
+# Carpeta de salida propia del contexto (sesión de la aplicación web), None = la configurada
+_salida_contexto = contextvars.ContextVar('salida_contexto', default=None)
+
+
+def configurar_rutas(detalle=None, timeline=None, salida=None):
+    """Cambia las rutas de entrada y la carpeta de salida (None = sin cambios)"""
+    for clave, valor in (('detalle', detalle), ('timeline', timeline), ('salida', salida)):
+        if valor is not None:
+            _rutas[clave] = valor
+
+
+def restablecer_rutas():
+    """Vuelve a las rutas por defecto"""
+    configurar_rutas(RUTA_DETALLE, RUTA_TIMELINE, DIRECTORIO_SALIDA)
+
+
+def ruta_entrada(clave):
+    """
+    Ruta configurada de la entrada 'detalle' o 'timeline'; si no existe, la
+    primera versión comprimida que exista ('.csv.gz', '.gz', '.zip', ...).
+    """
+    ruta = _rutas[clave]
+    if os.path.exists(ruta):
+        return ruta
+    base = os.path.splitext(ruta)[0]
+    for extension in EXTENSIONES_COMPRIMIDAS:
+        for candidata in (ruta + extension, base + extension):
+            if os.path.exists(candidata):
+                return candidata
+    return ruta
+
+
+def _huella(ruta):
+    estado = os.stat(ruta)
+    return (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size)
+
+
+def _delimitador_de(encabezado):
+    """';' salvo que el encabezado solo esté separado por comas"""
+    return ',' if encabezado.count(',') > encabezado.count(';') else ';'
+
+
+def _compresion_de(inicio):
+    """'gz', 'xz', 'bz2', 'zip' o None según los primeros bytes del contenido"""
+    for firma, compresion in _FIRMAS.items():
+        if inicio.startswith(firma):
+            return compresion
+    return None
+
+
+def _miembro_csv(archivo_zip, preferido=None):
+    """Nombre del CSV a leer dentro de un ZIP: 'preferido' si está, o el único CSV"""
+    nombres = [nombre for nombre in archivo_zip.namelist() if not nombre.endswith('/')]
+    csv = [nombre for nombre in nombres if nombre.lower().endswith('.csv')] or nombres
+    if preferido:
+        for nombre in csv:
+            if os.path.basename(nombre) == preferido:
+                return nombre
+    if len(csv) != 1:
+        raise ValueError(f"El ZIP debe contener un solo CSV (contiene {len(csv)}): {', '.join(csv)}")
+    return csv[0]
+
+
+@contextlib.contextmanager
+def _abrir_contenido(origen, preferido=None):
+    """
+    Abre una ruta o un archivo binario en memoria como flujo de bytes del CSV,
+    descomprimiéndolo al vuelo si viene comprimido.
+
+    Args:
+        preferido: nombre del CSV a usar si el origen es un ZIP con varios
+    """
+    with contextlib.ExitStack() as pila:
+        if isinstance(origen, (bytes, bytearray)):
+            crudo = io.BytesIO(origen)
+        else:
+            crudo = pila.enter_context(open(origen, 'rb'))
+        compresion = _compresion_de(crudo.read(8))
+        crudo.seek(0)
+
+        if compresion == 'gz':
+            flujo = pila.enter_context(gzip.GzipFile(fileobj=crudo))
+        elif compresion == 'xz':
+            flujo = pila.enter_context(lzma.LZMAFile(crudo))
+        elif compresion == 'bz2':
+            flujo = pila.enter_context(bz2.BZ2File(crudo))
+        elif compresion == 'zip':
+            archivo_zip = pila.enter_context(zipfile.ZipFile(crudo))
+            flujo = pila.enter_context(archivo_zip.open(_miembro_csv(archivo_zip, preferido)))
+        else:
+            flujo = crudo
+        yield flujo
+
+
+def _leer_contenido(origen, columnas=None, preferido=None):
+    """Parsea el CSV de una ruta o de bytes (comprimidos o no) por streaming"""
+    with _abrir_contenido(origen, preferido) as flujo:
+        delimitador = _delimitador_de(flujo.readline().decode('utf-8', errors='ignore'))
+    with _abrir_contenido(origen, preferido) as flujo:
+        return pd.read_csv(flujo, delimiter=delimitador, encoding='utf-8', usecols=_filtro_columnas(columnas))
+
+
+def _filtro_columnas(columnas):
+    return None if columnas is None else (lambda columna: columna in columnas)
+
+
+def _desde_cache(huella, columnas):
+    """DataFrame en caché que contiene las columnas pedidas (None = archivo completo)"""
+    completo = _cache.get(huella + (None,))
+    if columnas is None:
+        return completo
+    if completo is not None:
+        return completo[[columna for columna in completo.columns if columna in columnas]]
+    return _cache.get(huella + (columnas,))
+
+
+def leer_csv(ruta, usar_cache=True, columnas=None, preferido=None):
+    """
+    Lee un CSV de Genesys (utf-8, ';' o ',', comprimido o no) usando la caché en memoria.
+
+    Args:
+        columnas: nombres de las columnas a leer (None = todas). Las que no
+                  existan en el archivo se ignoran.
+        preferido: nombre del CSV a leer si la ruta es un ZIP con varios
+    """
+    huella = _huella(ruta)
+    columnas = None if columnas is None else tuple(sorted(set(columnas)))
+    if usar_cache:
+        df = _desde_cache(huella, columnas)
+        if df is not None:
+            _estadisticas['aciertos'] += 1
+            return df.copy()
+
+    df = _leer_contenido(ruta, columnas, preferido)
+    _estadisticas['lecturas'] += 1
+    if usar_cache:
+        # Solo se conservan versiones vigentes de cada archivo
+        for clave in [clave for clave in _cache if clave[0] == huella[0] and clave[:3] != huella]:
+            del _cache[clave]
+        _cache[huella + (columnas,)] = df
+        return df.copy()
+    return df
+
+
+def leer_buffer(contenido, columnas=None, preferido=None):
+    """
+    Lee un CSV de Genesys a partir de su contenido en bytes (p.ej. getvalue() de
+    un archivo subido, comprimido o no), sin pasar por disco ni por la caché.
+    """
+    columnas = None if columnas is None else set(columnas)
+    return _leer_contenido(contenido, columnas, preferido)
+
+
+def leer_detalle(ruta=None, columnas=None):
+    """DataFrame de 'Detalle del rendimiento de colas.csv'"""
+    return leer_csv(ruta or ruta_entrada('detalle'), columnas=columnas, preferido=NOMBRES_ENTRADA['detalle'])
+
+
+def leer_timeline(ruta=None, columnas=None):
+    """DataFrame de 'Resumen de línea de tiempo de estado de agente.csv'"""
+    return leer_csv(ruta or ruta_entrada('timeline'), columnas=columnas, preferido=NOMBRES_ENTRADA['timeline'])
+
+
+def directorio_salida():
+    """Carpeta de salida vigente (la del contexto, si hay una, o la configurada)"""
+    return _salida_contexto.get() or _rutas['salida']
+
+
+def ruta_salida(nombre_archivo):
+    """
+    Ruta dentro de la carpeta de salida vigente (la crea si no existe). Si se
+    están capturando los resultados en memoria, es el nombre del archivo.
+    """
+    if _capturados.get() is not None:
+        return nombre_archivo
+    directorio = directorio_salida()
+    os.makedirs(directorio, exist_ok=True)
+    return os.path.join(directorio, nombre_archivo)
+
+
+@contextlib.contextmanager
+def salida_en(directorio):
+    """
+    Dentro del bloque, los resultados se escriben en 'directorio' en lugar de la
+    carpeta configurada. Como capturar_resultados, es propio de cada hilo, pero los
+    resultados quedan en disco (p.ej. una carpeta temporal de la aplicación web).
+    """
+    token = _salida_contexto.set(directorio)
+    try:
+        yield directorio
+    finally:
+        _salida_contexto.reset(token)
+
+
+@contextlib.contextmanager
+def capturar_resultados():
+    """
+    Dentro del bloque, los resultados (guardar_resultado, abrir_salida) quedan en
+    el diccionario {nombre de archivo: bytes} que se entrega, en lugar de escribirse
+    en la carpeta de salida. Es propio de cada hilo, así que sesiones simultáneas
+    de la aplicación web no se mezclan.
+    """
+    resultados = {}
+    token = _capturados.set(resultados)
+    try:
+        yield resultados
+    finally:
+        _capturados.reset(token)
+
+
+@contextlib.contextmanager
+def abrir_salida(nombre_archivo):
+    """Archivo binario para escribir un resultado (en disco o en memoria)"""
+    capturados = _capturados.get()
+    if capturados is None:
+        with open(ruta_salida(nombre_archivo), 'wb') as archivo:
+            yield archivo
+    else:
+        buffer = io.BytesIO()
+        yield buffer
+        capturados[nombre_archivo] = buffer.getvalue()
+
+
+@contextlib.contextmanager
+def formatos_salida(formatos):
+    """
+    Dentro del bloque, cada resultado se guarda además en los formatos indicados
+    ('parquet', 'arrow', 'jsonl', 'sqlite'; 'csv' se genera siempre).
+    """
+    token = _formatos.set(validar_formatos(formatos))
+    try:
+        yield
+    finally:
+        _formatos.reset(token)
+
+
+def _guardar_sqlite(df, tabla):
+    """Reemplaza la tabla en la base SQLite de la salida (en disco o en memoria)"""
+    capturados = _capturados.get()
+    if capturados is None:
+        with contextlib.closing(sqlite3.connect(ruta_salida(ARCHIVO_SQLITE))) as conexion:
+            escribir_sqlite(df, tabla, conexion)
+        return
+    with contextlib.closing(sqlite3.connect(':memory:')) as conexion:
+        if ARCHIVO_SQLITE in capturados:
+            conexion.deserialize(capturados[ARCHIVO_SQLITE])
+        escribir_sqlite(df, tabla, conexion)
+        capturados[ARCHIVO_SQLITE] = conexion.serialize()
+
+
+def guardar_formatos(df, nombre_archivo):
+    """
+    Guarda el resultado en los formatos adicionales configurados, con el nombre del
+    CSV y su extensión (sqlite: una tabla con ese nombre en ARCHIVO_SQLITE).
+
+    Returns:
+        list: archivos generados
+    """
+    base = os.path.splitext(nombre_archivo)[0]
+    generados = []
+    for formato in _formatos.get():
+        extension, escritor = FORMATOS[formato]
+        if escritor is None:
+            _guardar_sqlite(df, base)
+            generados.append(ruta_salida(ARCHIVO_SQLITE))
+            continue
+        with abrir_salida(base + extension) as archivo:
+            escritor(df, archivo)
+        generados.append(ruta_salida(base + extension))
+    return generados
+
+
+def guardar_resultado(df, nombre_archivo, **opciones):
+    """
+    Escribe un resultado CSV en la carpeta de salida (o en memoria), y en los
+    formatos adicionales configurados, y devuelve la ruta del CSV.
+    """
+    with abrir_salida(nombre_archivo) as archivo:
+        df.to_csv(archivo, index=False, **opciones)
+    guardar_formatos(df, nombre_archivo)
+    return ruta_salida(nombre_archivo)
+
+
+def limpiar_cache():
+    """Descarta los archivos en memoria"""
+    _cache.clear()
+
+
+def estado_cache():
+    """Resumen de la caché: archivos en memoria, aciertos y lecturas desde disco"""
+    return {
+        'archivos': sorted({clave[0] for clave in _cache}),
+        'memoria_mb': round(sum(df.memory_usage(deep=True).sum() for df in _cache.values()) / 1024 / 1024, 1),
+        **_estadisticas,
+    }
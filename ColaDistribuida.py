@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+COLA DE TRABAJOS DISTRIBUIDA EN CARPETA COMPARTIDA
+==================================================
+Reparte el reprocesamiento de muchas exportaciones (p.ej. un año completo)
+entre varios procesos y máquinas usando solo una carpeta compartida (NFS, SMB),
+sin servidor de colas.
+
+Estructura de la cola:
+    config.json            duración del lease e intentos máximos
+    pendientes/ID.json     trabajos por tomar
+    en_proceso/ID__TRABAJADOR.json
+                           trabajo tomado: el archivo es el lease; su fecha de
+                           modificación se renueva periódicamente mientras el
+                           trabajador está vivo
+    recuperando/           paso intermedio al devolver un lease vencido
+    terminados/ID.json     trabajo terminado, con su resultado
+    fallidos/ID.json       trabajo que agotó sus intentos
+    resultados/ID__TRABAJADOR/AAAA-MM-DD/
+                           CSV de cada fecha del trabajo
+
+Cada paso de estado es un os.rename (atómico dentro del mismo sistema de
+archivos): si dos trabajadores intentan tomar o devolver el mismo trabajo, solo
+uno lo consigue. Un trabajador que pierde su lease (vencido y devuelto a la cola)
+descarta su resultado al no poder pasarlo a terminados. Los vencimientos se
+comparan con la hora local, así que los nodos deben tener el reloj sincronizado.
+
+Un trabajo es un par de exportaciones y un rango de fechas; cada fecha se
+procesa como en ParaleloFechas.py y al final 'combinar' une los resultados de
+todos los trabajos terminados (uno por fecha, en orden) en los archivos de
+salida habituales, una carpeta por lote.
+
+Uso:
+    python ColaDistribuida.py encolar --cola /compartido/cola --detalle D.csv --timeline T.csv
+                                      [--desde 2025-01-01 --hasta 2025-12-31] [--dias-por-trabajo 7]
+                                      [--lote org1] [--analisis ...] [--agentes nomina.json]
+    python ColaDistribuida.py trabajador --cola /compartido/cola [--procesos 4] [--esperar]
+    python ColaDistribuida.py estado --cola /compartido/cola
+    python ColaDistribuida.py combinar --cola /compartido/cola --salida ExportadosGenerados
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+from multiprocessing import Process
+
+import pandas as pd
+
+import CargaDatos
+from ParaleloFechas import (combinar_resultados, fechas_del_detalle, fragmentar_detalle,
+                            fragmentar_timeline, procesar_fragmento)
+from Planificador import ANALIZADORES, nueva_ejecucion
+
+ESTADOS = ('pendientes', 'en_proceso', 'recuperando', 'terminados', 'fallidos', 'resultados')
+SEPARADOR = '__'
+
+LEASE_POR_DEFECTO = 300
+INTENTOS_POR_DEFECTO = 3
+ESPERA_SIN_TRABAJO = 5
+
+
+def _carpeta(cola, estado):
+    return os.path.join(cola, estado)
+
+
+def _leer_json(ruta):
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def _escribir_json(ruta, datos):
+    """Escribe en un temporal y lo renombra, para que nadie lea un JSON a medias"""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def crear_cola(cola, lease_segundos=LEASE_POR_DEFECTO, intentos_maximos=INTENTOS_POR_DEFECTO):
+    """Crea la estructura de la cola (si no existe) y devuelve su configuración"""
+    for estado in ESTADOS:
+        os.makedirs(_carpeta(cola, estado), exist_ok=True)
+    ruta_config = os.path.join(cola, 'config.json')
+    if not os.path.exists(ruta_config):
+        _escribir_json(ruta_config, {'lease_segundos': lease_segundos, 'intentos_maximos': intentos_maximos})
+    return _leer_json(ruta_config)
+
+
+def _id_trabajo(lote, desde, hasta):
+    return re.sub(r'[^\w\-]', '_', f"{lote}_{desde}_{hasta}")
+
+
+def _existe_trabajo(cola, id_trabajo):
+    for estado in ('pendientes', 'recuperando', 'terminados', 'fallidos'):
+        if os.path.exists(os.path.join(_carpeta(cola, estado), f"{id_trabajo}.json")):
+            return True
+    return any(nombre.startswith(id_trabajo + SEPARADOR) for nombre in os.listdir(_carpeta(cola, 'en_proceso')))
+
+
+def encolar(cola, detalle, timeline, desde=None, hasta=None, dias_por_trabajo=7,
+            lote='general', analisis=None, agentes=None):
+    """
+    Agrega a la cola los trabajos de un par de exportaciones, uno por cada bloque
+    de 'dias_por_trabajo' días entre 'desde' y 'hasta' (por defecto, las fechas
+    del detalle). Los trabajos que ya están en la cola no se repiten.
+
+    Returns:
+        list: identificadores de los trabajos agregados
+    """
+    crear_cola(cola)
+    claves = list(analisis or ANALIZADORES)
+    if desde is None or hasta is None:
+        fechas = fechas_del_detalle(CargaDatos.leer_detalle(detalle, columnas=['Inicio del intervalo']))
+        if not fechas:
+            raise ValueError("El detalle de colas no tiene intervalos con fecha válida")
+        desde = desde or fechas[0].strftime('%Y-%m-%d')
+        hasta = hasta or fechas[-1].strftime('%Y-%m-%d')
+
+    dias = pd.date_range(desde, hasta, freq='D')
+    agregados = []
+    for posicion in range(0, len(dias), dias_por_trabajo):
+        bloque = dias[posicion:posicion + dias_por_trabajo]
+        inicio_bloque, fin_bloque = bloque[0].strftime('%Y-%m-%d'), bloque[-1].strftime('%Y-%m-%d')
+        id_trabajo = _id_trabajo(lote, inicio_bloque, fin_bloque)
+        if _existe_trabajo(cola, id_trabajo):
+            continue
+        _escribir_json(os.path.join(_carpeta(cola, 'pendientes'), f"{id_trabajo}.json"), {
+            'id': id_trabajo,
+            'lote': lote,
+            'detalle': os.path.abspath(detalle),
+            'timeline': os.path.abspath(timeline) if timeline else None,
+            'desde': inicio_bloque,
+            'hasta': fin_bloque,
+            'analisis': claves,
+            'agentes': agentes,
+            'intentos': 0,
+        })
+        agregados.append(id_trabajo)
+    return agregados
+
+
+def _devolver(cola, ruta_tomado, config, error=None):
+    """
+    Devuelve a pendientes un trabajo tomado (o lo pasa a fallidos si agotó los
+    intentos). Devuelve False si otro proceso ya lo movió.
+    """
+    id_trabajo = os.path.basename(ruta_tomado).split(SEPARADOR, 1)[0]
+    intermedio = os.path.join(_carpeta(cola, 'recuperando'), f"{id_trabajo}.json")
+    try:
+        os.rename(ruta_tomado, intermedio)
+    except FileNotFoundError:
+        return False
+
+    trabajo = _leer_json(intermedio)
+    trabajo['intentos'] += 1
+    if error:
+        trabajo.setdefault('incidencias', []).append(error)
+    destino = 'fallidos' if trabajo['intentos'] >= config['intentos_maximos'] else 'pendientes'
+    _escribir_json(intermedio, trabajo)
+    os.rename(intermedio, os.path.join(_carpeta(cola, destino), f"{id_trabajo}.json"))
+    return True
+
+
+def recuperar_vencidos(cola, config):
+    """Devuelve a la cola los trabajos cuyo lease venció (trabajador caído o colgado)"""
+    ahora = time.time()
+    recuperados = []
+    carpeta = _carpeta(cola, 'en_proceso')
+    for nombre in os.listdir(carpeta):
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            vencido = os.path.getmtime(ruta) + config['lease_segundos'] < ahora
+        except FileNotFoundError:
+            continue
+        trabajador = nombre[:-len('.json')].split(SEPARADOR, 1)[-1]
+        if vencido and _devolver(cola, ruta, config, f"Lease vencido ({trabajador})"):
+            recuperados.append(nombre)
+    return recuperados
+
+
+def tomar_trabajo(cola, trabajador):
+    """Toma el primer trabajo pendiente; devuelve la ruta del lease o None si no hay"""
+    for nombre in sorted(os.listdir(_carpeta(cola, 'pendientes'))):
+        if not nombre.endswith('.json'):
+            continue
+        destino = os.path.join(_carpeta(cola, 'en_proceso'), f"{nombre[:-len('.json')]}{SEPARADOR}{trabajador}.json")
+        try:
+            os.rename(os.path.join(_carpeta(cola, 'pendientes'), nombre), destino)
+        except FileNotFoundError:
+            continue  # lo tomó otro trabajador
+        os.utime(destino)
+        return destino
+    return None
+
+
+class Renovador(threading.Thread):
+    """Renueva el lease (fecha de modificación del archivo tomado) mientras dura el trabajo"""
+
+    def __init__(self, ruta, intervalo):
+        super().__init__(daemon=True)
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.detener = threading.Event()
+        self.perdido = False
+
+    def run(self):
+        while not self.detener.wait(self.intervalo):
+            try:
+                os.utime(self.ruta)
+            except FileNotFoundError:
+                self.perdido = True
+                return
+
+
+def procesar_trabajo(cola, trabajo, trabajador):
+    """
+    Procesa cada fecha del rango del trabajo en resultados/ID__TRABAJADOR/.
+
+    Returns:
+        dict: carpeta de resultados, fechas procesadas, errores y segundos
+    """
+    instante = time.perf_counter()
+    directorio = os.path.join(_carpeta(cola, 'resultados'), f"{trabajo['id']}{SEPARADOR}{trabajador}")
+    claves = trabajo['analisis']
+    columnas = nueva_ejecucion(claves)['columnas']
+
+    df_detalle = CargaDatos.leer_detalle(trabajo['detalle'], columnas=columnas.get('detalle'))
+    todas = fechas_del_detalle(df_detalle)
+    fechas = [fecha for fecha in todas
+              if pd.Timestamp(trabajo['desde']) <= fecha <= pd.Timestamp(trabajo['hasta'])]
+    detalle_por_fecha = fragmentar_detalle(df_detalle, fechas)
+    timeline_por_fecha = {}
+    if 'timeline' in columnas and fechas:
+        df_timeline = CargaDatos.leer_timeline(trabajo['timeline'], columnas=columnas['timeline'])
+        timeline_por_fecha = fragmentar_timeline(df_timeline, fechas, primera_fecha=todas[0])
+
+    errores = {}
+    for fecha in fechas:
+        texto = fecha.strftime('%Y-%m-%d')
+        resultado = procesar_fragmento(
+            texto, detalle_por_fecha[fecha], timeline_por_fecha.get(fecha),
+            claves, os.path.join(directorio, texto), trabajo.get('agentes')
+        )
+        errores.update({f"{texto}/{clave}": error for clave, error in resultado['errores'].items() if error})
+
+    return {
+        'directorio': directorio,
+        'fechas': [fecha.strftime('%Y-%m-%d') for fecha in fechas],
+        'errores': errores,
+        'segundos': round(time.perf_counter() - instante, 3),
+    }
+
+
+def trabajar(cola, esperar=False):
+    """
+    Bucle de un trabajador: recupera leases vencidos, toma un trabajo, lo procesa y
+    lo pasa a terminados. Sin 'esperar', termina cuando no quedan trabajos
+    pendientes ni en proceso.
+
+    Returns:
+        int: trabajos terminados por este trabajador
+    """
+    config = crear_cola(cola)
+    trabajador = re.sub(r'[^\w\-]', '_', f"{socket.gethostname()}-{os.getpid()}")
+    terminados = 0
+
+    while True:
+        recuperar_vencidos(cola, config)
+        ruta_tomado = tomar_trabajo(cola, trabajador)
+        if ruta_tomado is None:
+            if not esperar and not os.listdir(_carpeta(cola, 'en_proceso')):
+                return terminados
+            time.sleep(ESPERA_SIN_TRABAJO)
+            continue
+
+        trabajo = _leer_json(ruta_tomado)
+        renovador = Renovador(ruta_tomado, max(config['lease_segundos'] / 3, 1))
+        renovador.start()
+        print(f"🚀 [{trabajador}] {trabajo['id']}: {trabajo['desde']} a {trabajo['hasta']}")
+        try:
+            resultado = procesar_trabajo(cola, trabajo, trabajador)
+        except Exception as e:
+            renovador.detener.set()
+            print(f"❌ [{trabajador}] {trabajo['id']}: {e}")
+            _devolver(cola, ruta_tomado, config, f"{trabajador}: {e}")
+            continue
+        renovador.detener.set()
+
+        # Solo el dueño del lease vigente puede pasarlo a terminados
+        destino = os.path.join(_carpeta(cola, 'terminados'), f"{trabajo['id']}.json")
+        try:
+            os.rename(ruta_tomado, destino)
+        except FileNotFoundError:
+            print(f"⚠️ [{trabajador}] {trabajo['id']}: lease perdido, resultado descartado")
+            shutil.rmtree(resultado['directorio'], ignore_errors=True)
+            continue
+        trabajo.update(resultado, trabajador=trabajador)
+        _escribir_json(destino, trabajo)
+        terminados += 1
+        estado = f"❌ {len(resultado['errores'])} errores" if resultado['errores'] else "✅"
+        print(f"{estado} [{trabajador}] {trabajo['id']}: {len(resultado['fechas'])} fechas en {resultado['segundos']:.2f}s")
+
+
+def estado_cola(cola):
+    """Cantidad de trabajos en cada estado"""
+    return {
+        estado: len([nombre for nombre in os.listdir(_carpeta(cola, estado)) if nombre.endswith('.json')])
+        for estado in ('pendientes', 'en_proceso', 'terminados', 'fallidos')
+    }
+
+
+def combinar_cola(cola, salida):
+    """
+    Une los resultados de los trabajos terminados en 'salida' (una subcarpeta por
+    lote si hay más de uno). Si dos trabajos cubren la misma fecha se usa el primero.
+
+    Returns:
+        dict: {lote: archivos generados}
+    """
+    trabajos_por_lote = {}
+    carpeta = _carpeta(cola, 'terminados')
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre.endswith('.json'):
+            trabajo = _leer_json(os.path.join(carpeta, nombre))
+            trabajos_por_lote.setdefault(trabajo['lote'], []).append(trabajo)
+
+    generados = {}
+    for lote, trabajos in trabajos_por_lote.items():
+        directorios = {}
+        for trabajo in trabajos:
+            for fecha in trabajo['fechas']:
+                directorios.setdefault(fecha, os.path.join(trabajo['directorio'], fecha))
+        claves = [clave for clave in ANALIZADORES if any(clave in trabajo['analisis'] for trabajo in trabajos)]
+
+        CargaDatos.configurar_rutas(salida=salida if len(trabajos_por_lote) == 1 else os.path.join(salida, lote))
+        try:
+            generados[lote] = combinar_resultados(claves, sorted(directorios.items()))
+        finally:
+            CargaDatos.restablecer_rutas()
+    return generados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cola de trabajos de análisis en carpeta compartida")
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+
+    encolar_parser = subcomandos.add_parser('encolar', help="Agregar trabajos a la cola")
+    encolar_parser.add_argument('--cola', required=True)
+    encolar_parser.add_argument('--detalle', required=True)
+    encolar_parser.add_argument('--timeline')
+    encolar_parser.add_argument('--desde', help="Primera fecha (AAAA-MM-DD); por defecto, la primera del detalle")
+    encolar_parser.add_argument('--hasta', help="Última fecha (AAAA-MM-DD); por defecto, la última del detalle")
+    encolar_parser.add_argument('--dias-por-trabajo', type=int, default=7)
+    encolar_parser.add_argument('--lote', default='general', help="Nombre del lote (organización, campaña...)")
+    encolar_parser.add_argument('--analisis', nargs='+', choices=list(ANALIZADORES), metavar='ANALISIS')
+    encolar_parser.add_argument('--agentes', help="JSON con la nómina alternativa {grupo: [nombres]}")
+    encolar_parser.add_argument('--lease', type=int, default=LEASE_POR_DEFECTO,
+                                help="Segundos sin renovar tras los que un trabajo vuelve a la cola (cola nueva)")
+    encolar_parser.add_argument('--intentos', type=int, default=INTENTOS_POR_DEFECTO,
+                                help="Intentos antes de pasar un trabajo a fallidos (cola nueva)")
+
+    trabajador_parser = subcomandos.add_parser('trabajador', help="Procesar trabajos de la cola")
+    trabajador_parser.add_argument('--cola', required=True)
+    trabajador_parser.add_argument('--procesos', type=int, default=1, help="Trabajadores en esta máquina")
+    trabajador_parser.add_argument('--esperar', action='store_true', help="Seguir esperando trabajos nuevos")
+
+    estado_parser = subcomandos.add_parser('estado', help="Mostrar el estado de la cola")
+    estado_parser.add_argument('--cola', required=True)
+
+    combinar_parser = subcomandos.add_parser('combinar', help="Unir los resultados terminados")
+    combinar_parser.add_argument('--cola', required=True)
+    combinar_parser.add_argument('--salida', default=CargaDatos.DIRECTORIO_SALIDA)
+
+    args = parser.parse_args()
+
+    if args.comando == 'encolar':
+        crear_cola(args.cola, args.lease, args.intentos)
+        agentes = None
+        if args.agentes:
+            with open(args.agentes, 'r', encoding='utf-8') as archivo:
+                agentes = json.load(archivo)
+        agregados = encolar(args.cola, args.detalle, args.timeline, args.desde, args.hasta,
+                            args.dias_por_trabajo, args.lote, args.analisis, agentes)
+        print(f"📥 Trabajos agregados: {len(agregados)}")
+
+    elif args.comando == 'trabajador':
+        procesos = [Process(target=trabajar, args=(args.cola, args.esperar)) for _ in range(args.procesos)]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join()
+
+    elif args.comando == 'estado':
+        for estado, cantidad in estado_cola(args.cola).items():
+            print(f"   {estado:<12} {cantidad}")
+
+    elif args.comando == 'combinar':
+        for lote, archivos in combinar_cola(args.cola, args.salida).items():
+            print(f"📋 Lote {lote}: {len(archivos)} archivos")
+            for archivo in archivos:
+                print(f"   {archivo}")
+
+
+if __name__ == "__main__":
+    main()
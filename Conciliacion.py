@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+CONCILIACIÓN CONTRA LOS VALORES REPORTADOS POR GENESYS
+======================================================
+Compara, para cada intervalo, los indicadores que calculan los análisis con los
+que el propio detalle de rendimiento ya trae calculados por Genesys:
+
+- por grupo de colas: Nivel de atención, Nivel de servicio y TMO recalculados
+  (mismas definiciones que KPIs.py) contra '% de contestadas', '% nivel de
+  servicio' y 'Manejo medio' de sus filas, ponderados por su base
+  (Oferta, Contestadas + Abandonadas y Manejo respectivamente)
+- por fila consolidada: Oferta, Contestadas, Abandonadas y los mismos
+  indicadores sumando las filas atómicas de sus colas, contra los valores de la
+  fila consolidada
+
+Todo se resuelve en una sola agregación agrupada sobre el detalle (sin recorrer
+intervalos) y solo se informan las diferencias que superan la tolerancia de
+cada métrica. No forma parte de la ejecución normal: se corre aparte o con
+Ejecutar.py --conciliar.
+
+Uso:
+    tabla = conciliar(leer_detalle(columnas=COLUMNAS_CONCILIACION))
+    python Conciliacion.py [--detalle ruta] [--tolerancia TMO=5 Nivel_Servicio_%=1]
+
+Archivo de salida (ExportadosGenerados):
+- Conciliacion_Genesys.csv (una fila por diferencia)
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from CargaDatos import guardar_resultado, leer_detalle
+from GruposColas import GRUPOS
+from IndiceColas import indexar_colas
+from KPIs import COLUMNAS_DETALLE, KPIS, TERMINOS, claves_intervalo, evaluar_kpi
+
+ARCHIVO_CONCILIACION = 'Conciliacion_Genesys.csv'
+
+# Columnas del detalle que se leen (las de los KPIs más las que reporta Genesys)
+COLUMNAS_CONCILIACION = COLUMNAS_DETALLE + ['% de contestadas', '% nivel de servicio', 'Manejo']
+
+# Métrica -> KPI recalculado (KPIs.KPIS) y referencia de Genesys:
+# conteo (se toma de la fila consolidada) o columna reportada y su base de ponderación
+METRICAS = {
+    'Oferta': {'kpi': 'Oferta', 'conteo': 'oferta'},
+    'Contestadas': {'kpi': 'Contestadas', 'conteo': 'contestadas'},
+    'Abandonadas': {'kpi': 'Abandonadas', 'conteo': 'abandonadas'},
+    'Nivel_Atencion_%': {'kpi': 'Nivel_Atencion', 'columna': '% de contestadas', 'base': 'oferta', 'escala': 100},
+    'Nivel_Servicio_%': {'kpi': 'Nivel_Servicio', 'columna': '% nivel de servicio', 'base': 'respondidas', 'escala': 100},
+    'TMO': {'kpi': 'TMO_Manejadas', 'columna': 'Manejo medio', 'base': 'manejo', 'escala': 1},
+}
+
+# Diferencia absoluta tolerada (conteos exactos, porcentajes en puntos, TMO en segundos)
+TOLERANCIAS = {
+    'Oferta': 0,
+    'Contestadas': 0,
+    'Abandonadas': 0,
+    'Nivel_Atencion_%': 0.5,
+    'Nivel_Servicio_%': 0.5,
+    'TMO': 2,
+}
+
+# Valor reportado por fila (las duraciones pueden venir como 'Xm Ys')
+_REPORTADOS = {
+    '% de contestadas': lambda df: pd.to_numeric(df['% de contestadas'], errors='coerce'),
+    '% nivel de servicio': lambda df: pd.to_numeric(df['% nivel de servicio'], errors='coerce'),
+    'Manejo medio': lambda df: TERMINOS['manejo_medio'](df),
+}
+
+# Bases de ponderación de los valores reportados, por fila
+_BASES = {
+    'oferta': lambda df: TERMINOS['oferta'](df),
+    'respondidas': lambda df: TERMINOS['contestadas'](df) + TERMINOS['abandonadas'](df),
+    'manejo': lambda df: pd.to_numeric(df['Manejo'], errors='coerce').fillna(0),
+}
+
+
+def _terminos_kpis(metricas):
+    terminos = []
+    for metrica in metricas:
+        definicion = KPIS[METRICAS[metrica]['kpi']]
+        for parte in ('numerador', 'denominador'):
+            if definicion.get(parte) and definicion[parte] not in terminos:
+                terminos.append(definicion[parte])
+    return terminos
+
+
+def conciliar(df_detalle, indice_colas=None, tolerancias=None, solo_diferencias=True):
+    """
+    Concilia los indicadores recalculados con los reportados en el detalle.
+
+    Args:
+        df_detalle: detalle de rendimiento (al menos COLUMNAS_CONCILIACION presentes)
+        indice_colas: índice de colas del mismo detalle (None = se arma aquí)
+        tolerancias: {métrica: diferencia tolerada} que reemplaza a TOLERANCIAS
+        solo_diferencias: devolver solo los controles fuera de tolerancia
+
+    Returns:
+        DataFrame: Fecha, Intervalo, Ambito, Metrica, Recalculado, Referencia,
+                   Diferencia, Tolerancia, Discrepancia
+    """
+    tolerancias = {**TOLERANCIAS, **(tolerancias or {})}
+    if indice_colas is None:
+        indice_colas = indexar_colas(df_detalle)
+    metricas = [metrica for metrica, definicion in METRICAS.items()
+                if definicion.get('columna') is None or definicion['columna'] in df_detalle.columns]
+
+    claves = claves_intervalo(df_detalle)
+    codigos_intervalo, inicios = pd.factorize(claves['Inicio'], sort=True)
+    consolidada = indice_colas['consolidada']
+    codigo_cola = indice_colas['codigo_cola']
+    cantidad_grupos = len(indice_colas['grupos'])
+
+    # Términos por fila: los de los KPIs (recálculo), conteos y valores reportados x base (referencia)
+    columnas = {}
+    for termino in _terminos_kpis(metricas):
+        columnas[termino] = TERMINOS[termino](df_detalle).to_numpy(dtype=float)
+    for metrica in metricas:
+        definicion = METRICAS[metrica]
+        if 'conteo' in definicion:
+            columnas[f'ref_{metrica}'] = TERMINOS[definicion['conteo']](df_detalle).to_numpy(dtype=float)
+        else:
+            # Genesys deja vacío el valor cuando el numerador es 0 (p.ej. '% de contestadas' sin contestadas)
+            reportado = _REPORTADOS[definicion['columna']](df_detalle).fillna(0)
+            base = _BASES[definicion['base']](df_detalle)
+            columnas[f'ref_{metrica}_num'] = (reportado * base).to_numpy(dtype=float)
+            columnas[f'ref_{metrica}_den'] = base.to_numpy(dtype=float)
+    terminos = [nombre for nombre in columnas if not nombre.startswith('ref_')]
+    referencias = [nombre for nombre in columnas if nombre.startswith('ref_')]
+    valores = np.column_stack([columnas[nombre] for nombre in columnas])
+    es_referencia = np.array([nombre.startswith('ref_') for nombre in columnas])
+    es_conteo = np.array([nombre.startswith('ref_') and not nombre.endswith(('_num', '_den')) for nombre in columnas])
+
+    # Ámbitos: grupos (filas atómicas: recálculo y referencia ponderada) y conjuntos
+    # consolidados (filas atómicas de sus colas: recálculo; fila consolidada: referencia)
+    grupo_fila = np.append(indice_colas['grupo_de_codigo'], -1)[codigo_cola]
+    filas, ambitos, mascaras = [], [], []
+    atomicas_de_grupo = np.flatnonzero(~consolidada & (grupo_fila >= 0))
+    filas.append(atomicas_de_grupo)
+    ambitos.append(grupo_fila[atomicas_de_grupo])
+    mascaras.append(np.broadcast_to(~es_conteo, (len(atomicas_de_grupo), len(es_conteo))))
+    for numero, conjunto in enumerate(indice_colas['conjuntos']):
+        tabla = np.zeros(len(indice_colas['colas']) + 1, dtype=bool)
+        tabla[conjunto] = True
+        miembros = np.flatnonzero(tabla[codigo_cola] & ~consolidada)
+        propias = np.flatnonzero(indice_colas['conjunto'] == numero)
+        filas.extend([miembros, propias])
+        ambitos.extend([np.full(len(miembros), cantidad_grupos + numero), np.full(len(propias), cantidad_grupos + numero)])
+        mascaras.extend([np.broadcast_to(~es_referencia, (len(miembros), len(es_referencia))),
+                         np.broadcast_to(es_referencia, (len(propias), len(es_referencia)))])
+
+    filas = np.concatenate(filas)
+    apilado = pd.DataFrame(valores[filas] * np.concatenate(mascaras), columns=list(columnas))
+    apilado['Ambito'] = np.concatenate(ambitos)
+    apilado['Intervalo_codigo'] = codigos_intervalo[filas]
+    apilado['Filas_consolidadas'] = np.concatenate(mascaras)[:, es_conteo].any(axis=1).astype(int)
+    apilado = apilado[apilado['Intervalo_codigo'] >= 0]
+
+    sumas = apilado.groupby(['Ambito', 'Intervalo_codigo'], sort=True).sum().reset_index()
+
+    nombres_ambito = [GRUPOS[clave]['nombre'] for clave in indice_colas['grupos']] + [
+        f"Consolidado ({len(conjunto)} colas)" for conjunto in indice_colas['conjuntos']
+    ]
+    inicio = inicios[sumas['Intervalo_codigo'].to_numpy()]
+    fin = inicio + pd.Timedelta(minutes=30)
+    base = pd.DataFrame({
+        'Fecha': inicio.strftime('%Y-%m-%d'),
+        'Intervalo': inicio.strftime('%H:%M') + '-' + fin.strftime('%H:%M'),
+        'Ambito': np.array(nombres_ambito, dtype=object)[sumas['Ambito'].to_numpy()],
+    })
+
+    controles = []
+    for metrica in metricas:
+        definicion = METRICAS[metrica]
+        recalculado = evaluar_kpi(sumas, definicion['kpi'], sin_base=np.nan)
+        if 'conteo' in definicion:
+            # Solo hay conteo de referencia en los ámbitos consolidados
+            referencia = sumas[f'ref_{metrica}'].where(sumas['Filas_consolidadas'] > 0).to_numpy()
+        else:
+            denominador = sumas[f'ref_{metrica}_den']
+            referencia = np.where(denominador > 0, sumas[f'ref_{metrica}_num'] / denominador.where(denominador > 0, 1),
+                                  np.nan) * definicion['escala']
+        controles.append(base.assign(
+            Metrica=metrica,
+            Recalculado=np.round(recalculado, 2),
+            Referencia=np.round(referencia, 2),
+            Tolerancia=tolerancias[metrica],
+        ))
+
+    tabla = pd.concat(controles, ignore_index=True)
+    tabla = tabla[tabla['Recalculado'].notna() & tabla['Referencia'].notna()]
+    tabla['Diferencia'] = (tabla['Recalculado'] - tabla['Referencia']).round(2)
+    tabla['Discrepancia'] = tabla['Diferencia'].abs() > tabla['Tolerancia'] + 1e-9
+    tabla = tabla[['Fecha', 'Intervalo', 'Ambito', 'Metrica', 'Recalculado', 'Referencia',
+                   'Diferencia', 'Tolerancia', 'Discrepancia']]
+    if solo_diferencias:
+        tabla = tabla[tabla['Discrepancia']]
+    return tabla.sort_values(['Fecha', 'Intervalo', 'Ambito', 'Metrica'], kind='mergesort').reset_index(drop=True)
+
+
+def main(df_detalle=None, indice_colas=None, tolerancias=None):
+    """
+    Concilia el detalle (None = leer el archivo configurado) y guarda las diferencias.
+
+    Returns:
+        DataFrame: todos los controles (ver conciliar), con su columna Discrepancia
+    """
+    print("🧮 CONCILIACIÓN CONTRA GENESYS")
+    print("=" * 40)
+    if df_detalle is None:
+        df_detalle = leer_detalle(columnas=COLUMNAS_CONCILIACION)
+
+    controles = conciliar(df_detalle, indice_colas, tolerancias, solo_diferencias=False)
+    diferencias = controles[controles['Discrepancia']].drop(columns='Discrepancia')
+    print(f"✅ Controles: {len(controles):,} ({controles['Ambito'].nunique()} ámbitos, "
+          f"{len(controles[['Fecha', 'Intervalo']].drop_duplicates())} intervalos)")
+    if len(diferencias):
+        print(f"⚠️ Fuera de tolerancia: {len(diferencias):,}")
+        for (ambito, metrica), cantidad in diferencias.groupby(['Ambito', 'Metrica']).size().items():
+            print(f"   {ambito:<30} {metrica:<18} {cantidad:4d} intervalos")
+    else:
+        print("✅ Sin diferencias fuera de tolerancia")
+
+    archivo_salida = guardar_resultado(diferencias, ARCHIVO_CONCILIACION, encoding='utf-8')
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    return controles
+
+
+def _tolerancia(texto):
+    metrica, _, valor = texto.partition('=')
+    if metrica not in TOLERANCIAS or not valor:
+        raise argparse.ArgumentTypeError(f"Use METRICA=valor con METRICA en {', '.join(TOLERANCIAS)}")
+    return metrica, float(valor)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concilia los KPIs recalculados con los valores reportados por Genesys")
+    parser.add_argument('--detalle', help="Ruta del detalle (por defecto la configurada en CargaDatos)")
+    parser.add_argument('--tolerancia', nargs='+', type=_tolerancia, default=[], metavar='METRICA=VALOR',
+                        help="Tolerancias distintas de las por defecto")
+    args = parser.parse_args()
+    main(leer_detalle(args.detalle, columnas=COLUMNAS_CONCILIACION) if args.detalle else None,
+         tolerancias=dict(args.tolerancia))
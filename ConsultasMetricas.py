@@ -0,0 +1,376 @@
+# -*- coding: utf-8 -*-
+"""
+SERVICIO DE CONSULTAS SOBRE MÉTRICAS POR INTERVALO
+==================================================
+Carga los resultados ya generados (una carpeta de salida de Ejecutar.py, de la
+ejecución por fecha o de un lote) en índices en memoria y responde consultas
+puntuales y por rango sin volver a ejecutar análisis ni abrir CSV, p.ej.
+"nivel de servicio de Mesa de Ayuda a las 18:00 en el último mes".
+
+Índice por grupo (clave del análisis en Planificador: mda, central, fraude, ...):
+- diccionario grupo -> tabla; las métricas de estados de agentes (utilización,
+  ocupación, ...) se unen a la tabla de su grupo
+- filas ordenadas por (fecha, minuto de inicio del intervalo) en un arreglo
+  int64, así un rango de fechas es un searchsorted y un intervalo del día es una
+  máscara sobre ese tramo
+- métricas numéricas (y duraciones HH:MM:SS, en segundos) en arreglos numpy
+  para agregar sin recorrer filas
+
+Consultas (GET /consulta, parámetros de query string):
+    grupo=mda                       (obligatorio)
+    fecha=2025-11-27                (un día) | desde=...&hasta=... | ultimos_dias=30
+    intervalo=18:00 | 18:00-18:30   (un intervalo) | hora_desde=08:00&hora_hasta=12:00
+    metricas=Nivel_de_Servicio_%,TMO  (por defecto todas)
+    agregado=promedio | suma | minimo | maximo   (opcional, además de las filas)
+    filas=0                         (solo el agregado)
+
+Uso:
+    python ConsultasMetricas.py [--carpeta ExportadosGenerados] [--puerto 8766]
+    python ConsultasMetricas.py --consultar grupo=mda intervalo=18:00 ultimos_dias=30 metricas=Nivel_de_Servicio_% agregado=promedio
+
+HTTP: GET /consulta, GET /grupos, GET /estado, POST /recargar
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import CargaDatos
+from Planificador import ANALIZADORES
+
+PUERTO_POR_DEFECTO = 8766
+MINUTOS_DIA = 24 * 60
+AGREGADOS = {'promedio': np.nanmean, 'suma': np.nansum, 'minimo': np.nanmin, 'maximo': np.nanmax}
+
+_EPOCA = pd.Timestamp('1970-01-01')
+_bloqueo_carga = threading.Lock()
+_indice = {'grupos': {}, 'carpeta': None, 'cargado': None, 'segundos_carga': 0.0}
+
+
+def _minutos_de_hora(texto):
+    """Minuto del día de 'HH:MM' o del inicio de 'HH:MM-HH:MM'"""
+    horas, minutos = texto.strip().split('-')[0].split(':')[:2]
+    return int(horas) * 60 + int(minutos)
+
+
+def _dias_de_fecha(texto):
+    return (pd.Timestamp(texto) - _EPOCA).days
+
+
+def _es_duracion(serie):
+    muestra = serie.dropna().astype(str)
+    return len(muestra) > 0 and muestra.str.fullmatch(r'-?\d+:\d{2}:\d{2}').all()
+
+
+def _segundos_a_hora(segundos):
+    segundos = int(round(segundos))
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+
+def _fecha_unica(tablas):
+    """Fecha de los resultados si todos los que la informan tienen una sola"""
+    fechas = set()
+    for df in tablas.values():
+        if 'Fecha' in df.columns:
+            fechas.update(df['Fecha'].dropna().unique())
+    return next(iter(fechas)) if len(fechas) == 1 else None
+
+
+def indexar_tabla(df):
+    """
+    Índice de la tabla de un grupo: claves (días * 1440 + minuto) ordenadas,
+    fechas e intervalos como texto y métricas numéricas como float.
+    """
+    dias = (pd.to_datetime(df['Fecha']) - _EPOCA).dt.days.to_numpy(dtype=np.int64)
+    minutos = df['Intervalo'].astype(str).str[:5].map(_minutos_de_hora).to_numpy(dtype=np.int64)
+    claves = dias * MINUTOS_DIA + minutos
+    orden = np.argsort(claves, kind='stable')
+
+    metricas = [columna for columna in df.columns if columna not in ('Fecha', 'Intervalo', 'Grupo')]
+    valores, numericas, duraciones = {}, {}, set()
+    for columna in metricas:
+        serie = df[columna].iloc[orden]
+        valores[columna] = serie.to_numpy(dtype=object)
+        if pd.api.types.is_numeric_dtype(serie):
+            numericas[columna] = serie.to_numpy(dtype=float)
+        elif _es_duracion(serie):
+            numericas[columna] = pd.to_timedelta(serie, errors='coerce').dt.total_seconds().to_numpy()
+            duraciones.add(columna)
+
+    return {
+        'claves': claves[orden],
+        'minutos': minutos[orden],
+        'fechas': df['Fecha'].astype(str).to_numpy(dtype=object)[orden],
+        'intervalos': df['Intervalo'].astype(str).to_numpy(dtype=object)[orden],
+        'metricas': metricas,
+        'valores': valores,
+        'numericas': numericas,
+        'duraciones': duraciones,
+    }
+
+
+def cargar_metricas(carpeta=None, fecha=None):
+    """
+    Lee los CSV de resultados de la carpeta y arma el índice por grupo.
+
+    Args:
+        carpeta: carpeta de resultados (None = la salida configurada en CargaDatos)
+        fecha: fecha de los archivos sin columna 'Fecha' (Mesa de Ayuda de un solo
+               día); None = la única fecha de los demás resultados
+
+    Returns:
+        dict: índice {'grupos', 'carpeta', 'cargado', 'segundos_carga'}
+    """
+    instante = time.perf_counter()
+    carpeta = carpeta or CargaDatos.directorio_salida()
+    tablas = {}
+    for clave, definicion in ANALIZADORES.items():
+        ruta = os.path.join(carpeta, definicion['archivo'])
+        if os.path.exists(ruta):
+            tablas[clave] = pd.read_csv(ruta)
+
+    fecha = fecha or _fecha_unica(tablas)
+    estados = tablas.pop('estados', None)
+    grupos = {}
+    for clave, df in tablas.items():
+        if 'Fecha' not in df.columns:
+            if fecha is None:
+                print(f"⚠️ {ANALIZADORES[clave]['archivo']}: sin columna Fecha, se omite (indique --fecha)")
+                continue
+            df.insert(1, 'Fecha', fecha)
+        if estados is not None:
+            del_grupo = estados[estados['Grupo'] == ANALIZADORES[clave]['nombre']].drop(columns='Grupo')
+            if len(del_grupo):
+                df = df.merge(del_grupo, on=['Fecha', 'Intervalo'], how='outer')
+        grupos[clave] = indexar_tabla(df)
+
+    return {
+        'grupos': grupos,
+        'carpeta': os.path.abspath(carpeta),
+        'cargado': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'segundos_carga': round(time.perf_counter() - instante, 3),
+    }
+
+
+def recargar(carpeta=None, fecha=None):
+    """Reemplaza el índice en memoria (las consultas en curso siguen con el anterior)"""
+    global _indice
+    with _bloqueo_carga:
+        _indice = cargar_metricas(carpeta or _indice['carpeta'], fecha)
+    return resumen_indice(_indice)
+
+
+def resumen_indice(indice):
+    """Grupos cargados con sus métricas, filas y rango de fechas"""
+    return {
+        'ok': True,
+        'carpeta': indice['carpeta'],
+        'cargado': indice['cargado'],
+        'segundos_carga': indice['segundos_carga'],
+        'grupos': {
+            grupo: {
+                'filas': len(tabla['claves']),
+                'desde': tabla['fechas'][0] if len(tabla['claves']) else None,
+                'hasta': tabla['fechas'][-1] if len(tabla['claves']) else None,
+                'metricas': tabla['metricas'],
+            }
+            for grupo, tabla in indice['grupos'].items()
+        },
+    }
+
+
+def _json(valor):
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return None
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def consultar(indice, grupo, fecha=None, desde=None, hasta=None, ultimos_dias=None, intervalo=None,
+              hora_desde=None, hora_hasta=None, metricas=None, agregado=None, filas=True):
+    """
+    Consulta puntual o por rango sobre el índice de un grupo (ver parámetros en la
+    documentación del módulo).
+
+    Returns:
+        dict: 'filas' [{Fecha, Intervalo, métricas...}] y, si se pidió, 'agregado'
+    """
+    tabla = indice['grupos'].get(grupo)
+    if tabla is None:
+        return {'ok': False, 'error': f"Grupo desconocido: {grupo} (disponibles: {', '.join(indice['grupos'])})"}
+    metricas = metricas or tabla['metricas']
+    desconocidas = [metrica for metrica in metricas if metrica not in tabla['valores']]
+    if desconocidas:
+        return {'ok': False, 'error': f"Métricas desconocidas para {grupo}: {', '.join(desconocidas)}"}
+    if agregado is not None and agregado not in AGREGADOS:
+        return {'ok': False, 'error': f"Agregado desconocido: {agregado} (disponibles: {', '.join(AGREGADOS)})"}
+
+    # Rango de fechas -> tramo contiguo de las claves ordenadas
+    claves = tabla['claves']
+    if fecha is not None:
+        desde = hasta = fecha
+    if ultimos_dias is not None and len(claves):
+        ultimo = int(claves[-1] // MINUTOS_DIA)
+        inicio_dias, fin_dias = ultimo - int(ultimos_dias) + 1, ultimo
+    else:
+        inicio_dias = _dias_de_fecha(desde) if desde is not None else None
+        fin_dias = _dias_de_fecha(hasta) if hasta is not None else None
+    inicio = 0 if inicio_dias is None else np.searchsorted(claves, inicio_dias * MINUTOS_DIA, side='left')
+    fin = len(claves) if fin_dias is None else np.searchsorted(claves, (fin_dias + 1) * MINUTOS_DIA, side='left')
+
+    # Intervalos del día -> máscara sobre el tramo
+    posiciones = np.arange(inicio, fin)
+    if intervalo is not None:
+        hora_desde = hora_hasta = intervalo
+    if hora_desde is not None or hora_hasta is not None:
+        minutos = tabla['minutos'][inicio:fin]
+        mascara = np.ones(len(minutos), dtype=bool)
+        if hora_desde is not None:
+            mascara &= minutos >= _minutos_de_hora(hora_desde)
+        if hora_hasta is not None:
+            mascara &= minutos <= _minutos_de_hora(hora_hasta)
+        posiciones = posiciones[mascara]
+
+    respuesta = {'ok': True, 'grupo': grupo, 'cantidad': len(posiciones)}
+    if filas:
+        respuesta['filas'] = [
+            {
+                'Fecha': tabla['fechas'][posicion],
+                'Intervalo': tabla['intervalos'][posicion],
+                **{metrica: _json(tabla['valores'][metrica][posicion]) for metrica in metricas},
+            }
+            for posicion in posiciones
+        ]
+    if agregado is not None:
+        funcion = AGREGADOS[agregado]
+        resultado = {}
+        for metrica in metricas:
+            numericos = tabla['numericas'].get(metrica)
+            if numericos is None or not len(posiciones) or np.isnan(numericos[posiciones]).all():
+                resultado[metrica] = None
+                continue
+            valor = float(funcion(numericos[posiciones]))
+            resultado[metrica] = _segundos_a_hora(valor) if metrica in tabla['duraciones'] else round(valor, 4)
+        respuesta['agregado'] = {'funcion': agregado, 'valores': resultado}
+    return respuesta
+
+
+def consultar_parametros(indice, parametros):
+    """Consulta a partir de parámetros de texto (query string o línea de comandos)"""
+    if 'grupo' not in parametros:
+        return {'ok': False, 'error': "Falta el parámetro 'grupo'"}
+    argumentos = {
+        clave: parametros[clave]
+        for clave in ('fecha', 'desde', 'hasta', 'intervalo', 'hora_desde', 'hora_hasta', 'agregado')
+        if parametros.get(clave)
+    }
+    try:
+        if parametros.get('ultimos_dias'):
+            argumentos['ultimos_dias'] = int(parametros['ultimos_dias'])
+        if parametros.get('metricas'):
+            argumentos['metricas'] = [metrica for metrica in parametros['metricas'].split(',') if metrica]
+        argumentos['filas'] = parametros.get('filas', '1') not in ('0', 'false', 'no')
+        return consultar(indice, parametros['grupo'], **argumentos)
+    except ValueError as e:
+        return {'ok': False, 'error': f"Parámetro inválido: {e}"}
+
+
+class ManejadorConsultas(BaseHTTPRequestHandler):
+    def _responder(self, respuesta, codigo=200):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/consulta':
+            parametros = {clave: valores[-1] for clave, valores in urllib.parse.parse_qs(url.query).items()}
+            respuesta = consultar_parametros(_indice, parametros)
+            self._responder(respuesta, 200 if respuesta['ok'] else 400)
+        elif url.path in ('/grupos', '/estado'):
+            self._responder(resumen_indice(_indice))
+        else:
+            self._responder({'ok': False, 'error': 'Ruta no encontrada'}, 404)
+
+    def do_POST(self):
+        if self.path != '/recargar':
+            self._responder({'ok': False, 'error': 'Ruta no encontrada'}, 404)
+            return
+        longitud = int(self.headers.get('Content-Length') or 0)
+        try:
+            peticion = json.loads(self.rfile.read(longitud) or b'{}')
+        except json.JSONDecodeError as e:
+            self._responder({'ok': False, 'error': f"JSON inválido: {e}"}, 400)
+            return
+        self._responder(recargar(peticion.get('carpeta'), peticion.get('fecha')))
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def consultar_servicio(parametros, puerto=PUERTO_POR_DEFECTO, ruta='consulta'):
+    """
+    Cliente (solo biblioteca estándar): consulta al servicio en ejecución.
+
+    Ejemplo:
+        consultar_servicio({'grupo': 'mda', 'intervalo': '18:00', 'ultimos_dias': 30,
+                            'metricas': 'Nivel_de_Servicio_%', 'agregado': 'promedio', 'filas': 0})
+    """
+    consulta = urllib.parse.urlencode(parametros or {})
+    url = f"http://127.0.0.1:{puerto}/{ruta}" + (f"?{consulta}" if consulta else '')
+    try:
+        with urllib.request.urlopen(url) as respuesta:
+            return json.loads(respuesta.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+def iniciar_servicio(carpeta=None, puerto=PUERTO_POR_DEFECTO, fecha=None):
+    """Carga los resultados y atiende consultas en 127.0.0.1:puerto"""
+    print("🔎 SERVICIO DE CONSULTAS DE MÉTRICAS")
+    print("=" * 40)
+    resumen = recargar(carpeta, fecha)
+    for grupo, datos in resumen['grupos'].items():
+        print(f"✅ {grupo}: {datos['filas']:,} filas ({datos['desde']} a {datos['hasta']})")
+    print(f"⏱️ Carga: {resumen['segundos_carga']:.2f}s")
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), ManejadorConsultas)
+    print(f"🌐 HTTP: http://127.0.0.1:{puerto} (GET /consulta, GET /grupos, POST /recargar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servicio detenido")
+    finally:
+        servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de consultas sobre métricas por intervalo")
+    parser.add_argument('--carpeta', help="Carpeta de resultados (por defecto ExportadosGenerados)")
+    parser.add_argument('--fecha', help="Fecha de los resultados sin columna Fecha (YYYY-MM-DD)")
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--consultar', nargs='+', metavar='CLAVE=VALOR',
+                        help="Consultar un servicio en ejecución, p.ej. grupo=mda intervalo=18:00")
+    args = parser.parse_args()
+
+    if args.consultar:
+        parametros = dict(parametro.split('=', 1) for parametro in args.consultar)
+        print(json.dumps(consultar_servicio(parametros, args.puerto), ensure_ascii=False, indent=2))
+        return
+
+    iniciar_servicio(args.carpeta, args.puerto, args.fecha)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+EJECUCIÓN POR LOTES DESDE UN MANIFIESTO
+=======================================
+Ejecuta los análisis para varios pares de exportaciones de Genesys (distintas
+organizaciones, campañas o períodos) descritos en un manifiesto JSON, sin
+tener que reemplazar a mano los archivos de ExportadosGenesysprueba.
+
+- Cada trabajo corre en su propio proceso (nómina y caché aisladas) dentro de
+  un pool con concurrencia máxima y un presupuesto de memoria: un trabajo solo
+  arranca si su memoria estimada cabe junto a los que ya están corriendo (uno
+  más grande que el presupuesto corre solo).
+- La salida por consola de cada trabajo queda en Ejecucion.log de su carpeta.
+- Al terminar se escribe un reporte consolidado (JSON y CSV) con el estado,
+  duración, memoria y archivos de cada trabajo y análisis.
+
+Manifiesto (las rutas relativas se resuelven desde la carpeta del manifiesto):
+    {
+        "procesos": 2,                                  (opcional)
+        "memoria_mb": 4096,                             (opcional)
+        "formatos": ["jsonl"],                          (opcional, para todos los trabajos)
+        "trabajos": [
+            {
+                "nombre": "org1-2025-11",
+                "detalle": "org1/Detalle del rendimiento de colas.csv",
+                "timeline": "org1/Resumen de línea de tiempo de estado de agente.csv",
+                "salida": "resultados/org1-2025-11",
+                "agentes": {"central": ["Nombre Apellido", ...]} | "org1/nomina.json",   (opcional)
+                "analisis": ["mda", "fraude"],          (opcional, todos por defecto)
+                "formatos": ["parquet", "sqlite"]       (opcional, además del CSV)
+            }
+        ]
+    }
+
+Uso:
+    python EjecucionLotes.py manifiesto.json [--procesos 2] [--memoria-mb 4096] [--reporte carpeta]
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import CargaDatos
+from FormatosSalida import validar_formatos
+from GruposColas import nomina_temporal
+from Planificador import ANALIZADORES, ejecutar_analizador, entradas_de, nueva_ejecucion
+
+# Estimación de memoria de un trabajo: base del proceso (Python + pandas) más un
+# múltiplo del tamaño de las entradas (DataFrames parseados, copias y artefactos)
+MEMORIA_BASE_PROCESO_MB = 120
+FACTOR_MEMORIA_ENTRADAS = 6
+MEMORIA_POR_DEFECTO_MB = 4096
+
+
+def _resolver(ruta, base):
+    return ruta if ruta is None or os.path.isabs(ruta) else os.path.join(base, ruta)
+
+
+def cargar_manifiesto(ruta):
+    """
+    Lee el manifiesto y normaliza sus trabajos (rutas absolutas, nómina cargada,
+    análisis por defecto). Acepta también una lista de trabajos sin envoltorio.
+
+    Returns:
+        dict: {'procesos', 'memoria_mb', 'trabajos': [...]}
+    """
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        manifiesto = json.load(archivo)
+    if isinstance(manifiesto, list):
+        manifiesto = {'trabajos': manifiesto}
+
+    base = os.path.dirname(os.path.abspath(ruta))
+    trabajos = []
+    nombres = set()
+    for posicion, trabajo in enumerate(manifiesto.get('trabajos', []), start=1):
+        nombre = trabajo.get('nombre') or f"trabajo_{posicion}"
+        if nombre in nombres:
+            raise ValueError(f"Nombre de trabajo repetido en el manifiesto: {nombre}")
+        nombres.add(nombre)
+
+        claves = trabajo.get('analisis') or list(ANALIZADORES)
+        desconocidos = [clave for clave in claves if clave not in ANALIZADORES]
+        if desconocidos:
+            raise ValueError(f"{nombre}: análisis desconocidos {desconocidos}")
+
+        formatos = validar_formatos(trabajo.get('formatos', manifiesto.get('formatos', ())))
+
+        agentes = trabajo.get('agentes')
+        if isinstance(agentes, str):
+            with open(_resolver(agentes, base), 'r', encoding='utf-8') as archivo:
+                agentes = json.load(archivo)
+
+        trabajos.append({
+            'nombre': nombre,
+            'detalle': _resolver(trabajo.get('detalle'), base),
+            'timeline': _resolver(trabajo.get('timeline'), base),
+            'salida': _resolver(trabajo.get('salida') or os.path.join('resultados', nombre), base),
+            'agentes': agentes,
+            'analisis': claves,
+            'formatos': formatos,
+        })
+
+    return {
+        'procesos': manifiesto.get('procesos'),
+        'memoria_mb': manifiesto.get('memoria_mb'),
+        'trabajos': trabajos,
+    }
+
+
+def entradas_faltantes(trabajo):
+    """Entradas que necesitan los análisis del trabajo y no existen"""
+    necesarias = sorted({entrada for clave in trabajo['analisis'] for entrada in entradas_de(clave)})
+    return [entrada for entrada in necesarias if not trabajo[entrada] or not os.path.exists(trabajo[entrada])]
+
+
+def estimar_memoria_mb(trabajo):
+    """Memoria estimada (MB) del trabajo a partir del tamaño de las entradas que lee"""
+    necesarias = {entrada for clave in trabajo['analisis'] for entrada in entradas_de(clave)}
+    tamano = sum(os.path.getsize(trabajo[entrada]) for entrada in necesarias) / 1024 / 1024
+    return MEMORIA_BASE_PROCESO_MB + FACTOR_MEMORIA_ENTRADAS * tamano
+
+
+def _memoria_pico_mb():
+    """Memoria residente máxima del proceso en MB (None si no se puede medir)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def ejecutar_trabajo_lote(trabajo):
+    """
+    Ejecuta un trabajo del manifiesto (en un proceso del pool).
+
+    Returns:
+        dict: nombre, ok, segundos, memoria pico y resultado por análisis
+    """
+    instante = time.perf_counter()
+    CargaDatos.configurar_rutas(trabajo['detalle'], trabajo['timeline'], trabajo['salida'])
+    os.makedirs(trabajo['salida'], exist_ok=True)
+    resultado = {'nombre': trabajo['nombre'], 'ok': True, 'error': None, 'analisis': {}}
+
+    with open(os.path.join(trabajo['salida'], 'Ejecucion.log'), 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log):
+        try:
+            with nomina_temporal(trabajo['agentes']), CargaDatos.formatos_salida(trabajo.get('formatos', ())):
+                ejecucion = nueva_ejecucion(trabajo['analisis'])
+                for clave in trabajo['analisis']:
+                    ejecutar_analizador(ejecucion, clave)
+        except ValueError as e:
+            resultado.update(ok=False, error=str(e))
+        else:
+            for clave, analisis in ejecucion['analizadores'].items():
+                error = analisis['error']
+                if error is None and not os.path.exists(analisis['archivo']):
+                    error = "El análisis no generó resultados"
+                resultado['analisis'][clave] = {
+                    'segundos': round(analisis['segundos'], 3),
+                    'archivo': analisis['archivo'],
+                    'error': error,
+                }
+                resultado['ok'] = resultado['ok'] and error is None
+
+    resultado['segundos'] = round(time.perf_counter() - instante, 3)
+    resultado['memoria_pico_mb'] = _memoria_pico_mb()
+    return resultado
+
+
+def ejecutar_lote(trabajos, procesos=None, memoria_mb=None):
+    """
+    Planifica los trabajos en un pool de procesos respetando la concurrencia y el
+    presupuesto de memoria.
+
+    Returns:
+        list: resultado de cada trabajo, en el orden del manifiesto
+    """
+    procesos = procesos or os.cpu_count() or 1
+    memoria_mb = memoria_mb or MEMORIA_POR_DEFECTO_MB
+    resultados = {}
+    pendientes = []
+
+    for trabajo in trabajos:
+        faltantes = entradas_faltantes(trabajo)
+        if faltantes:
+            resultados[trabajo['nombre']] = {
+                'nombre': trabajo['nombre'], 'ok': False, 'analisis': {}, 'segundos': 0,
+                'error': f"Entradas no encontradas: {faltantes}",
+            }
+            print(f"❌ {trabajo['nombre']}: entradas no encontradas {faltantes}")
+        else:
+            pendientes.append((trabajo, estimar_memoria_mb(trabajo)))
+
+    # Un proceso nuevo por trabajo: la nómina y la caché de un trabajo no afectan al siguiente
+    with ProcessPoolExecutor(max_workers=procesos, max_tasks_per_child=1) as pool:
+        en_curso = {}
+        while pendientes or en_curso:
+            memoria_en_uso = sum(estimado for _, estimado in en_curso.values())
+            for trabajo, estimado in list(pendientes):
+                if len(en_curso) >= procesos:
+                    break
+                if en_curso and memoria_en_uso + estimado > memoria_mb:
+                    continue
+                pendientes.remove((trabajo, estimado))
+                en_curso[pool.submit(ejecutar_trabajo_lote, trabajo)] = (trabajo, estimado)
+                memoria_en_uso += estimado
+                print(f"🚀 {trabajo['nombre']}: iniciado (~{estimado:.0f} MB estimados)")
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                trabajo, estimado = en_curso.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    resultado = {'nombre': trabajo['nombre'], 'ok': False, 'analisis': {},
+                                 'segundos': 0, 'error': str(e)}
+                resultado['memoria_estimada_mb'] = round(estimado, 1)
+                resultados[trabajo['nombre']] = resultado
+                estado = "✅" if resultado['ok'] else "❌"
+                print(f"{estado} {trabajo['nombre']}: {resultado['segundos']:.2f}s")
+
+    return [resultados[trabajo['nombre']] for trabajo in trabajos]
+
+
+def escribir_reporte(resultados, carpeta, segundos_totales):
+    """
+    Escribe Reporte_Lote.json (completo) y Reporte_Lote.csv (una fila por trabajo y análisis).
+
+    Returns:
+        tuple: rutas del JSON y del CSV
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    ruta_json = os.path.join(carpeta, 'Reporte_Lote.json')
+    ruta_csv = os.path.join(carpeta, 'Reporte_Lote.csv')
+
+    reporte = {
+        'trabajos': len(resultados),
+        'exitosos': sum(1 for resultado in resultados if resultado['ok']),
+        'segundos': round(segundos_totales, 3),
+        'resultados': resultados,
+    }
+    with open(ruta_json, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+
+    with open(ruta_csv, 'w', encoding='utf-8', newline='') as archivo:
+        escritor = csv.writer(archivo, lineterminator='\n')
+        escritor.writerow(['Trabajo', 'Analisis', 'Estado', 'Segundos', 'Memoria_Estimada_MB',
+                           'Memoria_Pico_MB', 'Archivo', 'Error'])
+        for resultado in resultados:
+            comunes = [resultado.get('memoria_estimada_mb', ''), resultado.get('memoria_pico_mb', '')]
+            if not resultado['analisis']:
+                escritor.writerow([resultado['nombre'], '', 'ERROR', resultado['segundos'], *comunes,
+                                   '', resultado.get('error') or ''])
+            for clave, analisis in resultado['analisis'].items():
+                escritor.writerow([resultado['nombre'], clave, 'ERROR' if analisis['error'] else 'OK',
+                                   analisis['segundos'], *comunes, analisis['archivo'], analisis['error'] or ''])
+
+    return ruta_json, ruta_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta los análisis para los trabajos de un manifiesto")
+    parser.add_argument('manifiesto', help="Archivo JSON con los trabajos")
+    parser.add_argument('--procesos', type=int, help="Trabajos simultáneos (por defecto, núcleos disponibles)")
+    parser.add_argument('--memoria-mb', type=float, help=f"Presupuesto de memoria (por defecto {MEMORIA_POR_DEFECTO_MB} MB)")
+    parser.add_argument('--reporte', help="Carpeta del reporte consolidado (por defecto, la del manifiesto)")
+    args = parser.parse_args()
+
+    print("📦 EJECUCIÓN POR LOTES")
+    print("=" * 40)
+    instante = time.perf_counter()
+    manifiesto = cargar_manifiesto(args.manifiesto)
+    print(f"📋 Trabajos en el manifiesto: {len(manifiesto['trabajos'])}")
+
+    resultados = ejecutar_lote(
+        manifiesto['trabajos'],
+        procesos=args.procesos or manifiesto['procesos'],
+        memoria_mb=args.memoria_mb or manifiesto['memoria_mb'],
+    )
+
+    carpeta_reporte = args.reporte or os.path.dirname(os.path.abspath(args.manifiesto))
+    ruta_json, ruta_csv = escribir_reporte(resultados, carpeta_reporte, time.perf_counter() - instante)
+    exitosos = sum(1 for resultado in resultados if resultado['ok'])
+    print(f"📊 Trabajos exitosos: {exitosos}/{len(resultados)}")
+    print(f"📋 Reporte: {ruta_json}")
+    print(f"📋 Reporte: {ruta_csv}")
+    if exitosos < len(resultados):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,48 @@ Este script ejecuta los análisis principales de colas:
 - Fraude Salida
 - Servicios Administrativos
 - Redes Sociales
+- Estados de agentes (utilización, disponibilidad, shrinkage y ocupación)
 
 Genera automáticamente los 6 archivos CSV de exportado en la carpeta ExportadosGenerados.
+Los análisis se ejecutan en un solo proceso a través de Planificador.py, que
+calcula una sola vez los artefactos que comparten (detalle, timeline, KPIs,
+agentes en cola por grupo, cubo de estados) y muestra el tiempo de cada uno.
+
+Con --analisis se ejecuta solo un subconjunto; se leen únicamente los archivos
+y columnas que esos análisis necesitan (p.ej. Fraude Salida no lee el timeline):
+    python Ejecutar.py --analisis fraude fraude_salida
+
+Con --por-fecha, para exportaciones de varios días, cada fecha se procesa en un
+proceso distinto (ParaleloFechas.py) y los resultados se combinan:
+    python Ejecutar.py --por-fecha [--procesos 8]
+
+Con --zip los archivos generados se empaquetan además en un ZIP, por fragmentos
+(Empaquetado.py), con el nivel de compresión indicado:
+    python Ejecutar.py --zip Analisis.zip [--nivel-zip 9]
+
+Con --formatos los resultados se guardan además en Parquet, Arrow IPC, JSON
+Lines o SQLite (FormatosSalida.py), para cargarlos sin volver a parsear el CSV:
+    python Ejecutar.py --formatos parquet sqlite
+
+Con --nomina-inferida la nómina de Central, Servicios y Redes (y las exclusiones
+de Mesa de Ayuda) se infiere del timeline (NominaInferida.py) en lugar de usar
+las listas de GruposColas.py:
+    python Ejecutar.py --nomina-inferida
+
+Con --conciliar, al terminar, los KPIs recalculados se comparan con los valores
+que el propio detalle trae calculados por Genesys, en todos los intervalos y
+grupos (Conciliacion.py), y las diferencias se guardan en Conciliacion_Genesys.csv:
+    python Ejecutar.py --conciliar
+
+Con --registro se activan los diagnósticos por intervalo (nivel DETALLE, apagados
+por defecto) de todos los módulos o de algunos, y con --eventos los resúmenes de
+la ejecución (artefactos, análisis, fechas) se agregan como JSON Lines (Registro.py):
+    python Ejecutar.py --registro AnalisisMDA=DETALLE --eventos eventos.jsonl
 
 Archivos de entrada (ExportadosGenesysprueba):
 - Detalle del rendimiento de colas.csv
 - Resumen de línea de tiempo de estado de agente.csv
+(o sus versiones comprimidas .csv.gz / .zip / .xz / .bz2, que se leen sin descomprimir a disco)
 
 Archivos de salida (ExportadosGenerados):
 - Analisis_Mesa_Ayuda_Por_Intervalos.csv
@@ -24,22 +60,36 @@ Archivos de salida (ExportadosGenerados):
 - Analisis_FraudeOut_Por_intervalos.csv
 - Analisis_Servicios_Por_intervalos.csv
 - Analisis_Redes_Por_intervalos.csv
+- Analisis_Estados_Por_intervalos.csv (y el cubo Cubo_Estados_Agentes.npz)
+- Analisis_Medios_Por_intervalos.csv (KPIs extendidos por tipo de medios)
+- Analisis_Centro_Por_intervalos.csv (todos los grupos lado a lado)
 """
 
-import subprocess
+import argparse
 import sys
 import os
 from datetime import datetime
 
-def verificar_archivos_entrada():
-    """Verifica que existan los archivos de entrada necesarios"""
+from CargaDatos import formatos_salida, leer_detalle, leer_timeline, ruta_entrada, ruta_salida
+from Conciliacion import COLUMNAS_CONCILIACION, main as conciliar_con_genesys
+from Empaquetado import NIVEL_POR_DEFECTO, escribir_zip
+from FormatosSalida import FORMATOS, archivos_de_salida, validar_formatos
+from GruposColas import GRUPOS, nomina_temporal
+from NominaInferida import nomina_de_exportacion
+from ParaleloFechas import ejecutar_por_fecha
+from Registro import configurar_registro, evento, interpretar_niveles
+from ValidacionEntradas import texto_informe
+from Planificador import (
+    ANALIZADORES, columnas_de, ejecutar_analizador, entradas_de, nueva_ejecucion, reporte_tiempos
+)
+
+def verificar_archivos_entrada(claves):
+    """Verifica que existan los archivos de entrada que necesitan los análisis indicados"""
     print("🔍 VERIFICANDO ARCHIVOS DE ENTRADA")
     print("=" * 50)
     
-    archivos_necesarios = [
-        "ExportadosGenesysprueba/Detalle del rendimiento de colas.csv",
-        "ExportadosGenesysprueba/Resumen de línea de tiempo de estado de agente.csv"
-    ]
+    entradas = sorted({entrada for clave in claves for entrada in entradas_de(clave)})
+    archivos_necesarios = [ruta_entrada(entrada) for entrada in entradas]
     
     todos_existen = True
     for archivo in archivos_necesarios:
@@ -62,46 +112,28 @@ def crear_carpeta_salida():
         os.makedirs("ExportadosGenerados")
         print("📁 Carpeta ExportadosGenerados creada")
 
-def ejecutar_script(nombre_script, descripcion):
-    """Ejecuta un script de Python y maneja errores"""
+def ejecutar_analisis(ejecucion, clave):
+    """Ejecuta un análisis dentro del planificador y maneja errores"""
+    descripcion = f"Análisis {ANALIZADORES[clave]['nombre']}"
     print(f"🚀 EJECUTANDO: {descripcion}")
     print("=" * 60)
     
-    try:
-        # Obtener la ruta del ejecutable de Python
-        python_executable = sys.executable
-        
-        # Ejecutar el script sin capturar la salida para evitar problemas de codificación
-        resultado = subprocess.run(
-            [python_executable, nombre_script],
-            check=False
-        )
-        
-        if resultado.returncode == 0:
-            print(f"✅ {descripcion} - COMPLETADO EXITOSAMENTE")
-            print()
-            return True
-        else:
-            print(f"❌ {descripcion} - ERROR (código: {resultado.returncode})")
-            print()
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error ejecutando {nombre_script}: {e}")
+    if ejecutar_analizador(ejecucion, clave):
+        print(f"✅ {descripcion} - COMPLETADO EXITOSAMENTE")
         print()
-        return False
+        return True
+    
+    print(f"❌ {descripcion} - ERROR ({ejecucion['analizadores'][clave]['error']})")
+    print()
+    return False
 
-def verificar_archivos_salida():
-    """Verifica que se hayan generado todos los archivos de salida"""
+def verificar_archivos_salida(claves):
+    """Verifica que se hayan generado los archivos de salida de los análisis indicados"""
     print("🔍 VERIFICANDO ARCHIVOS GENERADOS")
     print("=" * 50)
     archivos_esperados = [
-        ("ExportadosGenerados/Analisis_Mesa_Ayuda_Por_Intervalos.csv", "Mesa de Ayuda"),
-        ("ExportadosGenerados/Analisis_Central_Por_intervalos.csv", "Central Telefónica"),
-        ("ExportadosGenerados/Analisis_Fraude_Por_intervalos.csv", "Fraude"),
-        ("ExportadosGenerados/Analisis_FraudeOut_Por_intervalos.csv", "Fraude Salida"),
-        ("ExportadosGenerados/Analisis_Servicios_Por_intervalos.csv", "Servicios Administrativos"),
-        ("ExportadosGenerados/Analisis_Redes_Por_intervalos.csv", "Redes Sociales")
+        (ruta_salida(ANALIZADORES[clave]['archivo']), ANALIZADORES[clave]['nombre'])
+        for clave in claves
     ]
         
     todos_generados = True
@@ -118,56 +150,160 @@ def verificar_archivos_salida():
     
     return todos_generados
 
-def main():
-    """Función principal que ejecuta todos los análisis"""
+def ejecutar_por_fechas(claves, procesos, nomina=None):
+    """Ejecuta los análisis fragmentados por fecha en un pool de procesos (con la nómina indicada)"""
+    print("🗓️ EJECUTANDO POR FECHA EN PARALELO")
+    print("=" * 60)
+    
+    resumen = ejecutar_por_fecha(claves, procesos, nomina)
+    exitosos = sum(
+        all(error is None for error in resultado['errores'].values())
+        for resultado in resumen['resultados']
+    )
+    for resultado in resumen['resultados']:
+        evento('fecha', fecha=resultado['fecha'], segundos=round(resultado['segundos'], 6), errores=resultado['errores'])
+    evento('ejecucion', modo='por_fecha', analisis=claves, fechas=len(resumen['fechas']), fechas_sin_errores=exitosos,
+           procesos=resumen['procesos'], segundos=round(resumen['segundos'], 6))
+    
+    print()
+    print("📊 RESUMEN DE EJECUCIÓN")
+    print("=" * 60)
+    print(f"✅ Fechas procesadas sin errores: {exitosos}/{len(resumen['fechas'])} ({resumen['procesos']} procesos)")
+    print(f"⏱️ Tiempo total: {resumen['segundos']:.2f}s")
+    print("🧹 VALIDACIÓN DE ENTRADAS (filas excluidas al cargar):")
+    for informe in resumen['validacion'].values():
+        print(texto_informe(informe))
+        evento('validacion', **informe)
+
+def empaquetar_salida(claves, ruta_zip, nivel, formatos=()):
+    """Empaqueta en un ZIP los archivos de salida generados por los análisis indicados"""
+    archivos = [ruta_salida(nombre) for nombre in archivos_de_salida([ANALIZADORES[clave]['archivo'] for clave in claves], formatos)]
+    miembros = [(os.path.basename(archivo), archivo) for archivo in archivos if os.path.exists(archivo)]
+    tamano = escribir_zip(ruta_zip, miembros, nivel=nivel)
+    print(f"📦 ZIP generado: {ruta_zip} ({len(miembros)} archivos, {tamano:,} bytes)")
+
+def nomina_inferida(claves):
+    """
+    Nómina inferida del timeline para los análisis indicados (None si no leen el
+    timeline). El timeline se lee con las columnas de la ejecución, así queda en
+    la caché para los análisis.
+    """
+    columnas = columnas_de(claves)
+    if 'timeline' not in columnas:
+        return None
+    nomina = nomina_de_exportacion(df_timeline=leer_timeline(columnas=columnas['timeline']))
+    for clave, nombres in nomina.items():
+        etiqueta = 'excluidos' if clave == 'mda' else 'agentes'
+        print(f"👥 Nómina inferida {GRUPOS[clave]['nombre']}: {len(nombres)} {etiqueta}")
+    print()
+    return nomina
+
+def main(claves=None, por_fecha=False, procesos=None, ruta_zip=None, nivel_zip=NIVEL_POR_DEFECTO, formatos=(),
+         inferir_nomina=False, conciliar=False):
+    """
+    Función principal que ejecuta los análisis
+    
+    Args:
+        claves: análisis a ejecutar (claves de Planificador.ANALIZADORES, None = todos)
+        por_fecha: fragmentar las entradas por fecha y procesarlas en paralelo
+        procesos: procesos del pool en modo por fecha (None = núcleos disponibles)
+        ruta_zip: si se indica, empaqueta los archivos generados en ese ZIP
+        nivel_zip: nivel de compresión del ZIP (0-9)
+        formatos: formatos de salida adicionales al CSV ('parquet', 'arrow', 'jsonl', 'sqlite')
+        inferir_nomina: inferir la nómina de los grupos desde el timeline (NominaInferida.py)
+        conciliar: comparar los KPIs con los valores reportados por Genesys (Conciliacion.py)
+    """
+    claves = list(ANALIZADORES) if claves is None else list(claves)
+    
     print("🚀 EJECUTOR PRINCIPAL DE ANÁLISIS DE COLAS")
     print("=" * 60)
     print(f"⏰ Inicio: {datetime.now().strftime('%H:%M:%S')}")
+    if len(claves) < len(ANALIZADORES):
+        print(f"🎯 Análisis seleccionados: {', '.join(claves)}")
     print()
     
     # Verificar archivos de entrada
-    if not verificar_archivos_entrada():
+    if not verificar_archivos_entrada(claves):
         print("🛑 Ejecución cancelada debido a archivos faltantes")
         sys.exit(1)
     
     # Crear carpeta de salida
     crear_carpeta_salida()
     
-    # Lista de scripts a ejecutar
-    scripts = [
-        ("AnalisisMDA.py", "Análisis Mesa de Ayuda"),
-        ("AnalisisCentral.py", "Análisis Central Telefónica"),
-        ("AnalisisFraude.py", "Análisis Fraude"),
-        ("AnalisisFraudeSalida.py", "Análisis Fraude Salida"),
-        ("AnalisisServicios.py", "Análisis Servicios Administrativos"),
-        ("AnalisisRedes.py", "Análisis Redes Sociales")
-    ]
-    
-    # Ejecutar cada script
-    exitosos = 0
-    for script, descripcion in scripts:
-        if os.path.exists(script):
-            if ejecutar_script(script, descripcion):
-                exitosos += 1
-            else:
-                print(f"⚠️ Error en {script}, continuando con el siguiente...")
-        else:
-            print(f"❌ Script no encontrado: {script}")
-    
-    print("📊 RESUMEN DE EJECUCIÓN")
-    print("=" * 60)
-    print(f"✅ Scripts ejecutados exitosamente: {exitosos}/{len(scripts)}")
+    nomina = nomina_inferida(claves) if inferir_nomina else None
+    with formatos_salida(formatos), nomina_temporal(nomina):
+        ejecutar_y_resumir(claves, por_fecha, procesos, nomina)
     print(f"⏰ Finalización: {datetime.now().strftime('%H:%M:%S')}")
     print()
     
     # Verificar archivos generados
-    if verificar_archivos_salida():
+    if verificar_archivos_salida(claves):
         print("🎉 TODOS LOS ANÁLISIS COMPLETADOS EXITOSAMENTE")
         print("📁 Archivos generados en: ExportadosGenerados/")
     else:
         print("⚠️ Algunos archivos no se generaron correctamente")
     
+    if conciliar:
+        print()
+        conciliar_con_genesys(leer_detalle(columnas=COLUMNAS_CONCILIACION))
+    
+    if ruta_zip:
+        empaquetar_salida(claves, ruta_zip, nivel_zip, formatos)
+    
     print("=" * 60)
 
+def ejecutar_y_resumir(claves, por_fecha, procesos, nomina=None):
+    """
+    Ejecuta los análisis (en este proceso o por fecha) y muestra el resumen.
+    La nómina se pasa a los procesos por fecha, que no heredan la del proceso actual.
+    """
+    if por_fecha:
+        ejecutar_por_fechas(claves, procesos, nomina)
+    else:
+        # Ejecutar cada análisis; los artefactos comunes (detalle, timeline, KPIs,
+        # agentes por grupo) se calculan una sola vez y se comparten
+        ejecucion = nueva_ejecucion(claves)
+        exitosos = 0
+        for clave in claves:
+            if ejecutar_analisis(ejecucion, clave):
+                exitosos += 1
+            else:
+                print(f"⚠️ Error en {ANALIZADORES[clave]['modulo']}.py, continuando con el siguiente...")
+        
+        print("📊 RESUMEN DE EJECUCIÓN")
+        print("=" * 60)
+        print(f"✅ Análisis ejecutados exitosamente: {exitosos}/{len(claves)}")
+        print(reporte_tiempos(ejecucion))
+        evento('ejecucion', modo='secuencial', analisis=claves, exitosos=exitosos,
+               segundos=round(sum(resultado['segundos'] for resultado in ejecucion['analizadores'].values()), 6))
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ejecuta los análisis de colas")
+    parser.add_argument(
+        '--analisis', nargs='+', choices=list(ANALIZADORES), metavar='ANALISIS',
+        help=f"Análisis a ejecutar (por defecto todos): {', '.join(ANALIZADORES)}"
+    )
+    parser.add_argument('--por-fecha', action='store_true',
+                        help="Procesar cada fecha de la exportación en paralelo")
+    parser.add_argument('--procesos', type=int, help="Procesos del pool con --por-fecha (por defecto, núcleos disponibles)")
+    parser.add_argument('--formatos', nargs='+', default=[], choices=list(FORMATOS), metavar='FORMATO',
+                        help=f"Formatos de salida adicionales al CSV: {', '.join(FORMATOS)}")
+    parser.add_argument('--zip', help="Empaquetar además los archivos generados en este ZIP")
+    parser.add_argument('--nivel-zip', type=int, default=NIVEL_POR_DEFECTO, choices=range(10), metavar='0-9',
+                        help=f"Nivel de compresión del ZIP (por defecto {NIVEL_POR_DEFECTO})")
+    parser.add_argument('--nomina-inferida', action='store_true',
+                        help="Inferir la nómina de los grupos desde el timeline en lugar de las listas manuales")
+    parser.add_argument('--conciliar', action='store_true',
+                        help="Comparar los KPIs recalculados con los valores reportados por Genesys")
+    parser.add_argument('--registro', nargs='+', default=[], metavar='[MODULO=]NIVEL',
+                        help="Nivel de registro general o por módulo (DETALLE, INFO, WARNING, ERROR)")
+    parser.add_argument('--eventos', help="Agregar los eventos de la ejecución a este archivo JSON Lines")
+    args = parser.parse_args()
+    try:
+        nivel_general, niveles = interpretar_niveles(args.registro)
+        validar_formatos(args.formatos)
+    except ValueError as e:
+        parser.error(str(e))
+    configurar_registro(nivel_general, niveles, args.eventos)
+    main(args.analisis, args.por_fecha, args.procesos, args.zip, args.nivel_zip, args.formatos, args.nomina_inferida,
+         args.conciliar)
\ No newline at end of file
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+EMPAQUETADO DE RESULTADOS EN ZIP POR STREAMING
+==============================================
+Arma el ZIP de resultados escribiendo cada archivo por fragmentos: el CSV de un
+DataFrame se serializa por bloques de filas y un archivo en disco se lee por
+bloques, así la memoria usada depende del tamaño del fragmento y no del total
+de resultados (p.ej. un mes de intervalos por grupo).
+
+- Nivel de compresión configurable (0 = sin comprimir, 9 = máximo).
+- Compresión en paralelo por archivo (opcional): cada archivo se comprime en un
+  hilo (zlib libera el GIL) a un temporal que pasa a disco si crece, y luego se
+  copia al ZIP en orden.
+- Formato ZIP64 con descriptor de datos, legible por zipfile, 7-Zip, unzip y el
+  explorador de Windows, sin límite de 4 GB.
+
+Uso:
+    escribir_zip('Resultados.zip', [('Analisis.csv', df), ('Cubo.npz', 'ruta/Cubo.npz')])
+    python Empaquetado.py ExportadosGenerados Resultados.zip [--nivel 6] [--procesos 4]
+"""
+
+import argparse
+import os
+import struct
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+NIVEL_POR_DEFECTO = 6
+TAMANO_FRAGMENTO = 1024 * 1024
+FILAS_POR_FRAGMENTO = 10000
+
+_SIN_TAMANO = 0xFFFFFFFF
+_VERSION_ZIP64 = 45
+_BANDERAS = 0x0808  # bit 3: descriptor de datos tras el contenido; bit 11: nombres UTF-8
+
+
+def fragmentos_de(fuente, tamano_fragmento=TAMANO_FRAGMENTO, filas_por_fragmento=FILAS_POR_FRAGMENTO):
+    """
+    Bytes de una fuente, por fragmentos.
+
+    Args:
+        fuente: bytes, DataFrame (se escribe como CSV, sin índice), ruta de un
+                archivo o iterable de bytes
+    """
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        for inicio in range(0, len(fuente), tamano_fragmento):
+            yield bytes(fuente[inicio:inicio + tamano_fragmento])
+    elif isinstance(fuente, pd.DataFrame):
+        if len(fuente) == 0:
+            yield fuente.to_csv(index=False).encode('utf-8')
+        for inicio in range(0, len(fuente), filas_por_fragmento):
+            bloque = fuente.iloc[inicio:inicio + filas_por_fragmento]
+            yield bloque.to_csv(index=False, header=inicio == 0).encode('utf-8')
+    elif isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, 'rb') as archivo:
+            while True:
+                bloque = archivo.read(tamano_fragmento)
+                if not bloque:
+                    break
+                yield bloque
+    else:
+        yield from fuente
+
+
+def _fecha_dos(instante):
+    t = time.localtime(instante)
+    hora = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    fecha = ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return hora, fecha
+
+
+class EscritorZip:
+    """Escribe un ZIP64 en un archivo (o flujo) de destino, un miembro por vez"""
+
+    def __init__(self, destino, nivel=NIVEL_POR_DEFECTO):
+        self.destino = destino
+        self.nivel = nivel
+        self.metodo = 8 if nivel > 0 else 0
+        self.posicion = 0
+        self.miembros = []
+
+    def _escribir(self, datos):
+        self.destino.write(datos)
+        self.posicion += len(datos)
+
+    def _compresor(self):
+        return zlib.compressobj(self.nivel, zlib.DEFLATED, -15) if self.metodo else None
+
+    def comprimir(self, fragmentos, salida):
+        """Comprime los fragmentos en 'salida'; devuelve (crc, tamaño comprimido, tamaño original)"""
+        compresor = self._compresor()
+        crc = comprimido = original = 0
+        for fragmento in fragmentos:
+            crc = zlib.crc32(fragmento, crc)
+            original += len(fragmento)
+            datos = compresor.compress(fragmento) if compresor else fragmento
+            if datos:
+                salida.write(datos)
+                comprimido += len(datos)
+        if compresor:
+            datos = compresor.flush()
+            salida.write(datos)
+            comprimido += len(datos)
+        return crc, comprimido, original
+
+    def _encabezado_local(self, nombre_bytes, hora, fecha):
+        # Tamaños desconocidos al empezar: van en el descriptor de datos (ZIP64)
+        extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0)
+        return struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, _VERSION_ZIP64, _BANDERAS, self.metodo, hora, fecha,
+            0, _SIN_TAMANO, _SIN_TAMANO, len(nombre_bytes), len(extra)
+        ) + nombre_bytes + extra
+
+    def agregar(self, nombre, fragmentos=None, comprimido=None):
+        """
+        Agrega un miembro al ZIP.
+
+        Args:
+            fragmentos: iterable de bytes a comprimir mientras se escribe
+            comprimido: (archivo con los datos ya comprimidos, crc, tamaño comprimido,
+                         tamaño original), p.ej. de comprimir() en otro hilo
+        """
+        nombre_bytes = nombre.encode('utf-8')
+        hora, fecha = _fecha_dos(time.time())
+        desplazamiento = self.posicion
+        self._escribir(self._encabezado_local(nombre_bytes, hora, fecha))
+
+        if comprimido is None:
+            crc, tamano_comprimido, tamano_original = self.comprimir(fragmentos, self)
+        else:
+            archivo, crc, tamano_comprimido, tamano_original = comprimido
+            archivo.seek(0)
+            while True:
+                bloque = archivo.read(TAMANO_FRAGMENTO)
+                if not bloque:
+                    break
+                self._escribir(bloque)
+
+        self._escribir(struct.pack('<IIQQ', 0x08074b50, crc, tamano_comprimido, tamano_original))
+        self.miembros.append((nombre_bytes, hora, fecha, crc, tamano_comprimido, tamano_original, desplazamiento))
+
+    # Interfaz de archivo para comprimir() directo al destino
+    def write(self, datos):
+        self._escribir(datos)
+
+    def cerrar(self):
+        """Escribe el directorio central y los registros de fin ZIP64"""
+        inicio_directorio = self.posicion
+        for nombre_bytes, hora, fecha, crc, comprimido, original, desplazamiento in self.miembros:
+            extra = struct.pack('<HHQQQ', 0x0001, 24, original, comprimido, desplazamiento)
+            self._escribir(struct.pack(
+                '<IHHHHHHIIIHHHHHII', 0x02014b50, _VERSION_ZIP64, _VERSION_ZIP64, _BANDERAS, self.metodo,
+                hora, fecha, crc, _SIN_TAMANO, _SIN_TAMANO, len(nombre_bytes), len(extra), 0, 0, 0,
+                0o100644 << 16, _SIN_TAMANO
+            ) + nombre_bytes + extra)
+        tamano_directorio = self.posicion - inicio_directorio
+        fin_zip64 = self.posicion
+        cantidad = len(self.miembros)
+
+        self._escribir(struct.pack(
+            '<IQHHIIQQQQ', 0x06064b50, 44, _VERSION_ZIP64, _VERSION_ZIP64, 0, 0,
+            cantidad, cantidad, tamano_directorio, inicio_directorio
+        ))
+        self._escribir(struct.pack('<IIQI', 0x07064b50, 0, fin_zip64, 1))
+        self._escribir(struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, min(cantidad, 0xFFFF), min(cantidad, 0xFFFF),
+            min(tamano_directorio, _SIN_TAMANO), min(inicio_directorio, _SIN_TAMANO), 0
+        ))
+
+
+def escribir_zip(destino, miembros, nivel=NIVEL_POR_DEFECTO, procesos=1, tamano_fragmento=TAMANO_FRAGMENTO):
+    """
+    Escribe un ZIP con los miembros indicados, por fragmentos.
+
+    Args:
+        destino: ruta del ZIP o archivo binario abierto (p.ej. BytesIO)
+        miembros: iterable de (nombre dentro del ZIP, fuente); ver fragmentos_de()
+        nivel: nivel de compresión 0-9
+        procesos: hilos de compresión (1 = secuencial, directo al destino)
+
+    Returns:
+        int: bytes escritos
+    """
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as archivo:
+            return escribir_zip(archivo, miembros, nivel, procesos, tamano_fragmento)
+
+    escritor = EscritorZip(destino, nivel)
+    if procesos <= 1:
+        for nombre, fuente in miembros:
+            escritor.agregar(nombre, fragmentos_de(fuente, tamano_fragmento))
+    else:
+        def comprimir_miembro(fuente):
+            temporal = tempfile.SpooledTemporaryFile(max_size=tamano_fragmento)
+            return (temporal, *escritor.comprimir(fragmentos_de(fuente, tamano_fragmento), temporal))
+
+        with ThreadPoolExecutor(max_workers=procesos) as pool:
+            # Se envía por tandas para no acumular más temporales que hilos en curso
+            miembros = list(miembros)
+            for inicio in range(0, len(miembros), procesos):
+                tanda = miembros[inicio:inicio + procesos]
+                futuros = [pool.submit(comprimir_miembro, fuente) for _, fuente in tanda]
+                for (nombre, _), futuro in zip(tanda, futuros):
+                    comprimido = futuro.result()
+                    with comprimido[0]:
+                        escritor.agregar(nombre, comprimido=comprimido)
+
+    escritor.cerrar()
+    return escritor.posicion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Empaqueta una carpeta de resultados en un ZIP por streaming")
+    parser.add_argument('carpeta', help="Carpeta con los resultados (p.ej. ExportadosGenerados)")
+    parser.add_argument('zip', help="Archivo ZIP a generar")
+    parser.add_argument('--nivel', type=int, default=NIVEL_POR_DEFECTO, choices=range(10), metavar='0-9')
+    parser.add_argument('--procesos', type=int, default=1, help="Hilos de compresión en paralelo por archivo")
+    args = parser.parse_args()
+
+    miembros = []
+    for raiz, _, nombres in os.walk(args.carpeta):
+        for nombre in sorted(nombres):
+            ruta = os.path.join(raiz, nombre)
+            if os.path.abspath(ruta) != os.path.abspath(args.zip):
+                miembros.append((os.path.relpath(ruta, args.carpeta).replace(os.sep, '/'), ruta))
+
+    instante = time.perf_counter()
+    tamano = escribir_zip(args.zip, miembros, args.nivel, args.procesos)
+    print(f"📦 {args.zip}: {len(miembros)} archivos, {tamano:,} bytes en {time.perf_counter() - instante:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
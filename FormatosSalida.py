@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+FORMATOS ADICIONALES DE SALIDA
+==============================
+Escritores de las mismas tablas que los análisis guardan en CSV, para que las
+cargas posteriores (BI) no tengan que volver a parsear texto:
+
+- parquet: Apache Parquet (requiere pyarrow)
+- arrow:   Arrow IPC / Feather v2 (requiere pyarrow)
+- jsonl:   JSON Lines, un objeto por fila
+- sqlite:  una tabla por análisis en una sola base, insertada con executemany
+           por lotes dentro de una única transacción
+
+Los formatos se eligen por ejecución (CargaDatos.formatos_salida o --formatos en
+Ejecutar.py); el CSV se genera siempre. Cada escritor recibe un archivo binario
+(o una conexión SQLite) y no decide dónde se guarda: eso lo resuelve CargaDatos.
+"""
+
+import importlib.util
+import math
+import os
+
+import pandas as pd
+
+ARCHIVO_SQLITE = 'Analisis_Colas.sqlite'
+FILAS_POR_LOTE = 5000
+MENSAJE_PYARROW = "Los formatos 'parquet' y 'arrow' requieren pyarrow (pip install pyarrow)"
+
+
+def pyarrow_disponible():
+    """True si está instalado pyarrow (formatos 'parquet' y 'arrow')"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _requiere_pyarrow():
+    if not pyarrow_disponible():
+        raise ImportError(MENSAJE_PYARROW)
+
+
+def escribir_parquet(df, archivo):
+    """Escribe el DataFrame como Parquet en un archivo binario"""
+    _requiere_pyarrow()
+    df.to_parquet(archivo, index=False)
+
+
+def escribir_arrow(df, archivo):
+    """Escribe el DataFrame como archivo Arrow IPC en un archivo binario"""
+    _requiere_pyarrow()
+    import pyarrow as pa
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+
+
+def escribir_jsonl(df, archivo):
+    """Escribe el DataFrame como JSON Lines (utf-8) en un archivo binario"""
+    archivo.write(df.to_json(orient='records', lines=True, force_ascii=False).encode('utf-8'))
+
+
+def _tipo_sqlite(serie):
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(serie):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _valor_sqlite(valor):
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)) or valor is pd.NA:
+        return None
+    if hasattr(valor, 'item'):  # escalares de numpy
+        return valor.item()
+    return valor
+
+
+def escribir_sqlite(df, tabla, conexion, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Reemplaza 'tabla' en la base con el contenido del DataFrame: crea la tabla con
+    tipos según el dtype de cada columna e inserta por lotes con executemany,
+    todo en una sola transacción.
+    """
+    columnas = ', '.join(f'"{columna}" {_tipo_sqlite(df[columna])}' for columna in df.columns)
+    marcadores = ', '.join('?' * len(df.columns))
+    filas = df.itertuples(index=False, name=None)
+
+    with conexion:
+        conexion.execute(f'DROP TABLE IF EXISTS "{tabla}"')
+        conexion.execute(f'CREATE TABLE "{tabla}" ({columnas})')
+        while True:
+            lote = [tuple(_valor_sqlite(valor) for valor in fila) for _, fila in zip(range(filas_por_lote), filas)]
+            if not lote:
+                break
+            conexion.executemany(f'INSERT INTO "{tabla}" VALUES ({marcadores})', lote)
+
+
+# Formato: (extensión del archivo, escritor a archivo binario); sqlite va aparte
+FORMATOS = {
+    'parquet': ('.parquet', escribir_parquet),
+    'arrow': ('.arrow', escribir_arrow),
+    'jsonl': ('.jsonl', escribir_jsonl),
+    'sqlite': ('.sqlite', None),
+}
+
+
+def archivos_de_salida(archivos_csv, formatos=()):
+    """Nombres de los archivos que se generan para esos CSV en los formatos dados (CSV incluido)"""
+    nombres = []
+    for nombre in archivos_csv:
+        nombres.append(nombre)
+        nombres.extend(os.path.splitext(nombre)[0] + FORMATOS[formato][0]
+                       for formato in formatos if formato != 'sqlite')
+    if 'sqlite' in formatos:
+        nombres.append(ARCHIVO_SQLITE)
+    return nombres
+
+
+def validar_formatos(formatos):
+    """Verifica que los formatos existan y que estén sus dependencias; devuelve la tupla"""
+    formatos = tuple(formato for formato in dict.fromkeys(formatos) if formato != 'csv')
+    desconocidos = [formato for formato in formatos if formato not in FORMATOS]
+    if desconocidos:
+        raise ValueError(f"Formatos desconocidos: {', '.join(desconocidos)} (disponibles: csv, {', '.join(FORMATOS)})")
+    # ValueError como el resto de los errores de configuración (servidor, lotes, CLI)
+    if {'parquet', 'arrow'} & set(formatos) and not pyarrow_disponible():
+        raise ValueError(MENSAJE_PYARROW)
+    return formatos
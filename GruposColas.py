@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+GRUPOS DE COLAS - DEFINICIÓN CENTRALIZADA
+=========================================
+Define en un solo lugar qué colas del detalle de rendimiento y qué agentes del
+timeline pertenecen a cada grupo analizado (Mesa de Ayuda, Central, Fraude,
+Fraude Salida, Servicios Administrativos y Redes Sociales).
+
+Los analizadores y el cubo de estados usan estas definiciones para que los
+conteos de agentes sean consistentes entre módulos.
+"""
+
+import contextlib
+import re
+
+import pandas as pd
+
+# Agentes excluidos del conteo de Mesa de Ayuda (redes, servicios, central)
+AGENTES_EXCLUIDOS_MDA = [
+    "A365_0301_Carlos_Tume",
+    "A365_0302_Victoria_Vargas",
+    "A365_0304_Yasmin_Sanchez",
+    "A365_0314_Jorge_Dominguez",
+    "A365_0316_Anthony_Zurita",
+    "A365_0317_Milagros_Reyes",
+    "A365_0318_Bryan_Ramos",
+    "A365_0311_Adrian_Calderon",
+    "A365_0315_Roberto_Ojeda",
+    "A365_0319_Enzo_Chavez",
+    'AG0188 ELIZABETH RADA',
+    'AG0185 GEOVANNA CHU',
+    'AG0184 KARINA SOLSOL',
+    'AG0181 - Soledad Garcia',
+    "A365 0303 Sandro Zapata",
+    "Servicios Generales - Ayllin Mori",
+    "AG0179 Luis Acosta"
+]
+
+# Agentes específicos de Central Telefónica
+AGENTES_CENTRAL = [
+    'AG0188 ELIZABETH RADA',
+    'AG0185 GEOVANNA CHU',
+    'AG0184 KARINA SOLSOL',
+    'AG0179 Luis Acosta',
+    'AG0186 CLAUDIA ALCARAZO',
+    #'AG0181 - Soledad Garcia'
+]
+
+# Agentes específicos de Servicios Administrativos
+AGENTES_SERVICIOS = [
+    "Servicios Generales - Ayllin Mori",
+    #"AG0179 Luis Acosta"
+    "AG0181 - Soledad Garcia"
+]
+
+# Agentes específicos de Redes Sociales
+AGENTES_REDES = [
+    'A365 0303 Sandro Zapata',
+    'AG0006 XIOMARA ACUÑA',
+    'A365_0301_Carlos_Tume',
+    'A365_0304_Yasmin_Sanchez',
+    'AG0240 MARIA ALCANTARA',
+    'A365_0307_Patricia_Chaupis',
+    'A365_0308_Adriana_Donayre',
+    'A365_0306_Alfredo_Quispe',
+    'A365_0309_Allisson_Peña',
+    'A365_0310_Jadira_Shareba'
+]
+
+# Colas de Mesa de Ayuda - Lista específica de 26 colas
+COLAS_MESA_AYUDA = [
+    'A_MA Total',
+    'CI_Banca_Movil',
+    'CI_Multired_Victual',
+    'CI_Otras_Consultas',
+    'CI_Pagalo',
+    'Cl_ATM',
+    'MA_ActualizarDatos',
+    'MA_Agente_Corresponsal',
+    'MA_Banca Internet',
+    'MA_Banca Platino',
+    'MA_BloqueoCredito',
+    'MA_BloqueoDebito',
+    'MA_Credito',
+    'MA_Cronograma',
+    'MA_CuentaAhorros',
+    'MA_CuentaCorriente',
+    'MA_Cuenta_DNI',
+    'MA_Debito',
+    'MA_Depositos',
+    'MA_Giros',
+    'MA_Onp',
+    'MA_Otros_Tramites',
+    'MA_PagaloPe',
+    'MA_Prestamos',
+    'MA_Reclamos',
+    'MA_Tasas'
+]
+
+COLAS_REDES = ['rs_facebook', 'rs_facebook_muro', 'rs_instagram', 'rs_instagram_muro', 'rs_youtube']
+
+# Definición de cada grupo:
+# - colas: nombres de cola en "Detalle del rendimiento de colas.csv"
+# - division: texto buscado (sin distinguir mayúsculas) en 'Nombre de la división'
+# - agentes: nombres (coincidencia parcial) en 'Nombre del agente'
+# - agentes_excluidos: nombres (coincidencia parcial) que no cuentan para el grupo
+# - division_nomina: división de los agentes del grupo para inferir la nómina
+#   (NominaInferida.py) cuando el grupo se define por lista y no por división
+GRUPOS = {
+    'mda': {
+        'nombre': 'Mesa de Ayuda',
+        'colas': COLAS_MESA_AYUDA,
+        'division': 'supervisor_ma',
+        'agentes_excluidos': AGENTES_EXCLUIDOS_MDA,
+    },
+    'central': {
+        'nombre': 'Central Telefónica',
+        'colas': ['Central Telefonica'],
+        'agentes': AGENTES_CENTRAL,
+        'division_nomina': 'monitor_ct',
+    },
+    'fraude': {
+        'nombre': 'Fraude',
+        'colas': ['Fraude', 'Fraude_MA'],
+        'division': 'supervisor_fr',
+    },
+    'fraude_salida': {
+        'nombre': 'Fraude Salida',
+        'colas': ['Fraude Salida'],
+    },
+    'servicios': {
+        'nombre': 'Servicios Administrativos',
+        'colas': ['Srv_administrativos'],
+        'agentes': AGENTES_SERVICIOS,
+    },
+    'redes': {
+        'nombre': 'Redes Sociales',
+        'colas': COLAS_REDES,
+        'agentes': AGENTES_REDES,
+        'division_nomina': 'monitor_rrss',
+    },
+}
+
+
+def _patron_nombres(nombres):
+    """Construye una expresión regular que encuentra cualquiera de los nombres como subcadena"""
+    return '|'.join(re.escape(nombre) for nombre in nombres)
+
+
+def mascara_nombres(nombres_agente, nombres):
+    """
+    Máscara booleana (Series) de los registros cuyo 'Nombre del agente' contiene
+    alguno de los nombres. La búsqueda se hace una vez por agente distinto y se
+    expande a los registros, en lugar de recorrer cada fila.
+    """
+    if not nombres:
+        return pd.Series(False, index=nombres_agente.index)
+    codigos, unicos = pd.factorize(nombres_agente.astype(str))
+    coincide = pd.Series(unicos).str.contains(_patron_nombres(nombres), regex=True).to_numpy()
+    return pd.Series(coincide[codigos], index=nombres_agente.index)
+
+
+def grupo_tiene_agentes(clave_grupo):
+    """Indica si el grupo define agentes en el timeline (por división o por lista)"""
+    definicion = GRUPOS[clave_grupo]
+    return bool(definicion.get('division') or definicion.get('agentes'))
+
+
+def mascara_agentes_grupo(nombres_agente, divisiones, clave_grupo):
+    """
+    Devuelve una máscara booleana (Series) con los agentes que pertenecen al grupo.
+
+    Args:
+        nombres_agente: Series con 'Nombre del agente'
+        divisiones: Series con 'Nombre de la división' (mismo índice)
+        clave_grupo: clave en GRUPOS ('mda', 'central', ...)
+    """
+    definicion = GRUPOS[clave_grupo]
+    nombres = nombres_agente.astype(str)
+    mascara = pd.Series(True, index=nombres_agente.index)
+
+    if not grupo_tiene_agentes(clave_grupo):
+        return ~mascara
+
+    if definicion.get('division'):
+        mascara &= divisiones.str.contains(definicion['division'], case=False, na=False)
+
+    if definicion.get('agentes'):
+        mascara &= mascara_nombres(nombres, definicion['agentes'])
+
+    if definicion.get('agentes_excluidos'):
+        mascara &= ~mascara_nombres(nombres, definicion['agentes_excluidos'])
+
+    return mascara
+
+
+def grupo_de_cola():
+    """Devuelve un diccionario {nombre de cola: clave de grupo}"""
+    return {cola: clave for clave, definicion in GRUPOS.items() for cola in definicion['colas']}
+
+
+def lista_nomina(clave_grupo):
+    """
+    Lista de agentes que define la nómina del grupo ('agentes' o 'agentes_excluidos'),
+    aunque esté vacía; None si el grupo no define nómina
+    """
+    definicion = GRUPOS[clave_grupo]
+    for campo in ('agentes', 'agentes_excluidos'):
+        if campo in definicion:
+            return definicion[campo]
+    return None
+
+
+@contextlib.contextmanager
+def nomina_temporal(agentes):
+    """
+    Reemplaza en el lugar las listas de agentes de los grupos indicados y las
+    restaura al terminar (los análisis importan las listas por nombre).
+
+    Args:
+        agentes: {clave de grupo: [nombres]} (None = sin cambios)
+    """
+    # Lista original (el mismo objeto) y su contenido, para restaurarla aunque la
+    # nómina temporal esté vacía o el bloque falle
+    originales = []
+    try:
+        for clave_grupo, nombres in (agentes or {}).items():
+            lista = lista_nomina(clave_grupo)
+            if lista is None:
+                raise ValueError(f"El grupo '{clave_grupo}' no define agentes")
+            originales.append((lista, list(lista)))
+            lista[:] = nombres
+        yield
+    finally:
+        for lista, nombres in reversed(originales):
+            lista[:] = nombres
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+ÍNDICE DE COLAS DEL DETALLE DE RENDIMIENTO
+==========================================
+El detalle de rendimiento mezcla filas por cola con filas consolidadas, cuyo
+'Nombre de cola' e 'ID de cola' son listas separadas por ';' (una fila por
+intervalo con el total de varias colas). El índice se arma una sola vez al
+cargar el detalle:
+
+- cada cola recibe un código entero (catálogo nombre -> código) y cada ID de
+  cola se asocia a su código (tabla hash ID -> código), así las filas sin
+  nombre pero con ID también se reconocen
+- cada fila queda marcada como atómica (código de su cola) o consolidada
+  (código -1 y el conjunto de colas que suma); las listas se separan una vez
+  por valor distinto, no por fila
+- cada código de cola tiene su grupo de GruposColas
+
+Los análisis filtran comparando códigos enteros (mascara_colas, mascara_grupo)
+en lugar de comparar textos fila por fila; las filas consolidadas solo las usa
+Conciliacion.py, como referencia de los totales recalculados.
+
+Uso:
+    indice = indexar_colas(leer_detalle())
+    df_mda = df_detalle[mascara_grupo(indice, 'mda')]
+"""
+
+import numpy as np
+import pandas as pd
+
+from GruposColas import GRUPOS, grupo_de_cola
+
+SEPARADOR = ';'
+
+
+def _partes(texto):
+    return [parte.strip() for parte in str(texto).split(SEPARADOR)]
+
+
+def indexar_colas(df_detalle):
+    """
+    Arma el índice de colas de un detalle de rendimiento.
+
+    Returns:
+        dict: 'colas' (nombre de cada código), 'codigos' {nombre: código},
+              'por_id' {ID de cola: código}, 'codigo_cola' (código por fila, -1
+              en las consolidadas y en las que no se pudieron identificar),
+              'consolidada' (bool por fila), 'conjunto' (número de conjunto por
+              fila, -1 en las atómicas), 'conjuntos' (códigos de las colas de
+              cada conjunto), 'grupos' (claves de GRUPOS) y 'grupo_de_codigo'
+              (posición en 'grupos' de cada código, -1 sin grupo)
+    """
+    nombres = df_detalle['Nombre de cola']
+    ids = df_detalle['ID de cola'] if 'ID de cola' in df_detalle.columns else pd.Series(np.nan, index=df_detalle.index)
+
+    # Un valor distinto por combinación (nombre, ID): el detalle repite las mismas colas en cada intervalo
+    codigos_fila, combinaciones = pd.factorize(pd.MultiIndex.from_arrays([nombres, ids]))
+    codigos = {}
+    por_id = {}
+    conjuntos = []
+    conjunto_de_combinacion = np.full(len(combinaciones), -1, dtype=np.int64)
+    cola_de_combinacion = np.full(len(combinaciones), -1, dtype=np.int64)
+
+    def codigo_de(nombre):
+        if nombre not in codigos:
+            codigos[nombre] = len(codigos)
+        return codigos[nombre]
+
+    # Primero las filas atómicas, así los códigos siguen el orden de aparición de las colas
+    pendientes = []
+    for posicion, (nombre, id_cola) in enumerate(combinaciones):
+        nombre_valido = isinstance(nombre, str) and nombre.strip() != ''
+        id_valido = isinstance(id_cola, str) and id_cola.strip() != ''
+        if (nombre_valido and SEPARADOR in nombre) or (id_valido and SEPARADOR in id_cola):
+            pendientes.append(posicion)
+        elif nombre_valido:
+            cola_de_combinacion[posicion] = codigo_de(nombre.strip())
+            if id_valido:
+                por_id[id_cola.strip()] = cola_de_combinacion[posicion]
+
+    for posicion in pendientes:
+        nombre, id_cola = combinaciones[posicion]
+        nombres_conjunto = _partes(nombre) if isinstance(nombre, str) else []
+        ids_conjunto = _partes(id_cola) if isinstance(id_cola, str) else []
+        # Los IDs vienen en el mismo orden que los nombres
+        if len(ids_conjunto) == len(nombres_conjunto):
+            for nombre_cola, id_parte in zip(nombres_conjunto, ids_conjunto):
+                por_id.setdefault(id_parte, codigo_de(nombre_cola))
+        miembros = ([codigo_de(nombre_cola) for nombre_cola in nombres_conjunto] if nombres_conjunto
+                    else [por_id[id_parte] for id_parte in ids_conjunto if id_parte in por_id])
+        conjunto_de_combinacion[posicion] = len(conjuntos)
+        conjuntos.append(np.unique(np.array(miembros, dtype=np.int64)))
+
+    # Filas atómicas sin nombre: se identifican por su ID
+    for posicion, (nombre, id_cola) in enumerate(combinaciones):
+        if cola_de_combinacion[posicion] < 0 and conjunto_de_combinacion[posicion] < 0 and isinstance(id_cola, str):
+            cola_de_combinacion[posicion] = por_id.get(id_cola.strip(), -1)
+
+    colas = list(codigos)
+    grupos = list(GRUPOS)
+    grupo_por_cola = grupo_de_cola()
+    grupo_de_codigo = np.array(
+        [grupos.index(grupo_por_cola[cola]) if cola in grupo_por_cola else -1 for cola in colas], dtype=np.int64
+    )
+
+    sin_valor = codigos_fila < 0  # nombre e ID vacíos
+    codigo_cola = np.where(sin_valor, -1, cola_de_combinacion[codigos_fila])
+    conjunto = np.where(sin_valor, -1, conjunto_de_combinacion[codigos_fila])
+    return {
+        'colas': colas,
+        'codigos': codigos,
+        'por_id': por_id,
+        'codigo_cola': codigo_cola,
+        'consolidada': conjunto >= 0,
+        'conjunto': conjunto,
+        'conjuntos': conjuntos,
+        'grupos': grupos,
+        'grupo_de_codigo': grupo_de_codigo,
+    }
+
+
+def codigos_de(indice, colas):
+    """Códigos de las colas indicadas (las que no están en el detalle se ignoran)"""
+    return np.array([indice['codigos'][cola] for cola in colas if cola in indice['codigos']], dtype=np.int64)
+
+
+def _tabla(indice, codigos):
+    """Tabla de búsqueda por código; la última posición (código -1) siempre es False"""
+    tabla = np.zeros(len(indice['colas']) + 1, dtype=bool)
+    tabla[codigos] = True
+    return tabla
+
+
+def mascara_colas(indice, colas):
+    """Máscara (por fila) de las filas atómicas de las colas indicadas"""
+    return _tabla(indice, codigos_de(indice, colas))[indice['codigo_cola']]
+
+
+def mascara_grupo(indice, clave_grupo):
+    """Máscara (por fila) de las filas atómicas de las colas del grupo"""
+    codigos = np.flatnonzero(indice['grupo_de_codigo'] == indice['grupos'].index(clave_grupo))
+    return _tabla(indice, codigos)[indice['codigo_cola']]
+
+
+def grupo_por_fila(indice):
+    """Clave de grupo de cada fila atómica (None en consolidadas y colas sin grupo)"""
+    claves = np.array(indice['grupos'] + [None], dtype=object)
+    grupo = np.append(indice['grupo_de_codigo'], -1)[indice['codigo_cola']]
+    return claves[grupo]
+
+
+def nombre_de_id(indice, id_cola):
+    """Nombre de la cola con ese ID (None si no aparece en el detalle)"""
+    codigo = indice['por_id'].get(str(id_cola).strip())
+    return None if codigo is None else indice['colas'][codigo]
+
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+ÍNDICE DE ESTADOS DE AGENTES POR INTERVALOS DE TIEMPO
+=====================================================
+Índice en memoria sobre "Resumen de línea de tiempo de estado de agente.csv",
+construido una sola vez después de resolver el fin de los registros abiertos
+(mismo criterio que los análisis, Analisis_timeline_comun.registros_resueltos), para
+responder sin recorrer el timeline:
+
+- quién estaba en un estado en un instante ("agentes de Supervisor_FR 'En la
+  cola' a las 14:07"): consulta puntual
+- quién estuvo en un estado en algún momento de un rango ("conectados entre
+  02:00 y 03:00"): consulta de solapamiento
+
+Estructura: árbol de intervalos centrado y estático. Cada nodo guarda los
+registros que contienen su centro ordenados por inicio y por fin, así que una
+consulta puntual baja O(log n) nodos y en cada uno toma un prefijo o sufijo con
+searchsorted: O(log n + k). El solapamiento con [desde, hasta) es la consulta
+puntual en 'desde' más los registros que empiezan dentro del rango (tramo
+contiguo del arreglo de inicios ordenados).
+
+Los registros se toman como [inicio, fin). Los abiertos que no se pudieron
+resolver llegan hasta el fin del día en que empiezan, como en los análisis.
+La clase también sirve sobre otros segundos: el conteo de agentes por intervalo
+(Analisis_timeline_comun.contar_agentes_por_intervalo) arma el índice sobre los
+turnos del día objetivo y consulta el solapamiento de cada intervalo.
+
+Uso:
+    indice = construir_indice_estados(leer_timeline())
+    indice.en_instante('14:07', estados=['En la cola'], division='Supervisor_FR')
+    indice.en_rango('02:00', '03:00', estados=['Desconectado'], excluir_estados=True)
+
+    python IndiceEstados.py --instante 14:07 --estado "En la cola" --division Supervisor_FR
+    python IndiceEstados.py --desde 02:00 --hasta 03:00 --estado Desconectado --excluir-estado
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from Analisis_timeline_comun import FORMATO_HORA_TIMELINE, detectar_fecha_timeline, registros_resueltos
+from CargaDatos import leer_timeline
+
+_EPOCA = pd.Timestamp('1970-01-01')
+
+# Columnas descriptivas que se conservan de cada registro
+COLUMNAS_REGISTRO = ['Nombre del agente', 'Nombre de la división', 'Estado principal', 'Estado secundario']
+
+# Posiciones dentro de cada nodo del árbol
+_CENTRO, _IZQUIERDA, _DERECHA, _IDS_POR_INICIO, _INICIOS, _IDS_POR_FIN, _FINES = range(7)
+
+
+def _segundos(instante, fecha_base=None):
+    """
+    Segundos desde 1970-01-01 de un instante: Timestamp/datetime, texto del
+    timeline ('dd/mm/yy HH:MM[:SS]') u hora 'HH:MM[:SS]' de fecha_base.
+    """
+    if isinstance(instante, str):
+        texto = instante.strip()
+        for formato in (FORMATO_HORA_TIMELINE, '%d/%m/%y %H:%M'):
+            try:
+                return int((pd.to_datetime(texto, format=formato) - _EPOCA).total_seconds())
+            except ValueError:
+                pass
+        if len(texto) <= 8 and ':' in texto:
+            if fecha_base is None:
+                raise ValueError(f"Hora sin fecha y el índice no tiene fecha base: {instante}")
+            return int((fecha_base + pd.Timedelta(texto if texto.count(':') == 2 else texto + ':00')
+                        - _EPOCA).total_seconds())
+    return int((pd.Timestamp(instante) - _EPOCA).total_seconds())
+
+
+class IndiceEstados:
+    """Árbol de intervalos estático sobre los registros resueltos del timeline"""
+
+    __slots__ = ('registros', 'inicios', 'fines', 'fecha_base', '_inicios_ordenados', '_por_inicio', '_nodos')
+
+    def __init__(self, registros, inicios, fines, fecha_base=None):
+        """
+        Args:
+            registros: DataFrame con una fila por registro (columnas descriptivas)
+            inicios, fines: segundos desde 1970-01-01 de cada registro, [inicio, fin)
+            fecha_base: fecha (Timestamp) de las horas 'HH:MM' en las consultas
+        """
+        self.registros = registros.reset_index(drop=True)
+        self.inicios = np.asarray(inicios, dtype=np.int64)
+        self.fines = np.asarray(fines, dtype=np.int64)
+        self.fecha_base = fecha_base
+        self._por_inicio = np.argsort(self.inicios, kind='stable')
+        self._inicios_ordenados = self.inicios[self._por_inicio]
+        self._nodos = self._construir(np.flatnonzero(self.fines > self.inicios))
+
+    def _construir(self, ids):
+        """
+        Nodos del árbol (el primero es la raíz). El centro de cada nodo es la
+        mediana de los inicios, así cada nodo contiene al menos un registro y
+        cada hijo a lo sumo la mitad: profundidad O(log n).
+        """
+        nodos = []
+        pendientes = [(ids, -1, None)] if len(ids) else []
+        while pendientes:
+            ids, padre, lado = pendientes.pop()
+            inicios = self.inicios[ids]
+            fines = self.fines[ids]
+            centro = np.partition(inicios, len(inicios) // 2)[len(inicios) // 2]
+
+            contiene = (inicios <= centro) & (fines > centro)
+            propios = ids[contiene]
+            por_inicio = propios[np.argsort(inicios[contiene], kind='stable')]
+            por_fin = propios[np.argsort(fines[contiene], kind='stable')]
+
+            numero = len(nodos)
+            nodos.append([centro, -1, -1, por_inicio, self.inicios[por_inicio], por_fin, self.fines[por_fin]])
+            if padre >= 0:
+                nodos[padre][lado] = numero
+
+            izquierda = ids[fines <= centro]
+            derecha = ids[inicios > centro]
+            if len(izquierda):
+                pendientes.append((izquierda, numero, _IZQUIERDA))
+            if len(derecha):
+                pendientes.append((derecha, numero, _DERECHA))
+        return nodos
+
+    def __len__(self):
+        return len(self.registros)
+
+    def _ids_en_instante(self, segundo):
+        partes = []
+        numero = 0 if self._nodos else -1
+        while numero >= 0:
+            nodo = self._nodos[numero]
+            if segundo < nodo[_CENTRO]:
+                # Todos terminan después del centro: basta con que hayan empezado
+                partes.append(nodo[_IDS_POR_INICIO][:np.searchsorted(nodo[_INICIOS], segundo, side='right')])
+                numero = nodo[_IZQUIERDA]
+            else:
+                # Todos empezaron antes del centro: basta con que no hayan terminado
+                partes.append(nodo[_IDS_POR_FIN][np.searchsorted(nodo[_FINES], segundo, side='right'):])
+                numero = nodo[_DERECHA]
+        return np.concatenate(partes) if partes else np.array([], dtype=np.int64)
+
+    def _ids_en_rango(self, desde, hasta):
+        dentro = self._por_inicio[
+            np.searchsorted(self._inicios_ordenados, desde, side='right'):
+            np.searchsorted(self._inicios_ordenados, hasta, side='left')
+        ]
+        dentro = dentro[self.fines[dentro] > self.inicios[dentro]]
+        return np.concatenate((self._ids_en_instante(desde), dentro))
+
+    def _resultado(self, ids, estados=None, excluir_estados=False, division=None, agentes=None):
+        """Filas de los registros indicados, filtradas y en orden de agente e inicio"""
+        ids = np.unique(ids)
+        filas = self.registros.iloc[ids]
+        mascara = np.ones(len(filas), dtype=bool)
+        if estados is not None:
+            mascara &= filas['Estado principal'].isin(list(estados)).to_numpy() != excluir_estados
+        if division is not None and 'Nombre de la división' in filas.columns:
+            mascara &= filas['Nombre de la división'].str.contains(division, case=False, na=False, regex=False).to_numpy()
+        if agentes is not None:
+            mascara &= filas['Nombre del agente'].isin(list(agentes)).to_numpy()
+
+        ids = ids[mascara]
+        resultado = filas[mascara].assign(
+            Inicio=_EPOCA + pd.to_timedelta(self.inicios[ids], unit='s'),
+            Fin=_EPOCA + pd.to_timedelta(self.fines[ids], unit='s'),
+        )
+        return resultado.sort_values(['Nombre del agente', 'Inicio'], kind='mergesort')
+
+    def posiciones_en_rango(self, desde, hasta):
+        """Posiciones de los registros que se solapan con [desde, hasta), en segundos del índice, sin repetir"""
+        return self._ids_en_rango(desde, hasta)
+
+    def en_instante(self, instante, **filtros):
+        """
+        Registros vigentes en un instante (inicio <= instante < fin).
+
+        Args:
+            instante: Timestamp, 'dd/mm/yy HH:MM[:SS]' u 'HH:MM[:SS]' del día del timeline
+            filtros: estados (lista de 'Estado principal'), excluir_estados (los
+                     estados indicados se excluyen en lugar de incluirse),
+                     division (contiene, sin distinguir mayúsculas), agentes (lista)
+
+        Returns:
+            DataFrame: columnas del registro más 'Inicio' y 'Fin'
+        """
+        return self._resultado(self._ids_en_instante(_segundos(instante, self.fecha_base)), **filtros)
+
+    def en_rango(self, desde, hasta, **filtros):
+        """Registros que se solapan con [desde, hasta) (mismos filtros que en_instante)"""
+        return self._resultado(
+            self._ids_en_rango(_segundos(desde, self.fecha_base), _segundos(hasta, self.fecha_base)), **filtros
+        )
+
+    def agentes_en_instante(self, instante, **filtros):
+        """Nombres de los agentes con algún registro vigente en el instante"""
+        return sorted(self.en_instante(instante, **filtros)['Nombre del agente'].unique())
+
+    def agentes_en_rango(self, desde, hasta, **filtros):
+        """Nombres de los agentes con algún registro que se solapa con [desde, hasta)"""
+        return sorted(self.en_rango(desde, hasta, **filtros)['Nombre del agente'].unique())
+
+
+def construir_indice_estados(df_timeline):
+    """
+    Resuelve el fin de los registros abiertos del timeline y arma el índice.
+    No se compacta el timeline para conservar el 'Estado secundario' de cada registro.
+
+    Returns:
+        IndiceEstados
+    """
+    posiciones, inicio, fin = registros_resueltos(df_timeline)
+    columnas = [columna for columna in COLUMNAS_REGISTRO if columna in df_timeline.columns]
+
+    fecha = detectar_fecha_timeline(df_timeline)
+    return IndiceEstados(
+        df_timeline[columnas].iloc[posiciones],
+        inicio,
+        fin,
+        pd.to_datetime(fecha, format='%d/%m/%Y') if fecha else None,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas de estados de agentes por instante o rango")
+    parser.add_argument('--timeline', help="Ruta del timeline (por defecto la configurada en CargaDatos)")
+    parser.add_argument('--instante', help="Instante a consultar ('HH:MM' del día del timeline o 'dd/mm/yy HH:MM')")
+    parser.add_argument('--desde', help="Inicio del rango a consultar")
+    parser.add_argument('--hasta', help="Fin del rango a consultar")
+    parser.add_argument('--estado', nargs='+', help="Estados principales (p.ej. 'En la cola')")
+    parser.add_argument('--excluir-estado', action='store_true', help="Excluir los estados indicados en vez de filtrarlos")
+    parser.add_argument('--division', help="División (contiene, p.ej. Supervisor_FR)")
+    parser.add_argument('--agente', nargs='+', help="Nombres de agente")
+    args = parser.parse_args()
+    if not args.instante and not (args.desde and args.hasta):
+        parser.error("Indique --instante o --desde y --hasta")
+
+    instante = time.perf_counter()
+    indice = construir_indice_estados(leer_timeline(args.timeline))
+    print(f"🌳 Índice: {len(indice):,} registros en {time.perf_counter() - instante:.2f}s")
+
+    filtros = {'estados': args.estado, 'excluir_estados': args.excluir_estado,
+               'division': args.division, 'agentes': args.agente}
+    instante = time.perf_counter()
+    if args.instante:
+        resultado = indice.en_instante(args.instante, **filtros)
+    else:
+        resultado = indice.en_rango(args.desde, args.hasta, **filtros)
+    milisegundos = (time.perf_counter() - instante) * 1000
+
+    print(f"🔎 {resultado['Nombre del agente'].nunique()} agentes, {len(resultado)} registros ({milisegundos:.1f} ms)")
+    for _, fila in resultado.iterrows():
+        print(f"   👤 {fila['Nombre del agente']} | {fila['Estado principal']} | "
+              f"{fila['Inicio']:%d/%m %H:%M:%S} - {fila['Fin']:%d/%m %H:%M:%S}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+INGESTA DE DETALLE DE CONVERSACIONES - PERCENTILES POR INTERVALO
+================================================================
+Lee exportaciones por conversación (CSV, JSON Lines o JSON) en streaming,
+asigna cada conversación a la misma clave (fecha, intervalo de 30 minutos,
+grupo de colas) que usan los análisis y acumula sketches de cuantiles
+combinables, de modo que p50/p90/p99 de TMO y de espera (ASA) estén
+disponibles para millones de conversaciones con memoria acotada.
+
+El sketch usa cubetas logarítmicas (error relativo acotado, por defecto 1%):
+dos sketches de la misma precisión se combinan sumando cubetas, lo que permite
+procesar archivos por separado y unir los resultados después.
+
+Las horas con zona (p.ej. 'conversationStart' de la API, en UTC) se pasan a la
+zona horaria de las exportaciones de Genesys antes de asignar el intervalo, así
+las claves coinciden con las de los análisis; por defecto es la del sistema
+(--zona America/Lima para otra). Las horas sin zona se toman como locales.
+
+Uso:
+    python IngestaConversaciones.py archivo1.csv [archivo2.jsonl ...] [--unidad ms] [--zona America/Lima]
+
+Archivos de salida (ExportadosGenerados):
+- Analisis_Percentiles_Por_intervalos.csv
+- Sketches_Conversaciones.json (para combinar con otras ejecuciones)
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from dateutil import tz
+
+from GruposColas import GRUPOS, grupo_de_cola
+
+ARCHIVO_CONVERSACIONES = 'ExportadosGenesysprueba/Detalle de conversaciones.csv'
+
+TAMANO_BLOQUE = 100000
+
+# Nombres de columna aceptados para cada dato (se usa el primero presente)
+COLUMNAS_CONVERSACION = {
+    'inicio': ['Inicio de la conversación', 'Fecha de inicio', 'Fecha', 'conversationStart'],
+    'cola': ['Nombre de cola', 'Cola', 'queueName'],
+    'manejo': ['Manejo', 'Tiempo de manejo', 'Manejo total', 'tHandle'],
+    'espera': ['Espera', 'Tiempo en cola', 'Tiempo de respuesta', 'tAnswered'],
+}
+
+METRICAS_SKETCH = {'manejo': 'TMO', 'espera': 'Espera'}
+
+# Sufijo de zona en horas ISO ('Z', '+00:00', '-0500')
+_PATRON_ZONA = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+
+class SketchCuantiles:
+    """Sketch de cuantiles con cubetas logarítmicas, combinable y de tamaño acotado"""
+
+    __slots__ = ('precision', 'max_cubetas', '_log_gamma', 'cubetas', 'ceros', 'cantidad', 'suma')
+
+    def __init__(self, precision=0.01, max_cubetas=2048):
+        self.precision = precision
+        self.max_cubetas = max_cubetas
+        self._log_gamma = math.log((1 + precision) / (1 - precision))
+        self.cubetas = {}
+        self.ceros = 0
+        self.cantidad = 0
+        self.suma = 0.0
+
+    def indices_de(self, valores):
+        """Índice de cubeta de cada valor positivo (vectorizado)"""
+        return np.ceil(np.log(valores) / self._log_gamma).astype(np.int64)
+
+    def agregar(self, valor, cantidad=1):
+        """Agrega un valor (segundos) al sketch"""
+        if valor is None or math.isnan(valor):
+            return
+        if valor <= 0:
+            self.ceros += cantidad
+        else:
+            indice = int(math.ceil(math.log(valor) / self._log_gamma))
+            self.cubetas[indice] = self.cubetas.get(indice, 0) + cantidad
+        self.cantidad += cantidad
+        self.suma += max(valor, 0) * cantidad
+        self._colapsar()
+
+    def agregar_cubetas(self, indices, cantidades, ceros=0, suma=0.0):
+        """Agrega conteos ya agrupados por cubeta (ver indices_de)"""
+        for indice, cantidad in zip(indices, cantidades):
+            self.cubetas[indice] = self.cubetas.get(indice, 0) + int(cantidad)
+        self.ceros += int(ceros)
+        self.cantidad += int(sum(cantidades)) + int(ceros)
+        self.suma += float(suma)
+        self._colapsar()
+
+    def fusionar(self, otro):
+        """Combina otro sketch de la misma precisión en este"""
+        if otro.precision != self.precision:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión")
+        self.agregar_cubetas(list(otro.cubetas), list(otro.cubetas.values()), otro.ceros, otro.suma)
+        return self
+
+    def _colapsar(self):
+        """Une las cubetas más bajas si se supera max_cubetas (conserva precisión en la cola alta)"""
+        if len(self.cubetas) <= self.max_cubetas:
+            return
+        indices = sorted(self.cubetas)
+        sobrantes = indices[:len(indices) - self.max_cubetas + 1]
+        destino = sobrantes[-1]
+        self.cubetas[destino] = sum(self.cubetas.pop(indice) for indice in sobrantes)
+
+    def cuantil(self, q):
+        """Valor aproximado del cuantil q (0-1); None si el sketch está vacío"""
+        if self.cantidad == 0:
+            return None
+        rango = q * (self.cantidad - 1)
+        if rango < self.ceros:
+            return 0.0
+        acumulado = self.ceros
+        gamma = math.exp(self._log_gamma)
+        for indice in sorted(self.cubetas):
+            acumulado += self.cubetas[indice]
+            if acumulado > rango:
+                return 2 * gamma ** indice / (gamma + 1)
+        return 2 * gamma ** max(self.cubetas) / (gamma + 1)
+
+    def media(self):
+        """Media exacta de los valores agregados"""
+        return self.suma / self.cantidad if self.cantidad else None
+
+    def a_dict(self):
+        return {
+            'precision': self.precision,
+            'max_cubetas': self.max_cubetas,
+            'cubetas': {str(indice): cantidad for indice, cantidad in self.cubetas.items()},
+            'ceros': self.ceros,
+            'cantidad': self.cantidad,
+            'suma': self.suma,
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        sketch = cls(datos['precision'], datos.get('max_cubetas', 2048))
+        sketch.cubetas = {int(indice): cantidad for indice, cantidad in datos['cubetas'].items()}
+        sketch.ceros = datos['ceros']
+        sketch.cantidad = datos['cantidad']
+        sketch.suma = datos['suma']
+        return sketch
+
+
+def _leer_json_en_streaming(ruta, tamano_bloque):
+    """Lee un JSON (arreglo de objetos) incrementalmente, devolviendo DataFrames por bloque"""
+    decodificador = json.JSONDecoder()
+    pendiente = ''
+    registros = []
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        for trozo in iter(lambda: archivo.read(1 << 20), ''):
+            pendiente += trozo
+            posicion = 0
+            while True:
+                while posicion < len(pendiente) and pendiente[posicion] in ' \t\r\n,[]':
+                    posicion += 1
+                if posicion >= len(pendiente):
+                    break
+                try:
+                    objeto, posicion = decodificador.raw_decode(pendiente, posicion)
+                except json.JSONDecodeError:
+                    break  # objeto incompleto: esperar el siguiente trozo
+                registros.append(objeto)
+                if len(registros) >= tamano_bloque:
+                    yield pd.DataFrame(registros)
+                    registros = []
+            pendiente = pendiente[posicion:]
+    if registros:
+        yield pd.DataFrame(registros)
+
+
+def leer_conversaciones_por_bloques(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """Devuelve un iterador de DataFrames con las conversaciones del archivo (CSV, JSONL o JSON)"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return pd.read_json(ruta, lines=True, chunksize=tamano_bloque)
+    if extension == '.json':
+        return _leer_json_en_streaming(ruta, tamano_bloque)
+
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        encabezado = archivo.readline()
+    delimitador = ';' if encabezado.count(';') >= encabezado.count(',') else ','
+    return pd.read_csv(ruta, delimiter=delimitador, encoding='utf-8', chunksize=tamano_bloque)
+
+
+def _resolver_columnas(columnas_disponibles, columnas=None):
+    """Elige, para cada dato, la columna del archivo a usar"""
+    resueltas = {}
+    for dato, alternativas in COLUMNAS_CONVERSACION.items():
+        if columnas and dato in columnas:
+            resueltas[dato] = columnas[dato]
+            continue
+        resueltas[dato] = next((nombre for nombre in alternativas if nombre in columnas_disponibles), None)
+    faltantes = [dato for dato in ('inicio', 'cola') if resueltas[dato] is None]
+    if faltantes:
+        raise ValueError(f"Columnas obligatorias no encontradas: {faltantes}")
+    return resueltas
+
+
+def _a_segundos(serie, unidad):
+    """Convierte duraciones numéricas (s o ms) o 'HH:MM:SS' a segundos"""
+    valores = pd.to_numeric(serie, errors='coerce')
+    texto = valores.isna() & serie.notna()
+    if texto.any():
+        valores[texto] = pd.to_timedelta(serie[texto].astype(str), errors='coerce').dt.total_seconds()
+    return valores / 1000 if unidad == 'ms' else valores
+
+
+def _zona_horaria(zona=None):
+    """Zona IANA indicada ('America/Lima') o la del sistema (None)"""
+    return tz.tzlocal() if zona is None else zona
+
+
+def _a_fecha_hora(serie, zona=None):
+    """
+    Convierte fechas en formato Genesys (dd/mm/yy HH:MM:SS) o ISO a hora local sin
+    zona. Las ISO con zona se convierten a 'zona' (None = la del sistema).
+    """
+    fechas = pd.to_datetime(serie, format='%d/%m/%y %H:%M:%S', errors='coerce')
+    if fechas.isna().all() and serie.notna().any():
+        texto = serie.astype(str).str.strip()
+        con_zona = texto.str.contains(_PATRON_ZONA, na=False) & serie.notna()
+        # Cada subconjunto se parsea por separado y ambos se llevan a la misma
+        # unidad (ns) antes de combinarlos: con milisegundos pandas usa 'us'
+        fechas = pd.to_datetime(texto.where(~con_zona & serie.notna()), errors='coerce').astype('datetime64[ns]')
+        if con_zona.any():
+            convertidas = (pd.to_datetime(texto.where(con_zona), format='ISO8601', errors='coerce', utc=True)
+                           .dt.tz_convert(_zona_horaria(zona)).dt.tz_localize(None).astype('datetime64[ns]'))
+            fechas = convertidas.where(con_zona, fechas)
+    return fechas
+
+
+def acumular_conversaciones(rutas, columnas=None, unidad='s', precision=0.01, tamano_bloque=TAMANO_BLOQUE,
+                            sketches=None, zona=None):
+    """
+    Procesa en streaming uno o más archivos de conversaciones.
+
+    Args:
+        rutas: lista de archivos CSV / JSONL / JSON
+        columnas: dict opcional {'inicio', 'cola', 'manejo', 'espera'} -> nombre de columna
+        unidad: 's' o 'ms' para las duraciones numéricas
+        precision: error relativo de los sketches
+        sketches: acumulador previo a continuar (permite combinar ejecuciones)
+        zona: zona horaria IANA de los análisis para las horas ISO con zona
+              (None = la del sistema)
+
+    Returns:
+        tuple: (dict {(fecha, intervalo, grupo): {'TMO': SketchCuantiles, 'Espera': SketchCuantiles}},
+                dict con el resumen de la ingesta)
+    """
+    sketches = {} if sketches is None else sketches
+    mapa_grupos = grupo_de_cola()
+    resumen = {'conversaciones': 0, 'sin_grupo': 0, 'fecha_invalida': 0}
+    referencia = SketchCuantiles(precision)
+
+    for ruta in rutas:
+        for bloque in leer_conversaciones_por_bloques(ruta, tamano_bloque):
+            resueltas = _resolver_columnas(bloque.columns, columnas)
+            inicio = _a_fecha_hora(bloque[resueltas['inicio']], zona)
+            grupo = bloque[resueltas['cola']].map(mapa_grupos)
+
+            resumen['conversaciones'] += len(bloque)
+            resumen['fecha_invalida'] += int(inicio.isna().sum())
+            resumen['sin_grupo'] += int(grupo.isna().sum())
+
+            inicio_intervalo = inicio.dt.floor('30min')
+            datos = pd.DataFrame({
+                'fecha': inicio_intervalo.dt.strftime('%Y-%m-%d'),
+                'intervalo': inicio_intervalo.dt.strftime('%H:%M') + '-' +
+                             (inicio_intervalo + pd.Timedelta(minutes=30)).dt.strftime('%H:%M'),
+                'grupo': grupo,
+            })
+            validos = inicio.notna() & grupo.notna()
+
+            for dato, metrica in METRICAS_SKETCH.items():
+                if resueltas[dato] is None:
+                    continue
+                segundos = _a_segundos(bloque[resueltas[dato]], unidad)
+                con_valor = validos & segundos.notna()
+                if not con_valor.any():
+                    continue
+
+                parcial = datos[con_valor].copy()
+                valores = segundos[con_valor].to_numpy(dtype=float)
+                parcial['cubeta'] = np.where(valores > 0, referencia.indices_de(np.maximum(valores, 1e-12)), np.iinfo(np.int64).min)
+                parcial['valor'] = np.maximum(valores, 0)
+
+                # Una sola agrupación por bloque: conteo por (clave, cubeta) y suma por clave
+                conteos = parcial.groupby(['fecha', 'intervalo', 'grupo', 'cubeta']).size()
+                for (fecha, intervalo, clave_grupo), por_cubeta in conteos.groupby(level=[0, 1, 2]):
+                    cubetas = por_cubeta.index.get_level_values('cubeta')
+                    es_cero = cubetas == np.iinfo(np.int64).min
+                    sketch = sketches.setdefault((fecha, intervalo, clave_grupo), {}).setdefault(
+                        metrica, SketchCuantiles(precision)
+                    )
+                    sketch.agregar_cubetas(
+                        [int(indice) for indice in cubetas[~es_cero]],
+                        por_cubeta.to_numpy()[~es_cero],
+                        ceros=por_cubeta.to_numpy()[es_cero].sum(),
+                    )
+                sumas = parcial.groupby(['fecha', 'intervalo', 'grupo'])['valor'].sum()
+                for clave, suma in sumas.items():
+                    sketches[clave][metrica].suma += float(suma)
+
+    return sketches, resumen
+
+
+def percentiles_por_intervalo(sketches, percentiles=(50, 90, 99)):
+    """Tabla con conversaciones, media y percentiles de TMO y espera por (fecha, intervalo, grupo)"""
+    filas = []
+    for (fecha, intervalo, clave_grupo), por_metrica in sorted(sketches.items()):
+        fila = {
+            'Fecha': fecha,
+            'Intervalo': intervalo,
+            'Grupo': GRUPOS[clave_grupo]['nombre'] if clave_grupo in GRUPOS else clave_grupo,
+        }
+        for metrica in METRICAS_SKETCH.values():
+            sketch = por_metrica.get(metrica)
+            fila[f'{metrica}_Conversaciones'] = sketch.cantidad if sketch else 0
+            media = sketch.media() if sketch else None
+            fila[f'{metrica}_Medio_Segundos'] = round(media, 1) if media is not None else None
+            for percentil in percentiles:
+                valor = sketch.cuantil(percentil / 100) if sketch else None
+                fila[f'{metrica}_p{percentil}_Segundos'] = round(valor, 1) if valor is not None else None
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+
+def guardar_sketches(sketches, ruta):
+    """Guarda los sketches en JSON para combinarlos con ejecuciones posteriores"""
+    datos = [
+        {'fecha': fecha, 'intervalo': intervalo, 'grupo': grupo,
+         'metricas': {metrica: sketch.a_dict() for metrica, sketch in por_metrica.items()}}
+        for (fecha, intervalo, grupo), por_metrica in sketches.items()
+    ]
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo)
+
+
+def cargar_sketches(ruta):
+    """Carga sketches guardados con guardar_sketches()"""
+    with open(ruta, 'r', encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    return {
+        (item['fecha'], item['intervalo'], item['grupo']): {
+            metrica: SketchCuantiles.desde_dict(sketch) for metrica, sketch in item['metricas'].items()
+        }
+        for item in datos
+    }
+
+
+def fusionar_sketches(destino, origen):
+    """Combina dos acumuladores de sketches (p.ej. de distintos archivos o nodos)"""
+    for clave, por_metrica in origen.items():
+        for metrica, sketch in por_metrica.items():
+            if metrica in destino.setdefault(clave, {}):
+                destino[clave][metrica].fusionar(sketch)
+            else:
+                destino[clave][metrica] = sketch
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentiles de TMO y espera por intervalo desde el detalle de conversaciones")
+    parser.add_argument('archivos', nargs='*', default=[ARCHIVO_CONVERSACIONES])
+    parser.add_argument('--unidad', choices=['s', 'ms'], default='s', help="Unidad de las duraciones numéricas")
+    parser.add_argument('--precision', type=float, default=0.01, help="Error relativo de los percentiles")
+    parser.add_argument('--acumular', help="Sketches previos (JSON) a combinar con esta ingesta")
+    parser.add_argument('--zona', help="Zona horaria de los análisis para horas ISO con zona "
+                                       "(IANA, p.ej. America/Lima; por defecto la del sistema)")
+    args = parser.parse_args()
+
+    print("📞 INGESTA DE CONVERSACIONES - PERCENTILES")
+    print("=" * 40)
+
+    faltantes = [archivo for archivo in args.archivos if not os.path.exists(archivo)]
+    if faltantes:
+        print(f"❌ Archivos no encontrados: {faltantes}")
+        return
+
+    previos = cargar_sketches(args.acumular) if args.acumular else None
+    sketches, resumen = acumular_conversaciones(args.archivos, unidad=args.unidad,
+                                                precision=args.precision, sketches=previos, zona=args.zona)
+    print(f"✅ Conversaciones leídas: {resumen['conversaciones']:,}")
+    if resumen['sin_grupo'] or resumen['fecha_invalida']:
+        print(f"⚠️ Sin grupo: {resumen['sin_grupo']:,} | Fecha inválida: {resumen['fecha_invalida']:,}")
+
+    if not os.path.exists('ExportadosGenerados'):
+        os.makedirs('ExportadosGenerados')
+
+    df_resultado = percentiles_por_intervalo(sketches)
+    archivo_salida = 'ExportadosGenerados/Analisis_Percentiles_Por_intervalos.csv'
+    df_resultado.to_csv(archivo_salida, index=False, encoding='utf-8')
+    guardar_sketches(sketches, 'ExportadosGenerados/Sketches_Conversaciones.json')
+
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    print(f"📊 Total filas: {len(df_resultado)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+DEFINICIÓN DECLARATIVA DE KPIs DEL DETALLE DE COLAS
+===================================================
+Cada KPI se define una sola vez como numerador / denominador sobre "términos":
+columnas por fila derivadas del detalle de rendimiento de colas que se suman
+por (fecha, intervalo, grupo). El plan de cálculo reúne los términos de todos
+los KPIs pedidos y los resuelve en una única agregación agrupada, así que
+agregar KPIs o grupos no agrega pasadas sobre los datos. evaluar_kpi aplica
+las mismas definiciones a términos ya sumados (totales del centro, conciliación).
+
+Las variantes de TMO que usan los distintos análisis se conservan como KPIs
+separados para no cambiar sus resultados:
+- TMO_Manejadas: suma de 'Manejo total' / suma de llamadas manejadas
+  (Manejo total / Manejo medio), usado por Mesa de Ayuda y Fraude
+- TMO_Contestadas: 'Manejo total' / 'Contestadas' (Servicios)
+- TMO_Ponderado: 'Manejo medio' ponderado por 'Contestadas' (Redes)
+- TMO_Manejo_Medio: promedio de 'Manejo medio' por registro (Central)
+
+Paquete extendido (KPIS_EXTENDIDOS), en la misma agregación que los básicos:
+- ASA_Ponderado: 'Velocidad media de respuesta (ASA)' ponderada por 'Contestadas'
+- Tiempo_Abandono: 'Tiempo en abandonar' ponderado por 'Abandonadas'
+- Tasa_Transferencia: 'Transferir' / 'Contestadas' (como '% de transferencia' de Genesys)
+- Tiempo_Retencion / Proporcion_Retencion: 'Retención total' y su % del 'Manejo total'
+- Tiempo_ACW / Proporcion_ACW: 'Total de ACW' y su % del 'Manejo total'
+Las exportaciones sin esas columnas los dan en 0. Con por_medio=True la misma
+agregación separa además por 'Tipo de medios' (columna Medio).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from IndiceColas import grupo_por_fila, indexar_colas
+
+FORMATO_INTERVALO_DETALLE = '%d/%m/%y %H:%M'
+
+_PATRON_MINUTOS_SEGUNDOS = re.compile(r'^\s*(?:(\d+)\s*m)?\s*(?:(\d+)\s*s)?\s*$')
+
+
+def _numero(serie):
+    """Valor numérico de la columna (NaN e ilegibles como 0)"""
+    return pd.to_numeric(serie, errors='coerce').fillna(0)
+
+
+def _segundos(serie):
+    """Duración en segundos: numérica o en formato 'Xm Ys' (ilegibles como 0)"""
+    valores = pd.to_numeric(serie, errors='coerce')
+    texto = valores.isna() & serie.notna()
+    if texto.any():
+        partes = serie[texto].astype(str).str.extract(_PATRON_MINUTOS_SEGUNDOS)
+        valores[texto] = (pd.to_numeric(partes[0], errors='coerce').fillna(0) * 60 +
+                          pd.to_numeric(partes[1], errors='coerce').fillna(0))
+    return valores.fillna(0)
+
+
+def _opcional(df, columna):
+    """Columna del detalle o NaN si la exportación no la trae (paquete extendido)"""
+    return df[columna] if columna in df.columns else pd.Series(np.nan, index=df.index)
+
+
+def _ponderado(df, columna, peso):
+    """Promedio informado por fila x su peso (filas sin alguno de los dos como 0)"""
+    valor, base = _numero(_opcional(df, columna)), _numero(df[peso])
+    return (valor * base).where((valor > 0) & (base > 0), 0)
+
+
+def _con_manejo(df):
+    """Filas con 'Manejo total' y 'Manejo medio' positivos (base del TMO por llamadas manejadas)"""
+    return (_segundos(df['Manejo total']) > 0) & (_segundos(df['Manejo medio']) > 0)
+
+
+# Términos: expresión por fila sobre las columnas del detalle, se suman por clave
+TERMINOS = {
+    'registros': lambda df: pd.Series(1, index=df.index),
+    'oferta': lambda df: _numero(df['Oferta']),
+    'contestadas': lambda df: _numero(df['Contestadas']),
+    'abandonadas': lambda df: _numero(df['Abandonadas']),
+    'retenidas': lambda df: _numero(df['Retener']),
+    'cumplen_sla': lambda df: _numero(df['Cumplen el SLA']),
+    'contactando': lambda df: _numero(df['Contactando']),
+    'manejo_total': lambda df: _segundos(df['Manejo total']),
+    'manejo_medio': lambda df: _segundos(df['Manejo medio']),
+    'manejo_total_manejadas': lambda df: _segundos(df['Manejo total']).where(_con_manejo(df), 0),
+    'manejadas': lambda df: (_segundos(df['Manejo total']) / _segundos(df['Manejo medio'])).where(_con_manejo(df), 0),
+    'manejo_medio_x_contestadas': lambda df: (_segundos(df['Manejo medio']) * _numero(df['Contestadas'])).where(
+        (_segundos(df['Manejo medio']) > 0) & (_numero(df['Contestadas']) > 0), 0
+    ),
+    'asa_x_contestadas': lambda df: _ponderado(df, 'Velocidad media de respuesta (ASA)', 'Contestadas'),
+    'abandono_x_abandonadas': lambda df: _ponderado(df, 'Tiempo en abandonar', 'Abandonadas'),
+    'transferidas': lambda df: _numero(_opcional(df, 'Transferir')),
+    'retencion_total': lambda df: _segundos(_opcional(df, 'Retención total')),
+    'acw_total': lambda df: _segundos(_opcional(df, 'Total de ACW')),
+}
+
+# Columnas del detalle que leen los términos y las claves de intervalo/grupo
+COLUMNAS_DETALLE = [
+    'Nombre de cola', 'ID de cola', 'Inicio del intervalo', 'Oferta', 'Contestadas', 'Abandonadas',
+    'Retener', 'Cumplen el SLA', 'Contactando', 'Manejo total', 'Manejo medio',
+    'Tipo de medios', 'Velocidad media de respuesta (ASA)', 'Tiempo en abandonar', 'Transferir',
+    'Retención total', 'Total de ACW',
+]
+
+# KPIs: numerador / denominador (términos) x escala; sin denominador es la suma del numerador
+KPIS = {
+    'Oferta': {'numerador': 'oferta'},
+    'Contestadas': {'numerador': 'contestadas'},
+    'Abandonadas': {'numerador': 'abandonadas'},
+    'Retenidas': {'numerador': 'retenidas'},
+    'Cumplen_SLA': {'numerador': 'cumplen_sla'},
+    'Contactando': {'numerador': 'contactando'},
+    'Nivel_Atencion': {'numerador': 'contestadas', 'denominador': 'oferta', 'escala': 100},
+    'Nivel_Servicio': {'numerador': 'cumplen_sla', 'denominador': 'oferta', 'escala': 100},
+    'Nivel_Retencion': {'numerador': 'retenidas', 'denominador': 'contestadas', 'escala': 100},
+    'Tasa_Abandono': {'numerador': 'abandonadas', 'denominador': 'oferta', 'escala': 100},
+    'TMO_Manejadas': {'numerador': 'manejo_total_manejadas', 'denominador': 'manejadas'},
+    'TMO_Contestadas': {'numerador': 'manejo_total', 'denominador': 'contestadas'},
+    'TMO_Ponderado': {'numerador': 'manejo_medio_x_contestadas', 'denominador': 'contestadas'},
+    'TMO_Manejo_Medio': {'numerador': 'manejo_medio', 'denominador': 'registros'},
+    'ASA_Ponderado': {'numerador': 'asa_x_contestadas', 'denominador': 'contestadas'},
+    'Tiempo_Abandono': {'numerador': 'abandono_x_abandonadas', 'denominador': 'abandonadas'},
+    'Tasa_Transferencia': {'numerador': 'transferidas', 'denominador': 'contestadas', 'escala': 100},
+    'Tiempo_Retencion': {'numerador': 'retencion_total'},
+    'Proporcion_Retencion': {'numerador': 'retencion_total', 'denominador': 'manejo_total', 'escala': 100},
+    'Tiempo_ACW': {'numerador': 'acw_total'},
+    'Proporcion_ACW': {'numerador': 'acw_total', 'denominador': 'manejo_total', 'escala': 100},
+}
+
+KPIS_EXTENDIDOS = [
+    'ASA_Ponderado', 'Tiempo_Abandono', 'Tasa_Transferencia', 'Tiempo_Retencion', 'Proporcion_Retencion',
+    'Tiempo_ACW', 'Proporcion_ACW',
+]
+
+
+def compilar_plan(kpis=None):
+    """
+    Devuelve los términos (sin repetir) necesarios para calcular los KPIs pedidos.
+
+    Args:
+        kpis: nombres en KPIS (None = todos)
+    """
+    kpis = list(KPIS) if kpis is None else list(kpis)
+    desconocidos = [kpi for kpi in kpis if kpi not in KPIS]
+    if desconocidos:
+        raise ValueError(f"KPIs desconocidos: {desconocidos}")
+
+    terminos = []
+    for kpi in kpis:
+        for parte in ('numerador', 'denominador'):
+            termino = KPIS[kpi].get(parte)
+            if termino and termino not in terminos:
+                terminos.append(termino)
+    return terminos
+
+
+def evaluar_kpi(sumas, kpi, sin_base=0.0):
+    """
+    Valor de un KPI a partir de las sumas de sus términos.
+
+    Args:
+        sumas: términos ya sumados ({término: arreglo} o DataFrame con una columna por término)
+        kpi: nombre en KPIS
+        sin_base: valor donde el denominador suma 0 (np.nan para distinguirlo de un 0 real)
+    """
+    definicion = KPIS[kpi]
+    numerador = sumas[definicion['numerador']]
+    escala = definicion.get('escala', 1)
+    if not definicion.get('denominador'):
+        return numerador * escala
+    denominador = np.asarray(sumas[definicion['denominador']], dtype=float)
+    con_base = denominador > 0
+    return np.where(con_base, np.asarray(numerador, dtype=float) / np.where(con_base, denominador, 1), sin_base) * escala
+
+
+def claves_intervalo(df_detalle):
+    """
+    Fecha ('YYYY-MM-DD'), intervalo ('HH:MM-HH:MM') e inicio de cada fila del detalle.
+    Las filas con 'Inicio del intervalo' ilegible quedan con NaT/NaN.
+    """
+    inicio = pd.to_datetime(df_detalle['Inicio del intervalo'], format=FORMATO_INTERVALO_DETALLE, errors='coerce')
+    fin = inicio + pd.Timedelta(minutes=30)
+    return pd.DataFrame({
+        'Fecha': inicio.dt.strftime('%Y-%m-%d'),
+        'Intervalo': inicio.dt.strftime('%H:%M') + '-' + fin.dt.strftime('%H:%M'),
+        'Inicio': inicio,
+    }, index=df_detalle.index)
+
+
+def medio_por_fila(df_detalle):
+    """Tipo de medios normalizado de cada fila ('voz', 'mensaje', 'voz; mensaje'; vacío si falta)"""
+    return _opcional(df_detalle, 'Tipo de medios').fillna('').astype(str).str.strip().str.lower()
+
+
+def calcular_kpis(df_detalle, kpis=None, grupos=None, incluir_terminos=False, indice_colas=None, por_medio=False):
+    """
+    Calcula los KPIs pedidos para todos los grupos de colas en una sola agregación.
+
+    Solo se consideran las filas atómicas cuya cola pertenece a un grupo de
+    GruposColas (las filas consolidadas con varias colas quedan fuera).
+
+    Args:
+        df_detalle: DataFrame de "Detalle del rendimiento de colas.csv"
+        kpis: nombres en KPIS (None = todos)
+        grupos: claves de grupo a conservar (None = todos)
+        incluir_terminos: agregar también las sumas de los términos
+        indice_colas: índice de colas del mismo detalle (IndiceColas.indexar_colas);
+                      None = se arma aquí
+        por_medio: separar también por 'Tipo de medios' (columna Medio) en la
+                   misma agregación
+
+    Returns:
+        DataFrame: Grupo, [Medio,] Fecha, Intervalo, Inicio y una columna por KPI,
+                   ordenado por grupo, [medio,] e inicio del intervalo
+    """
+    kpis = list(KPIS) if kpis is None else list(kpis)
+    terminos = compilar_plan(kpis)
+
+    if indice_colas is None:
+        indice_colas = indexar_colas(df_detalle)
+    grupo = pd.Series(grupo_por_fila(indice_colas), index=df_detalle.index)
+    validos = grupo.notna()
+    if grupos is not None:
+        validos &= grupo.isin(grupos)
+    df = df_detalle[validos]
+
+    claves = claves_intervalo(df)
+    datos = claves.assign(Grupo=grupo[validos])
+    llaves = ['Grupo', 'Inicio', 'Fecha', 'Intervalo']
+    if por_medio:
+        datos['Medio'] = medio_por_fila(df)
+        llaves.insert(1, 'Medio')
+    for termino in terminos:
+        datos[termino] = TERMINOS[termino](df).astype(float)
+    datos = datos[datos['Inicio'].notna()]
+
+    sumas = datos.groupby(llaves, sort=True)[terminos].sum().reset_index()
+
+    resultado = sumas[llaves[:-3] + ['Fecha', 'Intervalo', 'Inicio']].copy()
+    for kpi in kpis:
+        resultado[kpi] = evaluar_kpi(sumas, kpi)
+
+    if incluir_terminos:
+        resultado = pd.concat([resultado, sumas[terminos]], axis=1)
+    return resultado
+
+
+def kpis_de_grupo(df_detalle, clave_grupo, kpis=None, tabla=None):
+    """
+    KPIs de un solo grupo, en orden cronológico.
+
+    Si se pasa la tabla ya calculada para todos los grupos (calcular_kpis), se
+    toma de ella sin volver a recorrer el detalle.
+    """
+    if tabla is None:
+        tabla = calcular_kpis(df_detalle, kpis, grupos=[clave_grupo])
+    columnas = ['Fecha', 'Intervalo', 'Inicio'] + (list(KPIS) if kpis is None else list(kpis))
+    return tabla.loc[tabla['Grupo'] == clave_grupo, columnas].reset_index(drop=True)
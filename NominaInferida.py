@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+NÓMINA INFERIDA DESDE EL TIMELINE
+=================================
+Deriva qué agentes pertenecen a cada grupo a partir de la propia exportación,
+en lugar de depender solo de las listas mantenidas a mano en GruposColas.py:
+
+- un agente cuenta para un grupo si registró tiempo 'En la cola' (al menos
+  SEGUNDOS_MINIMOS_EN_COLA) y además está en la división del grupo ('division'
+  o 'division_nomina' en GRUPOS) o en la lista manual del grupo
+- la lista manual de un grupo tiene prioridad sobre la división: un agente de
+  Monitor_CT que figura en la lista de Servicios no se suma a Central
+- los agentes de la lista que ya no aparecen o no atendieron se descartan
+- las exclusiones de Mesa de Ayuda son los agentes inferidos en los grupos por
+  lista (Central, Servicios, Redes)
+
+Todo se calcula con agrupaciones sobre los agentes distintos (no por registro)
+y se guarda en memoria por exportación (ruta, fecha de modificación y tamaño).
+La nómina resultante tiene la forma {grupo: [nombres]} que aceptan
+GruposColas.nomina_temporal, EjecucionLotes ("agentes") y ColaDistribuida (--agentes).
+
+Uso:
+    with nomina_temporal(nomina_de_exportacion()):
+        ...
+
+    python NominaInferida.py [--timeline ruta] [--segundos-minimos 60] [--salida nomina.json]
+    python Ejecutar.py --nomina-inferida
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from CargaDatos import leer_timeline, ruta_entrada, ruta_salida
+from GruposColas import GRUPOS, lista_nomina, mascara_nombres
+
+SEGUNDOS_MINIMOS_EN_COLA = 60
+
+# Columnas del timeline que usa la inferencia
+COLUMNAS_NOMINA = ['Nombre del agente', 'Nombre de la división', 'Estado principal', 'Duración']
+
+ARCHIVO_NOMINA = 'Nomina_Inferida.json'
+
+# Nóminas ya inferidas por exportación: {(ruta, mtime, tamaño, segundos mínimos): (nómina, detalle)}
+_nominas = {}
+
+
+def resumen_agentes(df_timeline):
+    """
+    Una fila por agente: división (la más frecuente en sus registros) y segundos 'En la cola'.
+
+    Returns:
+        DataFrame: Agente, División, Segundos_En_Cola
+    """
+    df = df_timeline[df_timeline['Nombre del agente'].notna()]
+    duracion = pd.to_numeric(df['Duración'], errors='coerce').fillna(0) if 'Duración' in df.columns else 0
+    en_cola = np.where(df['Estado principal'] == 'En la cola', duracion, 0.0)
+
+    segundos = pd.Series(en_cola, index=df.index).groupby(df['Nombre del agente'], sort=True).sum()
+    divisiones = (df.groupby(['Nombre del agente', 'Nombre de la división'], sort=False).size()
+                  .sort_values(ascending=False, kind='mergesort').reset_index()
+                  .drop_duplicates('Nombre del agente').set_index('Nombre del agente')['Nombre de la división'])
+    return pd.DataFrame({
+        'Agente': segundos.index,
+        'División': divisiones.reindex(segundos.index).to_numpy(),
+        'Segundos_En_Cola': segundos.round(3).to_numpy(),
+    })
+
+
+def inferir_nomina(df_timeline, segundos_minimos=SEGUNDOS_MINIMOS_EN_COLA):
+    """
+    Infiere la nómina de los grupos que se definen por lista de agentes.
+
+    Args:
+        df_timeline: timeline de estados (basta con COLUMNAS_NOMINA)
+        segundos_minimos: tiempo 'En la cola' mínimo para considerar activo al agente
+
+    Returns:
+        tuple: ({grupo: [nombres]} para nomina_temporal,
+                DataFrame por agente con División, Segundos_En_Cola, Grupo y Origen)
+    """
+    agentes = resumen_agentes(df_timeline)
+    activo = (agentes['Segundos_En_Cola'] >= segundos_minimos).to_numpy()
+    divisiones = agentes['División'].fillna('')
+
+    grupos_lista = [clave for clave, definicion in GRUPOS.items() if definicion.get('agentes')]
+    en_lista = {clave: mascara_nombres(agentes['Agente'], lista_nomina(clave)).to_numpy() for clave in grupos_lista}
+    en_alguna_lista = np.logical_or.reduce(list(en_lista.values())) if en_lista else np.zeros(len(agentes), bool)
+
+    grupo = np.full(len(agentes), '', dtype=object)
+    origen = np.full(len(agentes), '', dtype=object)
+    nomina = {}
+    for clave in grupos_lista:
+        definicion = GRUPOS[clave]
+        division = definicion.get('division') or definicion.get('division_nomina')
+        por_division = (divisiones.str.contains(division, case=False, regex=False).to_numpy()
+                        if division else np.zeros(len(agentes), bool))
+
+        miembros = activo & (en_lista[clave] | (por_division & ~en_alguna_lista))
+        nomina[clave] = agentes['Agente'][miembros].tolist()
+        grupo[miembros] = clave
+        origen[miembros] = np.where(en_lista[clave][miembros], 'lista', 'división')
+
+    if GRUPOS.get('mda', {}).get('agentes_excluidos') is not None:
+        nomina['mda'] = sorted(nombre for clave in grupos_lista for nombre in nomina[clave])
+
+    detalle = agentes.assign(Grupo=grupo, Origen=origen)
+    return nomina, detalle
+
+
+def diferencias_con_listas(nomina):
+    """
+    Compara la nómina inferida con las listas manuales de GruposColas.
+
+    Returns:
+        dict: {grupo: {'agregados': [...], 'sin_actividad': [...]}} solo con los grupos que difieren
+    """
+    diferencias = {}
+    for clave, nombres in nomina.items():
+        lista = lista_nomina(clave) or []
+        agregados = [nombre for nombre in nombres if not any(manual in nombre for manual in lista)]
+        sin_actividad = [manual for manual in lista if not any(manual in nombre for nombre in nombres)]
+        if agregados or sin_actividad:
+            diferencias[clave] = {'agregados': agregados, 'sin_actividad': sin_actividad}
+    return diferencias
+
+
+def nomina_de_exportacion(ruta=None, segundos_minimos=SEGUNDOS_MINIMOS_EN_COLA, df_timeline=None):
+    """
+    Nómina inferida del timeline indicado (por defecto el configurado en CargaDatos),
+    calculada una sola vez por versión del archivo.
+
+    Args:
+        df_timeline: timeline ya leído de esa ruta (evita volver a leerlo)
+
+    Returns:
+        dict: {grupo: [nombres]}
+    """
+    return _inferir_de_exportacion(ruta, segundos_minimos, df_timeline)[0]
+
+
+def _inferir_de_exportacion(ruta, segundos_minimos, df_timeline=None):
+    ruta = ruta or ruta_entrada('timeline')
+    estado = os.stat(ruta)
+    huella = (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size, segundos_minimos)
+    if huella not in _nominas:
+        if df_timeline is None:
+            df_timeline = leer_timeline(ruta, columnas=COLUMNAS_NOMINA)
+        _nominas[huella] = inferir_nomina(df_timeline, segundos_minimos)
+    return _nominas[huella]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Infiere la nómina de cada grupo desde el timeline")
+    parser.add_argument('--timeline', help="Ruta del timeline (por defecto la configurada en CargaDatos)")
+    parser.add_argument('--segundos-minimos', type=float, default=SEGUNDOS_MINIMOS_EN_COLA,
+                        help=f"Tiempo 'En la cola' mínimo para contar al agente (por defecto {SEGUNDOS_MINIMOS_EN_COLA})")
+    parser.add_argument('--salida', help=f"JSON de la nómina (por defecto {ARCHIVO_NOMINA} en la carpeta de salida)")
+    args = parser.parse_args()
+
+    print("👥 NÓMINA INFERIDA DESDE EL TIMELINE")
+    print("=" * 40)
+
+    nomina, detalle = _inferir_de_exportacion(args.timeline, args.segundos_minimos)
+    print(f"✅ Agentes en el timeline: {len(detalle)} | activos en cola: "
+          f"{int((detalle['Segundos_En_Cola'] >= args.segundos_minimos).sum())}")
+    for clave, nombres in nomina.items():
+        etiqueta = 'excluidos' if clave == 'mda' else 'agentes'
+        print(f"   👤 {GRUPOS[clave]['nombre']}: {len(nombres)} {etiqueta}")
+
+    for clave, diferencia in diferencias_con_listas(nomina).items():
+        print(f"⚠️ {GRUPOS[clave]['nombre']} difiere de la lista manual:")
+        if diferencia['agregados']:
+            print(f"   ➕ {', '.join(diferencia['agregados'])}")
+        if diferencia['sin_actividad']:
+            print(f"   ➖ {', '.join(diferencia['sin_actividad'])}")
+
+    salida = args.salida or ruta_salida(ARCHIVO_NOMINA)
+    carpeta = os.path.dirname(salida)
+    if carpeta and not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+    with open(salida, 'w', encoding='utf-8') as archivo:
+        json.dump(nomina, archivo, ensure_ascii=False, indent=2)
+    print(f"📋 ARCHIVO GENERADO: {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+EJECUCIÓN EN PARALELO POR FECHA
+===============================
+Para exportaciones de varios días (p.ej. un mes completo): divide el detalle de
+colas y el timeline por fecha, procesa cada fecha en un proceso distinto con los
+mismos análisis del Planificador y combina los resultados en los archivos de
+salida habituales, en orden cronológico.
+
+Cada fragmento se arma como si fuera una exportación de Genesys de un solo día:
+- detalle: las filas cuyo 'Inicio del intervalo' cae en la fecha
+- timeline: todos los registros que tocan la fecha, incluidos los estados que
+  empiezan el día anterior o terminan el día siguiente (cruzan la medianoche);
+  cada análisis los recorta al día con su propio criterio, igual que en una
+  exportación diaria. Los registros sin fin van a la fecha en que empiezan (los
+  anteriores al primer día, a la primera fecha). 'Inicio del intervalo' y
+  'Fin del intervalo' se reescriben con los límites del día.
+
+Los archivos sin columna 'Fecha' (Mesa de Ayuda) la reciben al combinar varias
+fechas. Los formatos de salida adicionales (CargaDatos.formatos_salida) se
+generan una sola vez, a partir de los CSV combinados. Los demás archivos que generan los análisis (p.ej. el cubo de estados)
+se copian con la fecha en el nombre.
+
+Uso:
+    python ParaleloFechas.py [--procesos 8] [--analisis mda fraude ...]
+    python Ejecutar.py --por-fecha [--procesos 8]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import CargaDatos
+from Analisis_timeline_comun import FORMATO_HORA_TIMELINE
+from GruposColas import nomina_temporal
+from KPIs import FORMATO_INTERVALO_DETALLE
+from Planificador import ANALIZADORES, ejecutar_analizador, nueva_ejecucion, registrar_entrada
+from ValidacionEntradas import depurar
+
+
+def fechas_del_detalle(df_detalle):
+    """Fechas (Timestamp a medianoche) presentes en 'Inicio del intervalo', ordenadas"""
+    inicio = pd.to_datetime(df_detalle['Inicio del intervalo'], format=FORMATO_INTERVALO_DETALLE, errors='coerce')
+    return sorted(inicio.dt.normalize().dropna().unique())
+
+
+def fragmentar_detalle(df_detalle, fechas):
+    """Filas del detalle de cada fecha"""
+    dia = pd.to_datetime(
+        df_detalle['Inicio del intervalo'], format=FORMATO_INTERVALO_DETALLE, errors='coerce'
+    ).dt.normalize()
+    return {fecha: df_detalle[dia == fecha] for fecha in fechas}
+
+
+def fragmentar_timeline(df_timeline, fechas, primera_fecha=None):
+    """
+    Registros del timeline que tocan cada fecha (ver criterio en la documentación del módulo)
+
+    Args:
+        primera_fecha: primera fecha de la exportación, que recibe los registros sin
+                       fin anteriores a ella (None = la primera de 'fechas')
+    """
+    inicio = pd.to_datetime(df_timeline['Hora de inicio'], format=FORMATO_HORA_TIMELINE, errors='coerce')
+    fin = pd.to_datetime(df_timeline['Hora de finalización'], format=FORMATO_HORA_TIMELINE, errors='coerce')
+    sin_fin = fin.isna() & inicio.notna()
+    dia_inicio = inicio.dt.normalize()
+    primera_fecha = fechas[0] if primera_fecha is None else primera_fecha
+
+    fragmentos = {}
+    for fecha in fechas:
+        siguiente = fecha + pd.Timedelta(days=1)
+        solapa = fin.notna() & (inicio < siguiente) & (fin > fecha)
+        abiertos = sin_fin & ((dia_inicio == fecha) | ((dia_inicio < fecha) if fecha == primera_fecha else False))
+
+        fragmento = df_timeline[solapa | abiertos].copy()
+        if 'Inicio del intervalo' in fragmento.columns:
+            fragmento['Inicio del intervalo'] = fecha.strftime(FORMATO_INTERVALO_DETALLE)
+        if 'Fin del intervalo' in fragmento.columns:
+            fragmento['Fin del intervalo'] = siguiente.strftime(FORMATO_INTERVALO_DETALLE)
+        fragmentos[fecha] = fragmento
+    return fragmentos
+
+
+def procesar_fragmento(fecha, df_detalle, df_timeline, claves, directorio, nomina=None):
+    """
+    Ejecuta los análisis de una fecha (en un proceso del pool) con las entradas ya
+    fragmentadas, escribiendo los resultados en 'directorio'. Las entradas se
+    validan igual (Planificador.registrar_entrada), también cuando llegan sin
+    depurar (ColaDistribuida). La nómina se aplica dentro del proceso: con el
+    método spawn los procesos del pool arrancan con la nómina por defecto.
+
+    Returns:
+        dict: fecha, segundos, por análisis el error (None si terminó bien),
+              los eventos de la ejecución (Registro.py) y la validación de las entradas
+    """
+    instante = time.perf_counter()
+    CargaDatos.configurar_rutas(salida=directorio)
+    ejecucion = nueva_ejecucion(claves)
+    registrar_entrada(ejecucion, 'detalle', df_detalle)
+    if df_timeline is not None:
+        registrar_entrada(ejecucion, 'timeline', df_timeline)
+
+    consola = io.StringIO()
+    with contextlib.redirect_stdout(consola), CargaDatos.formatos_salida(()), nomina_temporal(nomina):
+        for clave in claves:
+            ejecutar_analizador(ejecucion, clave)
+
+    return {
+        'fecha': fecha,
+        'segundos': time.perf_counter() - instante,
+        'errores': {clave: resultado['error'] for clave, resultado in ejecucion['analizadores'].items()},
+        'eventos': ejecucion['eventos'],
+        'validacion': ejecucion['validacion'],
+    }
+
+
+def _agregar_columna_fecha(filas, fecha):
+    """Inserta 'Fecha' después de la primera columna ('Intervalo')"""
+    encabezado, *datos = filas
+    return [encabezado[:1] + ['Fecha'] + encabezado[1:]] + [fila[:1] + [fecha] + fila[1:] for fila in datos]
+
+
+def combinar_resultados(claves, directorios):
+    """
+    Une los CSV de cada fecha en la carpeta de salida configurada.
+
+    Args:
+        claves: análisis ejecutados
+        directorios: lista (fecha 'YYYY-MM-DD', carpeta del fragmento) en orden cronológico
+
+    Returns:
+        list: rutas de los archivos generados
+    """
+    varias_fechas = len(directorios) > 1
+    generados = []
+
+    for clave in claves:
+        nombre_archivo = ANALIZADORES[clave]['archivo']
+        filas_combinadas = []
+        for fecha, directorio in directorios:
+            ruta = os.path.join(directorio, nombre_archivo)
+            if not os.path.exists(ruta):
+                continue
+            with open(ruta, 'r', encoding='utf-8', newline='') as archivo:
+                filas = list(csv.reader(archivo))
+            if not filas:
+                continue
+            if varias_fechas and 'Fecha' not in filas[0]:
+                filas = _agregar_columna_fecha(filas, fecha)
+            filas_combinadas.extend(filas if not filas_combinadas else filas[1:])
+
+        if filas_combinadas:
+            ruta_salida = CargaDatos.ruta_salida(nombre_archivo)
+            with open(ruta_salida, 'w', encoding='utf-8', newline='') as archivo:
+                csv.writer(archivo, lineterminator='\n').writerows(filas_combinadas)
+            generados.append(ruta_salida)
+            generados.extend(CargaDatos.guardar_formatos(pd.read_csv(ruta_salida), nombre_archivo))
+
+    # Otros archivos generados (p.ej. el cubo de estados): uno por fecha
+    archivos_csv = {ANALIZADORES[clave]['archivo'] for clave in claves}
+    for fecha, directorio in directorios:
+        for nombre in sorted(os.listdir(directorio)):
+            if nombre in archivos_csv:
+                continue
+            base, extension = os.path.splitext(nombre)
+            destino = CargaDatos.ruta_salida(f"{base}_{fecha}{extension}" if varias_fechas else nombre)
+            shutil.copyfile(os.path.join(directorio, nombre), destino)
+            generados.append(destino)
+
+    return generados
+
+
+def ejecutar_por_fecha(claves=None, procesos=None, nomina=None):
+    """
+    Ejecuta los análisis fragmentando las entradas por fecha en un pool de procesos.
+
+    Args:
+        claves: análisis a ejecutar (None = todos)
+        procesos: procesos del pool (None = núcleos disponibles)
+        nomina: {clave de grupo: [nombres]} a aplicar en cada proceso (None = la por defecto)
+
+    Returns:
+        dict: fechas procesadas, resultado por fecha, archivos generados, segundos
+              y validación de las entradas (filas excluidas antes de fragmentar)
+    """
+    claves = list(ANALIZADORES) if claves is None else list(claves)
+    instante = time.perf_counter()
+
+    columnas = nueva_ejecucion(claves)['columnas']
+    validacion = {}
+    df_detalle, validacion['detalle'] = depurar(CargaDatos.leer_detalle(columnas=columnas.get('detalle')), 'detalle')
+    fechas = fechas_del_detalle(df_detalle)
+    if not fechas:
+        raise ValueError("El detalle de colas no tiene intervalos con fecha válida")
+
+    detalle_por_fecha = fragmentar_detalle(df_detalle, fechas)
+    timeline_por_fecha = {}
+    if 'timeline' in columnas:
+        df_timeline, validacion['timeline'] = depurar(CargaDatos.leer_timeline(columnas=columnas['timeline']), 'timeline')
+        timeline_por_fecha = fragmentar_timeline(df_timeline, fechas)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as temporal:
+        directorios = [
+            (fecha.strftime('%Y-%m-%d'), os.path.join(temporal, fecha.strftime('%Y-%m-%d')))
+            for fecha in fechas
+        ]
+        procesos = min(procesos or os.cpu_count() or 1, len(fechas))
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            pendientes = [
+                pool.submit(
+                    procesar_fragmento, texto, detalle_por_fecha[fecha],
+                    timeline_por_fecha.get(fecha), claves, directorio, nomina
+                )
+                for fecha, (texto, directorio) in zip(fechas, directorios)
+            ]
+            for futuro in as_completed(pendientes):
+                resultado = futuro.result()
+                errores = {clave: error for clave, error in resultado['errores'].items() if error}
+                estado = f"❌ {errores}" if errores else f"✅ {len(claves)} análisis"
+                print(f"   📅 {resultado['fecha']}: {estado} ({resultado['segundos']:.2f}s)")
+                resultados.append(resultado)
+
+        generados = combinar_resultados(claves, [(texto, directorio) for texto, directorio in directorios
+                                                 if os.path.isdir(directorio)])
+
+    return {
+        'fechas': [texto for texto, _ in directorios],
+        'procesos': procesos,
+        'resultados': sorted(resultados, key=lambda resultado: resultado['fecha']),
+        'archivos': generados,
+        'segundos': time.perf_counter() - instante,
+        'validacion': validacion,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta los análisis en paralelo por fecha")
+    parser.add_argument('--procesos', type=int, help="Procesos del pool (por defecto, núcleos disponibles)")
+    parser.add_argument('--analisis', nargs='+', choices=list(ANALIZADORES), metavar='ANALISIS',
+                        help=f"Análisis a ejecutar (por defecto todos): {', '.join(ANALIZADORES)}")
+    args = parser.parse_args()
+
+    print("🗓️ EJECUCIÓN EN PARALELO POR FECHA")
+    print("=" * 40)
+    resumen = ejecutar_por_fecha(args.analisis, args.procesos)
+    print(f"✅ {len(resumen['fechas'])} fechas en {resumen['procesos']} procesos: {resumen['segundos']:.2f}s")
+    for archivo in resumen['archivos']:
+        print(f"📋 {archivo}")
+
+
+if __name__ == "__main__":
+    main()
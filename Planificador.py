@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""
+PLANIFICADOR DE ARTEFACTOS Y ANÁLISIS
+=====================================
+Los análisis declaran qué artefactos derivados necesitan (detalle parseado e
+índice de colas, timeline parseado, agentes en cola por grupo,
+tabla de KPIs, cubo de estados) y el planificador resuelve el grafo de dependencias:
+
+- cada artefacto se calcula una sola vez por ejecución y se reutiliza en
+  todos los análisis que lo piden
+- si solo se pide un subconjunto de análisis, los artefactos que ninguno
+  necesita no se calculan (p.ej. Fraude Salida no lee el timeline)
+- de cada archivo de entrada se leen solo las columnas que declaran los
+  análisis pedidos
+- las filas inválidas de cada entrada se excluyen al leerla o al inyectarla
+  ya leída (registrar_entrada: app.py, fragmentos por fecha) con
+  ValidacionEntradas.py, y el informe queda en ejecucion['validacion']
+- se registra el tiempo de cada artefacto y de cada análisis, también como
+  eventos de Registro.py ('artefacto', 'analizador') en ejecucion['eventos']
+
+Uso:
+    ejecucion = ejecutar_analizadores(['fraude', 'fraude_salida'])
+    print(reporte_tiempos(ejecucion))
+
+    # Artefactos sueltos, p.ej. el índice de estados para consultas por instante
+    indice = obtener_artefacto(nueva_ejecucion([]), 'indice_estados')
+"""
+
+import importlib
+import time
+
+from CargaDatos import leer_detalle, leer_timeline, ruta_salida
+from GruposColas import GRUPOS
+from KPIs import COLUMNAS_DETALLE
+from Registro import evento
+from ValidacionEntradas import depurar, texto_informe
+
+ENTRADAS = ('detalle', 'timeline')
+
+# Columnas del timeline que lee el conteo de agentes por grupo
+COLUMNAS_TIMELINE_AGENTES = [
+    'Inicio del intervalo', 'Nombre del agente', 'Nombre de la división',
+    'Hora de inicio', 'Hora de finalización', 'Estado principal', 'Duración',
+]
+
+
+def _agentes_mda(timeline):
+    from Analisis_timeline_mda import analizar_linea_tiempo_MA_corregido
+    return analizar_linea_tiempo_MA_corregido(df_timeline=timeline)
+
+
+def _agentes_fraude(timeline):
+    from Analisis_timeline_fraude import analizar_linea_tiempo_fraude_corregido
+    return analizar_linea_tiempo_fraude_corregido(df_timeline=timeline)
+
+
+def _agentes_central(timeline):
+    from AnalisisCentral import obtener_agentes_central_conectados
+    return obtener_agentes_central_conectados(timeline)
+
+
+def _agentes_servicios(timeline):
+    from AnalisisServicios import obtener_agentes_servicios_conectados
+    return obtener_agentes_servicios_conectados(timeline)
+
+
+def _agentes_redes(timeline):
+    from AnalisisRedes import obtener_agentes_redes_conectados
+    return obtener_agentes_redes_conectados(timeline)
+
+
+def _indice_colas(detalle):
+    from IndiceColas import indexar_colas
+    return indexar_colas(detalle)
+
+
+def _tabla_kpis(detalle, indice_colas):
+    from KPIs import calcular_kpis
+    return calcular_kpis(detalle, indice_colas=indice_colas)
+
+
+def _indice_estados(timeline):
+    from IndiceEstados import construir_indice_estados
+    return construir_indice_estados(timeline)
+
+
+def _cubo_estados(timeline):
+    from Analisis_cubo_estados import construir_cubo_estados
+    return construir_cubo_estados(timeline)
+
+
+# Artefacto -> (artefactos de los que depende, función que lo calcula a partir de ellos)
+ARTEFACTOS = {
+    'detalle': ([], leer_detalle),
+    'timeline': ([], leer_timeline),
+    'indice_colas': (['detalle'], _indice_colas),
+    'kpis': (['detalle', 'indice_colas'], _tabla_kpis),
+    'agentes_mda': (['timeline'], _agentes_mda),
+    'agentes_fraude': (['timeline'], _agentes_fraude),
+    'agentes_central': (['timeline'], _agentes_central),
+    'agentes_servicios': (['timeline'], _agentes_servicios),
+    'agentes_redes': (['timeline'], _agentes_redes),
+    'cubo': (['timeline'], _cubo_estados),
+    'indice_estados': (['timeline'], _indice_estados),
+}
+
+# Artefactos que dependen de la nómina de agentes de un grupo (GruposColas.nomina_temporal)
+NOMINA_DE_ARTEFACTO = {
+    'agentes_mda': 'mda',
+    'agentes_fraude': 'fraude',
+    'agentes_central': 'central',
+    'agentes_servicios': 'servicios',
+    'agentes_redes': 'redes',
+}
+
+# Análisis -> módulo, función, archivo generado, grupos de GRUPOS cuya nómina usa (él o
+# sus artefactos), artefactos que recibe (parámetro: artefacto) y columnas que leen él
+# y sus artefactos de cada archivo de entrada
+ANALIZADORES = {
+    'mda': {
+        'nombre': 'Mesa de Ayuda',
+        'modulo': 'AnalisisMDA',
+        'funcion': 'main',
+        'archivo': 'Analisis_Mesa_Ayuda_Por_Intervalos.csv',
+        'grupos': ['mda'],
+        'artefactos': {
+            'df_detalle': 'detalle', 'agentes_por_intervalo': 'agentes_mda', 'tabla_kpis': 'kpis',
+            'indice_colas': 'indice_colas',
+        },
+        'columnas': {'detalle': COLUMNAS_DETALLE + ['Fin del intervalo'], 'timeline': COLUMNAS_TIMELINE_AGENTES},
+    },
+    'central': {
+        'nombre': 'Central Telefónica',
+        'modulo': 'AnalisisCentral',
+        'funcion': 'procesar_archivo_central',
+        'archivo': 'Analisis_Central_Por_intervalos.csv',
+        'grupos': ['central'],
+        'artefactos': {'df_detalle': 'detalle', 'agentes_por_intervalo': 'agentes_central', 'tabla_kpis': 'kpis'},
+        'columnas': {'detalle': COLUMNAS_DETALLE, 'timeline': COLUMNAS_TIMELINE_AGENTES},
+    },
+    'fraude': {
+        'nombre': 'Fraude',
+        'modulo': 'AnalisisFraude',
+        'funcion': 'main',
+        'archivo': 'Analisis_Fraude_Por_intervalos.csv',
+        'grupos': ['fraude'],
+        'artefactos': {'df_detalle': 'detalle', 'agentes_por_intervalo': 'agentes_fraude', 'tabla_kpis': 'kpis'},
+        'columnas': {'detalle': COLUMNAS_DETALLE, 'timeline': COLUMNAS_TIMELINE_AGENTES},
+    },
+    'fraude_salida': {
+        'nombre': 'Fraude Salida',
+        'modulo': 'AnalisisFraudeSalida',
+        'funcion': 'main',
+        'archivo': 'Analisis_FraudeOut_Por_intervalos.csv',
+        'grupos': [],
+        'artefactos': {'df_detalle': 'detalle', 'tabla_kpis': 'kpis'},
+        'columnas': {'detalle': COLUMNAS_DETALLE},
+    },
+    'servicios': {
+        'nombre': 'Servicios Administrativos',
+        'modulo': 'AnalisisServicios',
+        'funcion': 'procesar_archivo_servicios',
+        'archivo': 'Analisis_Servicios_Por_intervalos.csv',
+        'grupos': ['servicios'],
+        'artefactos': {'df_detalle': 'detalle', 'agentes_por_intervalo': 'agentes_servicios', 'tabla_kpis': 'kpis'},
+        'columnas': {'detalle': COLUMNAS_DETALLE, 'timeline': COLUMNAS_TIMELINE_AGENTES},
+    },
+    'redes': {
+        'nombre': 'Redes Sociales',
+        'modulo': 'AnalisisRedes',
+        'funcion': 'procesar_archivo_redes',
+        'archivo': 'Analisis_Redes_Por_intervalos.csv',
+        'grupos': ['redes'],
+        'artefactos': {'df_detalle': 'detalle', 'agentes_por_intervalo': 'agentes_redes', 'tabla_kpis': 'kpis'},
+        'columnas': {'detalle': COLUMNAS_DETALLE, 'timeline': COLUMNAS_TIMELINE_AGENTES},
+    },
+    'estados': {
+        'nombre': 'Estados de Agentes',
+        'modulo': 'Analisis_cubo_estados',
+        'funcion': 'main',
+        'archivo': 'Analisis_Estados_Por_intervalos.csv',
+        'grupos': list(GRUPOS),
+        'artefactos': {'df_detalle': 'detalle', 'cubo': 'cubo'},
+        'columnas': {
+            'detalle': ['Nombre de cola', 'Inicio del intervalo', 'Fin del intervalo', 'Manejo total'],
+            'timeline': COLUMNAS_TIMELINE_AGENTES + ['Fin del intervalo', 'Estado secundario'],
+        },
+    },
+    'medios': {
+        'nombre': 'KPIs por Tipo de Medios',
+        'modulo': 'AnalisisMedios',
+        'funcion': 'main',
+        'archivo': 'Analisis_Medios_Por_intervalos.csv',
+        'grupos': [],
+        'artefactos': {'df_detalle': 'detalle', 'indice_colas': 'indice_colas'},
+        'columnas': {'detalle': COLUMNAS_DETALLE},
+    },
+    'centro': {
+        'nombre': 'Tablero del Centro',
+        'modulo': 'TableroCentro',
+        'funcion': 'main',
+        'archivo': 'Analisis_Centro_Por_intervalos.csv',
+        'grupos': list(GRUPOS),
+        'artefactos': {'tabla_kpis': 'kpis', 'cubo': 'cubo'},
+        'columnas': {
+            'detalle': COLUMNAS_DETALLE,
+            'timeline': COLUMNAS_TIMELINE_AGENTES + ['Fin del intervalo', 'Estado secundario'],
+        },
+    },
+}
+
+
+def dependencias(artefactos):
+    """Todos los artefactos necesarios (incluidas dependencias transitivas), en orden de cálculo"""
+    orden = []
+
+    def visitar(nombre):
+        if nombre in orden:
+            return
+        for dependencia in ARTEFACTOS[nombre][0]:
+            visitar(dependencia)
+        orden.append(nombre)
+
+    for nombre in artefactos:
+        visitar(nombre)
+    return orden
+
+
+def entradas_de(clave_analisis):
+    """Archivos de entrada ('detalle', 'timeline') que necesita un análisis"""
+    necesarios = dependencias(ANALIZADORES[clave_analisis]['artefactos'].values())
+    return tuple(entrada for entrada in ENTRADAS if entrada in necesarios)
+
+
+def columnas_de(claves):
+    """
+    Columnas a leer de cada entrada para los análisis indicados: la unión de las
+    que declaran. Si alguno no las declara, esa entrada se lee completa (None).
+    """
+    columnas = {}
+    for clave in claves:
+        declaradas = ANALIZADORES[clave].get('columnas', {})
+        for entrada in entradas_de(clave):
+            if entrada in columnas and columnas[entrada] is None:
+                continue
+            if declaradas.get(entrada) is None:
+                columnas[entrada] = None
+            else:
+                columnas[entrada] = columnas.get(entrada, set()) | set(declaradas[entrada])
+    return columnas
+
+
+def nueva_ejecucion(claves=None):
+    """
+    Estado de una ejecución: artefactos calculados, errores, tiempos, eventos y
+    validación de las entradas.
+
+    Args:
+        claves: análisis que se van a ejecutar (None = todos); define qué
+                columnas se leen de cada entrada
+    """
+    columnas = columnas_de(list(ANALIZADORES) if claves is None else claves)
+    return {'artefactos': {}, 'errores': {}, 'tiempos': {}, 'analizadores': {}, 'columnas': columnas, 'eventos': [],
+            'validacion': {}}
+
+
+def registrar_entrada(ejecucion, entrada, df):
+    """
+    Valida una entrada ('detalle' o 'timeline') ya leída y la deja como artefacto.
+
+    Todo camino que inyecta entradas (lectura de archivos, app.py, fragmentos
+    por fecha) pasa por aquí, así los análisis nunca reciben filas inválidas.
+
+    Returns:
+        DataFrame: las filas válidas
+    """
+    valor, informe = depurar(df, entrada)
+    ejecucion['validacion'][entrada] = informe
+    ejecucion['eventos'].append(evento('validacion', **informe))
+    ejecucion['artefactos'][entrada] = valor
+    return valor
+
+
+def obtener_artefacto(ejecucion, nombre):
+    """Devuelve el artefacto, calculándolo (junto con sus dependencias) solo la primera vez"""
+    if nombre in ejecucion['artefactos']:
+        return ejecucion['artefactos'][nombre]
+    if nombre in ejecucion['errores']:
+        raise RuntimeError(f"Artefacto '{nombre}' no disponible: {ejecucion['errores'][nombre]}")
+
+    dependencias_artefacto, calcular = ARTEFACTOS[nombre]
+    valores = [obtener_artefacto(ejecucion, dependencia) for dependencia in dependencias_artefacto]
+
+    instante = time.perf_counter()
+    try:
+        if nombre in ENTRADAS:
+            valor = registrar_entrada(ejecucion, nombre, calcular(columnas=ejecucion['columnas'].get(nombre)))
+        else:
+            valor = calcular(*valores)
+    except Exception as e:
+        ejecucion['errores'][nombre] = str(e)
+        raise RuntimeError(f"Artefacto '{nombre}' no disponible: {e}") from e
+    finally:
+        ejecucion['tiempos'][nombre] = time.perf_counter() - instante
+        ejecucion['eventos'].append(evento(
+            'artefacto', nombre=nombre, segundos=round(ejecucion['tiempos'][nombre], 6),
+            error=ejecucion['errores'].get(nombre),
+        ))
+
+    ejecucion['artefactos'][nombre] = valor
+    return valor
+
+
+def ejecutar_analizador(ejecucion, clave):
+    """Ejecuta un análisis con los artefactos que declara; registra duración y error"""
+    definicion = ANALIZADORES[clave]
+    instante = time.perf_counter()
+    error = None
+    try:
+        argumentos = {
+            parametro: obtener_artefacto(ejecucion, artefacto)
+            for parametro, artefacto in definicion['artefactos'].items()
+        }
+        funcion = getattr(importlib.import_module(definicion['modulo']), definicion['funcion'])
+        funcion(**argumentos)
+    except SystemExit as salida:
+        if salida.code not in (None, 0):
+            error = f"SystemExit({salida.code})"
+    except Exception as e:
+        error = str(e)
+
+    ejecucion['analizadores'][clave] = {
+        'segundos': time.perf_counter() - instante,
+        'archivo': ruta_salida(definicion['archivo']),
+        'error': error,
+    }
+    ejecucion['eventos'].append(evento(
+        'analizador', clave=clave, segundos=round(ejecucion['analizadores'][clave]['segundos'], 6),
+        archivo=ejecucion['analizadores'][clave]['archivo'], error=error,
+    ))
+    return error is None
+
+
+def ejecutar_analizadores(claves=None, ejecucion=None):
+    """
+    Ejecuta los análisis pedidos (None = todos) compartiendo los artefactos.
+
+    Returns:
+        dict: estado de la ejecución (ver nueva_ejecucion), con el resultado por análisis
+    """
+    claves = list(ANALIZADORES) if claves is None else list(claves)
+    desconocidos = [clave for clave in claves if clave not in ANALIZADORES]
+    if desconocidos:
+        raise ValueError(f"Análisis desconocidos: {desconocidos}")
+
+    ejecucion = nueva_ejecucion(claves) if ejecucion is None else ejecucion
+    for clave in claves:
+        ejecutar_analizador(ejecucion, clave)
+    return ejecucion
+
+
+def reporte_tiempos(ejecucion):
+    """Texto con el tiempo de cada artefacto y de cada análisis y las filas excluidas de las entradas"""
+    lineas = ["⏱️ ARTEFACTOS (calculados una vez):"]
+    for nombre, segundos in ejecucion['tiempos'].items():
+        estado = f" ❌ {ejecucion['errores'][nombre]}" if nombre in ejecucion['errores'] else ""
+        lineas.append(f"   {nombre:<20} {segundos:7.3f}s{estado}")
+    if ejecucion.get('validacion'):
+        lineas.append("🧹 VALIDACIÓN DE ENTRADAS (filas excluidas al cargar):")
+        lineas.extend(texto_informe(informe) for informe in ejecucion['validacion'].values())
+    lineas.append("⏱️ ANÁLISIS (incluye artefactos calculados por primera vez):")
+    for clave, resultado in ejecucion['analizadores'].items():
+        estado = f" ❌ {resultado['error']}" if resultado['error'] else ""
+        lineas.append(f"   {clave:<20} {resultado['segundos']:7.3f}s{estado}")
+    return "\n".join(lineas)
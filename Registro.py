@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+REGISTRO DE DIAGNÓSTICOS Y EVENTOS
+==================================
+Capa de registro sobre logging (biblioteca estándar) para los análisis:
+
+- cada módulo pide su registro con registro_de('AnalisisMDA') ('analisis.AnalisisMDA')
+- niveles: DETALLE (diagnósticos por fila o por intervalo, apagados por
+  defecto), INFO, WARNING y ERROR; el nivel se puede cambiar para todos los
+  módulos o solo para algunos
+- los mensajes se escriben en el sys.stdout vigente al emitir, así la consola
+  capturada por app.py, ServidorAnalisis, ParaleloFechas y los lotes (con
+  redirect_stdout) los sigue recibiendo
+- en los bucles se consulta una sola vez registro.isEnabledFor(DETALLE) y los
+  mensajes de detalle ni siquiera se arman cuando está apagado
+- los resúmenes de una ejecución se emiten como eventos (dict con 'evento' e
+  'instante'): se agregan a los colectores activos (capturar_eventos) y, si se
+  configuró un archivo, se escriben como JSON Lines
+
+Configuración: configurar_registro(...), la variable de entorno
+ANALISIS_REGISTRO ("DETALLE" o "AnalisisMDA=DETALLE,AnalisisRedes=DETALLE")
+o Ejecutar.py --registro / --eventos.
+
+Uso:
+    registro = registro_de('AnalisisMDA')
+    detallar = registro.isEnabledFor(DETALLE)
+    for ...:
+        if detallar:
+            registro.debug(f"Intervalo {intervalo}: {agentes} agentes")
+
+    evento('analizador', clave='mda', segundos=0.42, error=None)
+
+    python Ejecutar.py --registro AnalisisMDA=DETALLE --eventos eventos.jsonl
+"""
+
+import contextlib
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+RAIZ = 'analisis'
+DETALLE = logging.DEBUG
+NIVEL_POR_DEFECTO = logging.INFO
+VARIABLE_ENTORNO = 'ANALISIS_REGISTRO'
+
+NIVELES = {
+    'DETALLE': DETALLE,
+    'DEBUG': DETALLE,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+}
+
+# Listas que reciben los eventos emitidos mientras están activas (capturar_eventos)
+_colectores = []
+_archivo_eventos = None
+
+
+class _SalidaVigente(logging.Handler):
+    """Escribe en el sys.stdout del momento (no en el que había al configurar)"""
+
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+def _raiz():
+    raiz = logging.getLogger(RAIZ)
+    if not raiz.handlers:
+        manejador = _SalidaVigente()
+        manejador.setFormatter(logging.Formatter('%(message)s'))
+        raiz.addHandler(manejador)
+        raiz.setLevel(NIVEL_POR_DEFECTO)
+        raiz.propagate = False
+    return raiz
+
+
+def registro_de(modulo):
+    """Registro del módulo indicado ('analisis.<modulo>')"""
+    _raiz()
+    return logging.getLogger(f'{RAIZ}.{modulo}')
+
+
+def nivel(texto):
+    """Nivel numérico de un nombre ('DETALLE', 'INFO', ...) o número"""
+    texto = str(texto).strip().upper()
+    if texto.isdigit():
+        return int(texto)
+    if texto not in NIVELES:
+        raise ValueError(f"Nivel desconocido: {texto} (use {', '.join(NIVELES)})")
+    return NIVELES[texto]
+
+
+def interpretar_niveles(especificaciones):
+    """
+    Convierte ["DETALLE"] o ["AnalisisMDA=DETALLE", ...] (o el texto separado por
+    comas de ANALISIS_REGISTRO) en (nivel general, {módulo: nivel}).
+    """
+    if isinstance(especificaciones, str):
+        especificaciones = especificaciones.split(',')
+    general = None
+    por_modulo = {}
+    for especificacion in especificaciones:
+        if not especificacion.strip():
+            continue
+        modulo, separador, valor = especificacion.partition('=')
+        if separador:
+            por_modulo[modulo.strip()] = nivel(valor)
+        else:
+            general = nivel(modulo)
+    return general, por_modulo
+
+
+def configurar_registro(nivel_general=None, niveles=None, archivo_eventos=None):
+    """
+    Args:
+        nivel_general: nivel de todos los módulos (None = no cambiarlo)
+        niveles: {módulo: nivel} para módulos puntuales (nombre o número de nivel)
+        archivo_eventos: ruta JSON Lines donde se agregan los eventos (None = no cambiarla)
+    """
+    global _archivo_eventos
+    raiz = _raiz()
+    if nivel_general is not None:
+        raiz.setLevel(nivel(nivel_general))
+    for modulo, valor in (niveles or {}).items():
+        logging.getLogger(f'{RAIZ}.{modulo}').setLevel(nivel(valor))
+    if archivo_eventos is not None:
+        _archivo_eventos = archivo_eventos
+
+
+def evento(tipo, /, **campos):
+    """
+    Emite un evento legible por máquina (valores no serializables como texto).
+
+    Returns:
+        dict: {'evento': tipo, 'instante': ISO, **campos}
+    """
+    registro = {'evento': tipo, 'instante': datetime.now().isoformat(timespec='milliseconds'), **campos}
+    for colector in _colectores:
+        colector.append(registro)
+    if _archivo_eventos:
+        with open(_archivo_eventos, 'a', encoding='utf-8') as archivo:
+            archivo.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+    return registro
+
+
+@contextlib.contextmanager
+def capturar_eventos():
+    """Lista con los eventos emitidos dentro del bloque"""
+    eventos = []
+    _colectores.append(eventos)
+    try:
+        yield eventos
+    finally:
+        _colectores.remove(eventos)
+
+
+if os.environ.get(VARIABLE_ENTORNO):
+    _general, _por_modulo = interpretar_niveles(os.environ[VARIABLE_ENTORNO])
+    configurar_registro(_general, _por_modulo)
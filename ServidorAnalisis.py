@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+SERVIDOR DE ANÁLISIS RESIDENTE
+==============================
+Mantiene el intérprete, pandas y los análisis importados en memoria y acepta
+trabajos por HTTP local y/o por un socket Unix, evitando en cada ejecución el
+arranque de Python, la importación de pandas y el parseo de las exportaciones.
+
+Se conservan en memoria:
+- las exportaciones ya parseadas (caché de CargaDatos, por ruta/fecha/tamaño)
+- los artefactos derivados del planificador (timeline parseado, índice de
+  colas, tabla de KPIs, cubo de estados...) por versión de las entradas; si
+  cambia la nómina solo se descartan los agentes por intervalo de los grupos
+  cambiados (Planificador.NOMINA_DE_ARTEFACTO)
+- todos los archivos que escribe cada análisis (CSV, cubo .npz y formatos
+  adicionales), identificados por las entradas, los formatos y la nómina de
+  los grupos que usa: repetir un trabajo sin cambios, o cambiar la nómina de
+  otro grupo, solo reescribe los archivos
+
+Trabajo (JSON):
+    {
+        "detalle": "ruta/Detalle del rendimiento de colas.csv",      (opcional)
+        "timeline": "ruta/Resumen de línea de tiempo de estado de agente.csv",  (opcional)
+        "salida": "ruta/carpeta",                                      (opcional)
+        "analisis": ["fraude", "fraude_salida"],                       (opcional, todos por defecto)
+        "agentes": {"central": ["Nombre Apellido", ...]},              (opcional, nómina alternativa)
+        "formatos": ["parquet"],                                       (opcional, además del CSV)
+        "incluir_csv": false
+    }
+
+Uso:
+    python ServidorAnalisis.py [--puerto 8765] [--socket /tmp/analisis.sock]
+    python ServidorAnalisis.py --enviar trabajo.json [--puerto 8765 | --socket /tmp/analisis.sock]
+
+HTTP: POST /analizar, GET /estado, POST /limpiar
+Socket Unix: una línea JSON por petición con "accion": analizar | estado | limpiar
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import CargaDatos
+from FormatosSalida import ARCHIVO_SQLITE
+from GruposColas import nomina_temporal
+from Planificador import ANALIZADORES, NOMINA_DE_ARTEFACTO, ejecutar_analizador, entradas_de, nueva_ejecucion
+
+PUERTO_POR_DEFECTO = 8765
+
+_bloqueo = threading.Lock()
+_resultados = {}
+# Versión de las entradas (huellas) -> ejecución del planificador con sus artefactos
+_ejecuciones = {}
+
+
+def _huella_entrada(ruta):
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return None
+    return (os.path.abspath(ruta), estado.st_mtime_ns, estado.st_size)
+
+
+def _ejecucion_vigente(huellas, nomina):
+    """
+    Ejecución con los artefactos ya calculados para estas versiones de las
+    entradas. Si la nómina cambió, descarta solo los artefactos de agentes de
+    los grupos cambiados; el resto (timeline, KPIs, cubo...) se reutiliza.
+    """
+    version = (huellas['detalle'], huellas['timeline'])
+    ejecucion = _ejecuciones.get(version)
+    if ejecucion is None:
+        # Solo se conserva la ejecución de la versión vigente de cada par de rutas
+        rutas = tuple(huella and huella[0] for huella in version)
+        for anterior in [otra for otra in _ejecuciones if tuple(huella and huella[0] for huella in otra) == rutas]:
+            del _ejecuciones[anterior]
+        ejecucion = _ejecuciones[version] = nueva_ejecucion()
+        ejecucion['nomina'] = {}
+    else:
+        for artefacto, grupo in NOMINA_DE_ARTEFACTO.items():
+            if ejecucion['nomina'].get(grupo) != nomina.get(grupo):
+                ejecucion['artefactos'].pop(artefacto, None)
+    ejecucion['nomina'] = dict(nomina)
+    # Los errores de trabajos anteriores no se arrastran: se reintenta
+    ejecucion['errores'].clear()
+    ejecucion['analizadores'].clear()
+    ejecucion['eventos'].clear()
+    return ejecucion
+
+
+def _ejecutar_analisis(ejecucion, clave):
+    """
+    Ejecuta un análisis en este proceso (vía el planificador) capturando su salida
+    por consola y todos los archivos que genera.
+
+    Returns:
+        tuple: (consola, error, {nombre de archivo: bytes})
+    """
+    consola = io.StringIO()
+    with contextlib.redirect_stdout(consola), CargaDatos.capturar_resultados() as archivos:
+        ejecutar_analizador(ejecucion, clave)
+    return consola.getvalue(), ejecucion['analizadores'][clave]['error'], archivos
+
+
+def _combinar_sqlite(contenido, ruta):
+    """Copia las tablas de una base SQLite en memoria a la base de la salida, reemplazándolas"""
+    with contextlib.closing(sqlite3.connect(':memory:')) as origen, \
+            contextlib.closing(sqlite3.connect(ruta)) as destino:
+        origen.deserialize(contenido)
+        for (tabla,) in origen.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            destino.execute(f'DROP TABLE IF EXISTS "{tabla}"')
+        destino.executescript('\n'.join(origen.iterdump()))
+
+
+def _escribir_archivos(archivos):
+    """Escribe en la carpeta de salida los archivos capturados de un análisis"""
+    for nombre, contenido in archivos.items():
+        if nombre == ARCHIVO_SQLITE:
+            _combinar_sqlite(contenido, CargaDatos.ruta_salida(nombre))
+            continue
+        with open(CargaDatos.ruta_salida(nombre), 'wb') as salida:
+            salida.write(contenido)
+
+
+def ejecutar_trabajo(trabajo):
+    """
+    Ejecuta un trabajo de análisis (ver formato en la documentación del módulo).
+
+    Returns:
+        dict: estado, duración y, por análisis, archivo generado, duración,
+              si se resolvió desde memoria y el error si lo hubo
+    """
+    claves = trabajo.get('analisis') or list(ANALIZADORES)
+    desconocidos = [clave for clave in claves if clave not in ANALIZADORES]
+    if desconocidos:
+        return {'ok': False, 'error': f"Análisis desconocidos: {desconocidos}"}
+
+    with _bloqueo:
+        instante = time.perf_counter()
+        CargaDatos.configurar_rutas(trabajo.get('detalle'), trabajo.get('timeline'), trabajo.get('salida'))
+        huellas = {
+            'detalle': _huella_entrada(CargaDatos.ruta_entrada('detalle')),
+            'timeline': _huella_entrada(CargaDatos.ruta_entrada('timeline')),
+        }
+        nomina = {clave: tuple(nombres) for clave, nombres in (trabajo.get('agentes') or {}).items()}
+        formatos = tuple(sorted(trabajo.get('formatos') or ()))
+        respuesta = {'ok': True, 'analisis': {}}
+
+        try:
+            # Artefactos compartidos por los análisis de este trabajo y los siguientes
+            ejecucion = _ejecucion_vigente(huellas, nomina)
+            with nomina_temporal(trabajo.get('agentes')), CargaDatos.formatos_salida(formatos):
+                for clave in claves:
+                    nombre_archivo = ANALIZADORES[clave]['archivo']
+                    entradas = entradas_de(clave)
+                    faltantes = [entrada for entrada in entradas if huellas[entrada] is None]
+                    if faltantes:
+                        respuesta['analisis'][clave] = {'error': f"Entradas no encontradas: {faltantes}"}
+                        respuesta['ok'] = False
+                        continue
+
+                    inicio_analisis = time.perf_counter()
+                    # Solo la nómina de los grupos que usa el análisis forma parte de su identidad
+                    nomina_analisis = tuple(sorted(
+                        (grupo, nombres) for grupo, nombres in nomina.items() if grupo in ANALIZADORES[clave]['grupos']
+                    ))
+                    identificador = (clave, tuple(huellas[entrada] for entrada in entradas), nomina_analisis, formatos)
+                    archivo = CargaDatos.ruta_salida(nombre_archivo)
+                    desde_cache = identificador in _resultados
+
+                    if desde_cache:
+                        archivos = _resultados[identificador]
+                        error = None
+                    else:
+                        if os.path.exists(archivo):
+                            os.remove(archivo)
+                        _, error, archivos = _ejecutar_analisis(ejecucion, clave)
+                        if error is None and nombre_archivo not in archivos:
+                            error = "El análisis no generó resultados"
+                        elif error is None:
+                            _resultados[identificador] = archivos
+                    _escribir_archivos(archivos)
+
+                    detalle = {
+                        'archivo': archivo,
+                        'archivos': [CargaDatos.ruta_salida(nombre) for nombre in archivos],
+                        'segundos': round(time.perf_counter() - inicio_analisis, 3),
+                        'desde_cache': desde_cache,
+                    }
+                    if error:
+                        detalle['error'] = error
+                        respuesta['ok'] = False
+                    elif trabajo.get('incluir_csv'):
+                        with open(archivo, 'r', encoding='utf-8') as generado:
+                            detalle['csv'] = generado.read()
+                    respuesta['analisis'][clave] = detalle
+        except ValueError as e:
+            respuesta = {'ok': False, 'error': str(e)}
+        finally:
+            CargaDatos.restablecer_rutas()
+
+        respuesta['segundos'] = round(time.perf_counter() - instante, 3)
+        return respuesta
+
+
+def estado_servidor():
+    return {'ok': True, 'cache': CargaDatos.estado_cache(), 'resultados_en_memoria': len(_resultados),
+            'ejecuciones_en_memoria': len(_ejecuciones)}
+
+
+def limpiar_servidor():
+    with _bloqueo:
+        CargaDatos.limpiar_cache()
+        _resultados.clear()
+        _ejecuciones.clear()
+    return {'ok': True}
+
+
+def atender_peticion(peticion):
+    """Despacha una petición {'accion': ..., ...} y devuelve la respuesta"""
+    accion = peticion.get('accion', 'analizar')
+    if accion == 'analizar':
+        return ejecutar_trabajo(peticion)
+    if accion == 'estado':
+        return estado_servidor()
+    if accion == 'limpiar':
+        return limpiar_servidor()
+    return {'ok': False, 'error': f"Acción desconocida: {accion}"}
+
+
+class ManejadorHTTP(BaseHTTPRequestHandler):
+    RUTAS = {'/analizar': 'analizar', '/estado': 'estado', '/limpiar': 'limpiar'}
+
+    def _responder(self, respuesta, codigo=200):
+        cuerpo = json.dumps(respuesta, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        if self.path != '/estado':
+            self._responder({'ok': False, 'error': 'Ruta no encontrada'}, 404)
+            return
+        self._responder(estado_servidor())
+
+    def do_POST(self):
+        accion = self.RUTAS.get(self.path)
+        if accion is None:
+            self._responder({'ok': False, 'error': 'Ruta no encontrada'}, 404)
+            return
+        longitud = int(self.headers.get('Content-Length') or 0)
+        try:
+            peticion = json.loads(self.rfile.read(longitud) or b'{}')
+        except json.JSONDecodeError as e:
+            self._responder({'ok': False, 'error': f"JSON inválido: {e}"}, 400)
+            return
+        peticion['accion'] = accion
+        self._responder(atender_peticion(peticion))
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ManejadorSocket(socketserver.StreamRequestHandler):
+    def handle(self):
+        for linea in self.rfile:
+            if not linea.strip():
+                continue
+            try:
+                respuesta = atender_peticion(json.loads(linea))
+            except json.JSONDecodeError as e:
+                respuesta = {'ok': False, 'error': f"JSON inválido: {e}"}
+            self.wfile.write(json.dumps(respuesta, ensure_ascii=False).encode('utf-8') + b'\n')
+
+
+def enviar_trabajo(peticion, puerto=PUERTO_POR_DEFECTO, socket_unix=None):
+    """Cliente: envía una petición al servidor (socket Unix si se indica, si no HTTP)"""
+    if socket_unix:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conexion:
+            conexion.connect(socket_unix)
+            conexion.sendall(json.dumps(peticion).encode('utf-8') + b'\n')
+            with conexion.makefile('rb') as lector:
+                return json.loads(lector.readline())
+
+    accion = peticion.get('accion', 'analizar')
+    solicitud = urllib.request.Request(
+        f"http://127.0.0.1:{puerto}/{accion}",
+        data=None if accion == 'estado' else json.dumps(peticion).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(solicitud) as respuesta:
+        return json.loads(respuesta.read())
+
+
+def iniciar_servidor(puerto=PUERTO_POR_DEFECTO, socket_unix=None):
+    """Atiende peticiones por HTTP en 127.0.0.1:puerto y, si se indica, por socket Unix"""
+    print("🛰️ SERVIDOR DE ANÁLISIS")
+    print("=" * 40)
+
+    # Importar los análisis una sola vez al arrancar
+    for definicion in ANALIZADORES.values():
+        importlib.import_module(definicion['modulo'])
+    print(f"✅ Análisis cargados: {', '.join(ANALIZADORES)}")
+
+    if socket_unix:
+        if os.path.exists(socket_unix):
+            os.remove(socket_unix)
+        servidor_socket = socketserver.UnixStreamServer(socket_unix, ManejadorSocket)
+        threading.Thread(target=servidor_socket.serve_forever, daemon=True).start()
+        print(f"🔌 Socket Unix: {socket_unix}")
+
+    servidor_http = HTTPServer(('127.0.0.1', puerto), ManejadorHTTP)
+    print(f"🌐 HTTP: http://127.0.0.1:{puerto} (POST /analizar, GET /estado, POST /limpiar)")
+    try:
+        servidor_http.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Servidor detenido")
+    finally:
+        servidor_http.server_close()
+        if socket_unix and os.path.exists(socket_unix):
+            os.remove(socket_unix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor residente de análisis de colas")
+    parser.add_argument('--puerto', type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument('--socket', help="Ruta del socket Unix (opcional)")
+    parser.add_argument('--enviar', metavar='TRABAJO_JSON', help="Enviar un trabajo a un servidor en ejecución")
+    args = parser.parse_args()
+
+    if args.enviar:
+        with open(args.enviar, 'r', encoding='utf-8') as archivo:
+            peticion = json.load(archivo)
+        print(json.dumps(enviar_trabajo(peticion, args.puerto, args.socket), ensure_ascii=False, indent=2))
+        return
+
+    iniciar_servidor(args.puerto, args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+TABLERO DEL CENTRO POR INTERVALO
+================================
+Una sola tabla con los KPIs y los agentes en cola de todos los grupos lado a
+lado, una fila por (Fecha, Intervalo), sin unir los CSV de cada análisis:
+
+- KPIs: de la tabla de KPIs (KPIs.calcular_kpis), una única agregación del
+  detalle para todos los grupos y con las mismas definiciones en todos
+  (TMO = TMO_Manejadas)
+- agentes en cola: del cubo de estados (Analisis_cubo_estados), un único
+  barrido del timeline; cuenta los agentes del grupo con al menos
+  MINUTOS_MINIMOS_EN_COLA minutos 'En la cola' en el intervalo
+- claves de intervalo alineadas: Fecha 'YYYY-MM-DD' e Intervalo 'HH:MM-HH:MM'
+  salen del inicio de cada slot (fin = inicio + 30 minutos) para todos los
+  grupos; la grilla es la unión de los slots del detalle y del cubo
+- Centro_*: sumas de los conteos de los grupos, niveles evaluados con las
+  definiciones de KPIs.KPIS sobre esas sumas (KPIs.evaluar_kpi) y agentes
+  distintos en cola de cualquier grupo
+
+Las columnas de cada grupo llevan como prefijo su clave de GRUPOS
+(mda_Oferta, central_Nivel_Servicio_%, redes_Agentes_En_Cola, ...).
+
+Uso:
+    tablero = calcular_tablero(calcular_kpis(leer_detalle()), construir_cubo_estados(leer_timeline()))
+    python TableroCentro.py
+
+Archivo de salida (ExportadosGenerados):
+- Analisis_Centro_Por_intervalos.csv
+"""
+
+import numpy as np
+import pandas as pd
+
+from Analisis_cubo_estados import ESTADO_EN_COLA, SEGUNDOS_INTERVALO, construir_cubo_estados
+from CargaDatos import guardar_resultado, leer_detalle, leer_timeline
+from GruposColas import GRUPOS, grupo_tiene_agentes, mascara_agentes_grupo
+from KPIs import KPIS, calcular_kpis, evaluar_kpi
+
+ARCHIVO_TABLERO = 'Analisis_Centro_Por_intervalos.csv'
+MINUTOS_MINIMOS_EN_COLA = 5
+
+# KPI de KPIs.py -> columna del tablero (los conteos se suman para el total del centro)
+COLUMNAS_KPI = {
+    'Oferta': 'Oferta',
+    'Contestadas': 'Contestadas',
+    'Abandonadas': 'Abandonadas',
+    'Nivel_Atencion': 'Nivel_Atencion_%',
+    'Nivel_Servicio': 'Nivel_Servicio_%',
+    'Tasa_Abandono': 'Tasa_Abandono_%',
+    'TMO_Manejadas': 'TMO_Segundos',
+}
+CONTEOS = ['Oferta', 'Contestadas', 'Abandonadas', 'Cumplen_SLA']
+KPIS_TABLERO = list(dict.fromkeys(list(COLUMNAS_KPI) + CONTEOS))
+# KPIs del centro que se evalúan sobre las sumas de los conteos de los grupos
+KPIS_CENTRO = ['Nivel_Atencion', 'Nivel_Servicio', 'Tasa_Abandono']
+
+
+def _slots_cubo(cubo):
+    return pd.date_range(cubo['inicio'], periods=cubo['segundos'].shape[1], freq=f'{SEGUNDOS_INTERVALO}s')
+
+
+def agentes_en_cola(cubo, claves=None):
+    """
+    Agentes en cola por slot del cubo para cada grupo con agentes, en una sola reducción.
+
+    Returns:
+        DataFrame: índice de inicios de slot, una columna por grupo y 'Centro'
+                   (agentes distintos de cualquiera de esos grupos)
+    """
+    claves = [clave for clave in (claves or GRUPOS) if grupo_tiene_agentes(clave)]
+    en_cola = cubo['estados_principales'] == ESTADO_EN_COLA
+    # Segundos 'En la cola' por agente e intervalo -> agente presente en el intervalo
+    presentes = cubo['segundos'][:, :, en_cola].sum(axis=2) >= MINUTOS_MINIMOS_EN_COLA * 60
+
+    agentes = pd.Series(cubo['agentes'])
+    divisiones = pd.Series(cubo['divisiones'])
+    columnas = {}
+    de_algun_grupo = np.zeros(len(agentes), dtype=bool)
+    for clave in claves:
+        mascara = mascara_agentes_grupo(agentes, divisiones, clave).to_numpy()
+        columnas[clave] = presentes[mascara].sum(axis=0)
+        de_algun_grupo |= mascara
+    columnas['Centro'] = presentes[de_algun_grupo].sum(axis=0)
+    return pd.DataFrame(columnas, index=_slots_cubo(cubo))
+
+
+def calcular_tablero(tabla_kpis, cubo=None, claves=None):
+    """
+    Arma el tablero del centro.
+
+    Args:
+        tabla_kpis: KPIs de todos los grupos (KPIs.calcular_kpis, con al menos KPIS_TABLERO)
+        cubo: cubo de estados (None = sin columnas de agentes)
+        claves: grupos a incluir (None = todos los de GRUPOS)
+
+    Returns:
+        DataFrame: Fecha, Intervalo, columnas '<grupo>_<métrica>' y 'Centro_<métrica>'
+    """
+    claves = list(GRUPOS) if claves is None else list(claves)
+    tabla = tabla_kpis[tabla_kpis['Grupo'].isin(claves)]
+    por_grupo = tabla.set_index(['Inicio', 'Grupo'])[KPIS_TABLERO].unstack('Grupo')
+
+    agentes = agentes_en_cola(cubo, claves) if cubo is not None else pd.DataFrame()
+    slots = por_grupo.index.union(agentes.index).sort_values()
+    por_grupo = por_grupo.reindex(slots).fillna(0)
+    agentes = agentes.reindex(slots).fillna(0).astype(int)
+
+    fines = slots + pd.Timedelta(seconds=SEGUNDOS_INTERVALO)
+    columnas = {
+        'Fecha': slots.strftime('%Y-%m-%d'),
+        'Intervalo': slots.strftime('%H:%M') + '-' + fines.strftime('%H:%M'),
+    }
+    for clave in claves:
+        for kpi, columna in COLUMNAS_KPI.items():
+            valores = por_grupo[(kpi, clave)] if (kpi, clave) in por_grupo.columns else pd.Series(0.0, index=slots)
+            columnas[f'{clave}_{columna}'] = valores.to_numpy()
+        if clave in agentes.columns:
+            columnas[f'{clave}_Agentes_En_Cola'] = agentes[clave].to_numpy()
+
+    # Los conteos son KPIs sin denominador: sumados entre grupos dan la suma de su término
+    sumas = {KPIS[conteo]['numerador']: por_grupo[conteo].sum(axis=1).to_numpy()
+             if conteo in por_grupo.columns.get_level_values(0) else np.zeros(len(slots)) for conteo in CONTEOS}
+    for conteo in ('Oferta', 'Contestadas', 'Abandonadas'):
+        columnas[f'Centro_{conteo}'] = evaluar_kpi(sumas, conteo)
+    for kpi in KPIS_CENTRO:
+        columnas[f'Centro_{COLUMNAS_KPI[kpi]}'] = evaluar_kpi(sumas, kpi)
+    if 'Centro' in agentes.columns:
+        columnas['Centro_Agentes_En_Cola'] = agentes['Centro'].to_numpy()
+
+    tablero = pd.DataFrame(columnas)
+    conteos = [columna for columna in tablero.columns if columna.endswith(('_Oferta', '_Contestadas', '_Abandonadas'))]
+    tablero[conteos] = tablero[conteos].astype(int)
+    decimales = [columna for columna in tablero.columns if columna.endswith(('_%', '_TMO_Segundos'))]
+    tablero[decimales] = tablero[decimales].round(2)
+    return tablero
+
+
+def main(df_detalle=None, tabla_kpis=None, cubo=None):
+    """
+    Args:
+        df_detalle: detalle de rendimiento ya leído (None = leer el archivo si falta tabla_kpis)
+        tabla_kpis: KPIs ya calculados para todos los grupos (None = calcularlos)
+        cubo: cubo de estados ya construido (None = construirlo desde el timeline)
+    """
+    print("🏢 TABLERO DEL CENTRO POR INTERVALO")
+    print("=" * 40)
+
+    if tabla_kpis is None:
+        tabla_kpis = calcular_kpis(leer_detalle() if df_detalle is None else df_detalle, KPIS_TABLERO)
+    if cubo is None:
+        cubo = construir_cubo_estados(leer_timeline())
+
+    tablero = calcular_tablero(tabla_kpis, cubo)
+    archivo_salida = guardar_resultado(tablero, ARCHIVO_TABLERO, encoding='utf-8')
+
+    print(f"📋 ARCHIVO GENERADO: {archivo_salida}")
+    print(f"📊 Total intervalos: {len(tablero)} | grupos: {len(GRUPOS)}")
+    print(f"📞 Oferta del centro: {int(tablero['Centro_Oferta'].sum()):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+VALIDACIÓN DE LAS ENTRADAS AL CARGAR
+====================================
+Clasifica, con operaciones vectorizadas sobre columnas completas, las filas del
+detalle y del timeline que los análisis no pueden usar:
+
+- clave_faltante: falta un dato que identifica la fila (cola, agente, estado,
+  inicio del intervalo o del registro)
+- fecha_ilegible: una fecha informada no respeta el formato de Genesys
+- metrica_no_numerica: una métrica informada no es un número (ni una duración
+  'Xm Ys' en las columnas de duración)
+
+Las filas inválidas se excluyen una sola vez al cargar (Planificador y
+ParaleloFechas), así los recorridos posteriores no necesitan atrapar errores
+fila por fila, y el informe (filas por motivo y por columna, con algunas
+muestras) queda en el reporte de la ejecución en lugar de perderse en silencio.
+Solo se validan las columnas presentes (cada ejecución lee las que necesita);
+las vacías no son error salvo que sean clave.
+
+Uso:
+    df_valido, informe = depurar(leer_timeline(), 'timeline')
+    print(texto_informe(informe))
+"""
+
+import numpy as np
+import pandas as pd
+
+from Analisis_timeline_comun import FORMATO_HORA_TIMELINE
+from KPIs import FORMATO_INTERVALO_DETALLE
+
+MOTIVOS = ('clave_faltante', 'fecha_ilegible', 'metrica_no_numerica')
+MUESTRAS_POR_MOTIVO = 3
+
+_PATRON_DURACION = r'^\s*(?:\d+\s*m)?\s*(?:\d+\s*s)?\s*$'
+
+# Reglas por entrada: claves (alternativas: basta una informada), fechas con su
+# formato (obligatorias u opcionales), métricas numéricas y de duración
+REGLAS = {
+    'detalle': {
+        'claves': [('Nombre de cola', 'ID de cola'), ('Inicio del intervalo',)],
+        'fechas': {'Inicio del intervalo': FORMATO_INTERVALO_DETALLE, 'Fin del intervalo': FORMATO_INTERVALO_DETALLE},
+        'numericas': [
+            'Oferta', 'Contestadas', 'Abandonadas', 'Retener', 'Cumplen el SLA', 'Superan el SLA', 'Contactando',
+            'Manejo', 'Transferir', '% de contestadas', '% nivel de servicio',
+            'Velocidad media de respuesta (ASA)', 'Tiempo en abandonar',
+        ],
+        'duraciones': ['Manejo total', 'Manejo medio', 'Retención total', 'Total de ACW'],
+    },
+    'timeline': {
+        'claves': [('Nombre del agente',), ('Estado principal',), ('Hora de inicio',)],
+        'fechas': {
+            'Hora de inicio': FORMATO_HORA_TIMELINE, 'Hora de finalización': FORMATO_HORA_TIMELINE,
+            'Inicio del intervalo': FORMATO_INTERVALO_DETALLE, 'Fin del intervalo': FORMATO_INTERVALO_DETALLE,
+        },
+        'numericas': ['Duración'],
+        'duraciones': [],
+    },
+}
+
+
+def _informada(serie):
+    """Valores no vacíos (ni NaN, ni texto en blanco, ni 'nan')"""
+    if serie.dtype.kind in 'biuf':
+        return serie.notna()
+    texto = serie.astype(str).str.strip()
+    return serie.notna() & (texto != '') & (texto.str.lower() != 'nan')
+
+
+def clasificar(df, entrada):
+    """
+    Máscaras de filas inválidas por motivo y columna.
+
+    Returns:
+        dict: {motivo: {columna: máscara booleana (ndarray)}} solo con las columnas con fallas
+    """
+    reglas = REGLAS[entrada]
+    fallas = {motivo: {} for motivo in MOTIVOS}
+
+    for alternativas in reglas['claves']:
+        presentes = [columna for columna in alternativas if columna in df.columns]
+        if not presentes:
+            continue
+        falta = ~np.logical_or.reduce([_informada(df[columna]).to_numpy() for columna in presentes])
+        if falta.any():
+            fallas['clave_faltante'][' / '.join(presentes)] = falta
+
+    for columna, formato in reglas['fechas'].items():
+        if columna not in df.columns or df[columna].dtype.kind == 'M':
+            continue
+        ilegible = (_informada(df[columna]) &
+                    pd.to_datetime(df[columna], format=formato, errors='coerce').isna()).to_numpy()
+        if ilegible.any():
+            fallas['fecha_ilegible'][columna] = ilegible
+
+    for columna in reglas['numericas'] + reglas['duraciones']:
+        if columna not in df.columns or df[columna].dtype.kind in 'biuf':
+            continue
+        no_numerica = _informada(df[columna]) & pd.to_numeric(df[columna], errors='coerce').isna()
+        if columna in reglas['duraciones'] and no_numerica.any():
+            no_numerica &= ~df[columna].astype(str).str.match(_PATRON_DURACION)
+        if no_numerica.any():
+            fallas['metrica_no_numerica'][columna] = no_numerica.to_numpy()
+
+    return {motivo: columnas for motivo, columnas in fallas.items() if columnas}
+
+
+def depurar(df, entrada):
+    """
+    Excluye las filas inválidas de una entrada ('detalle' o 'timeline').
+
+    Returns:
+        tuple: (DataFrame con las filas válidas, informe) donde informe es
+               {'entrada', 'filas', 'excluidas', 'motivos': {motivo: {'filas',
+               'columnas': {columna: filas}, 'muestras': [{'fila', 'columna', 'valor'}]}}}
+    """
+    fallas = clasificar(df, entrada)
+    informe = {'entrada': entrada, 'filas': len(df), 'excluidas': 0, 'motivos': {}}
+    if not fallas:
+        return df, informe
+
+    invalida = np.zeros(len(df), dtype=bool)
+    for motivo, columnas in fallas.items():
+        del_motivo = np.logical_or.reduce(list(columnas.values()))
+        invalida |= del_motivo
+        muestras = []
+        for columna, mascara in columnas.items():
+            for posicion in np.flatnonzero(mascara)[:MUESTRAS_POR_MOTIVO - len(muestras)]:
+                valor = df[columna.split(' / ')[0]].iloc[posicion]
+                muestras.append({'fila': int(posicion), 'columna': columna, 'valor': None if pd.isna(valor) else str(valor)})
+        informe['motivos'][motivo] = {
+            'filas': int(del_motivo.sum()),
+            'columnas': {columna: int(mascara.sum()) for columna, mascara in columnas.items()},
+            'muestras': muestras,
+        }
+    informe['excluidas'] = int(invalida.sum())
+    return df[~invalida], informe
+
+
+def texto_informe(informe):
+    """Texto del informe de una entrada para la consola"""
+    lineas = [f"   {informe['entrada']:<20} {informe['filas']:>9,} filas, {informe['excluidas']:,} excluidas"]
+    for motivo, datos in informe['motivos'].items():
+        columnas = ', '.join(f"{columna}: {filas:,}" for columna, filas in datos['columnas'].items())
+        lineas.append(f"      ⚠️ {motivo}: {datos['filas']:,} ({columnas})")
+        for muestra in datos['muestras']:
+            lineas.append(f"         fila {muestra['fila']}: {muestra['columna']} = {muestra['valor']!r}")
+    return "\n".join(lineas)
@@ -5,21 +5,24 @@ ANALIZADOR DE COLAS - INTERFAZ WEB
 Aplicación web Streamlit para analizar datos de call center.
 
 Permite subir los archivos CSV de Genesys y generar automáticamente
-los 6 análisis de colas en formato CSV.
+los análisis de colas en formato CSV (todos o solo los seleccionados).
 
 Autor: Sistema de Análisis de Call Center
 """
 
 import streamlit as st
 import pandas as pd
-import os
-import subprocess
-import sys
-import zipfile
+import contextlib
 import io
-from datetime import datetime
+import os
 import tempfile
-import shutil
+from datetime import datetime
+
+from CargaDatos import NOMBRES_ENTRADA, formatos_salida, leer_buffer, salida_en
+from Empaquetado import NIVEL_POR_DEFECTO, escribir_zip
+from FormatosSalida import FORMATOS, archivos_de_salida, pyarrow_disponible
+from Planificador import ANALIZADORES, ejecutar_analizador, entradas_de, nueva_ejecucion, registrar_entrada
+from ValidacionEntradas import texto_informe
 
 def main():
     st.set_page_config(
@@ -37,7 +40,7 @@ def main():
     ### 🎯 ¿Qué hace esta aplicación?
     
     Esta herramienta procesa los datos exportados de **Genesys** y genera automáticamente 
-    **6 análisis completos** de las diferentes colas del call center:
+    los análisis seleccionados de las diferentes colas del call center:
     
     - 📞 **Mesa de Ayuda** - Análisis detallado por intervalos
     - ☎️ **Central Telefónica** - Métricas de atención
@@ -45,10 +48,34 @@ def main():
     - 📤 **Fraude Salida** - Análisis de llamadas salientes  
     - 🏢 **Servicios Administrativos** - Rendimiento operacional
     - 📱 **Redes Sociales** - Métricas de interacciones digitales
+    - 👥 **Estados de Agentes** - Utilización, disponibilidad, shrinkage y ocupación
     """)
     
     st.markdown("---")
     
+    # Selección de análisis: solo se piden y se leen los archivos que necesitan
+    st.markdown("### 🎯 Análisis a Generar")
+    claves = st.multiselect(
+        "Selecciona los análisis",
+        options=list(ANALIZADORES),
+        default=list(ANALIZADORES),
+        format_func=lambda clave: ANALIZADORES[clave]['nombre']
+    )
+    entradas_necesarias = sorted({entrada for clave in claves for entrada in entradas_de(clave)})
+    formatos = st.multiselect(
+        "Formatos adicionales al CSV",
+        options=[formato for formato in FORMATOS if formato not in ('parquet', 'arrow') or pyarrow_disponible()],
+        help="Se agregan al ZIP: Parquet/Arrow, JSON Lines o una base SQLite con una tabla por análisis"
+    )
+    nivel_zip = st.select_slider(
+        "Compresión del ZIP",
+        options=list(range(10)),
+        value=NIVEL_POR_DEFECTO,
+        help="0 = sin comprimir (más rápido), 9 = máxima compresión (más lento)"
+    )
+    
+    st.markdown("---")
+    
     # Sección de carga de archivos
     st.markdown("### 📁 Subir Archivos de Genesys")
     
@@ -58,39 +85,47 @@ def main():
         st.markdown("**🔢 Detalle del rendimiento de colas.csv**")
         archivo_detalle = st.file_uploader(
             "Selecciona el archivo de detalle de rendimiento",
-            type=['csv'],
+            type=['csv', 'gz', 'zip', 'xz', 'bz2'],
             key="detalle",
-            help="Archivo exportado desde Genesys con datos de rendimiento por colas"
+            help="Archivo exportado desde Genesys con datos de rendimiento por colas (CSV o comprimido .gz/.zip/.xz/.bz2)"
         )
     
     with col2:
         st.markdown("**⏱️ Resumen de línea de tiempo de estado de agente.csv**")
         archivo_timeline = st.file_uploader(
             "Selecciona el archivo de timeline de agentes",
-            type=['csv'],
+            type=['csv', 'gz', 'zip', 'xz', 'bz2'],
             key="timeline", 
-            help="Archivo exportado desde Genesys con estados de agentes por tiempo"
+            help="Archivo exportado desde Genesys con estados de agentes por tiempo (CSV o comprimido .gz/.zip/.xz/.bz2)"
         )
     
-    # Verificar si ambos archivos están cargados
-    if archivo_detalle is not None and archivo_timeline is not None:
-        st.success("✅ Ambos archivos cargados correctamente")
+    subidos = {'detalle': archivo_detalle, 'timeline': archivo_timeline}
+    archivos = {entrada: subidos[entrada] for entrada in entradas_necesarias if subidos[entrada] is not None}
+    
+    # Verificar si están cargados los archivos que necesitan los análisis seleccionados
+    if not claves:
+        st.warning("⚠️ Selecciona al menos un análisis para continuar")
+    
+    elif len(archivos) == len(entradas_necesarias):
+        st.success("✅ Archivos necesarios cargados correctamente")
         
         # Mostrar información de los archivos
-        col1, col2 = st.columns(2)
-        with col1:
-            st.info(f"📄 **{archivo_detalle.name}**\n\nTamaño: {archivo_detalle.size:,} bytes")
-        with col2:
-            st.info(f"📄 **{archivo_timeline.name}**\n\nTamaño: {archivo_timeline.size:,} bytes")
+        columnas = st.columns(len(archivos))
+        for columna, archivo in zip(columnas, archivos.values()):
+            with columna:
+                st.info(f"📄 **{archivo.name}**\n\nTamaño: {archivo.size:,} bytes")
         
         st.markdown("---")
         
         # Botón de procesamiento
-        if st.button("🚀 **GENERAR ANÁLISIS COMPLETO**", type="primary", use_container_width=True):
-            procesar_archivos(archivo_detalle, archivo_timeline)
+        if st.button("🚀 **GENERAR ANÁLISIS**", type="primary", use_container_width=True):
+            procesar_archivos(archivos, claves, nivel_zip, formatos)
     
     else:
-        st.warning("⚠️ Por favor sube ambos archivos CSV para continuar")
+        if entradas_necesarias == ['detalle']:
+            st.warning("⚠️ Por favor sube el archivo de detalle de rendimiento para continuar")
+        else:
+            st.warning("⚠️ Por favor sube ambos archivos CSV para continuar")
         
         # Información adicional
         with st.expander("ℹ️ ¿Cómo obtener estos archivos desde Genesys?"):
@@ -110,156 +145,98 @@ def main():
             ⚠️ **Importante:** Ambos archivos deben corresponder al mismo período de tiempo.
             """)
 
-def procesar_archivos(archivo_detalle, archivo_timeline):
-    """Procesa los archivos subidos y genera los análisis"""
+def procesar_archivos(archivos, claves, nivel_zip=NIVEL_POR_DEFECTO, formatos=()):
+    """
+    Procesa los archivos subidos y genera los análisis seleccionados: las entradas
+    se parsean desde el contenido subido y los resultados se escriben en una
+    carpeta temporal propia de la sesión (salida_en). El ZIP se arma por
+    fragmentos (Empaquetado.py) leyendo esos archivos, sin copias en memoria de
+    cada resultado, y la descarga lee el ZIP desde el disco.
     
-    # Crear directorio temporal
-    with tempfile.TemporaryDirectory() as temp_dir:
-        
-        # Guardar archivos en directorio temporal
-        detalle_path = os.path.join(temp_dir, "ExportadosGenesysprueba", "Detalle del rendimiento de colas.csv")
-        timeline_path = os.path.join(temp_dir, "ExportadosGenesysprueba", "Resumen de línea de tiempo de estado de agente.csv")
-        
-        # Crear directorios necesarios
-        os.makedirs(os.path.dirname(detalle_path), exist_ok=True)
-        os.makedirs(os.path.join(temp_dir, "ExportadosGenerados"), exist_ok=True)
-        
-        # Escribir archivos
-        with open(detalle_path, "wb") as f:
-            f.write(archivo_detalle.getvalue())
-        with open(timeline_path, "wb") as f:
-            f.write(archivo_timeline.getvalue())
-        
-        # Verificar que los archivos se crearon correctamente
-        if os.path.exists(detalle_path) and os.path.exists(timeline_path):
-            detalle_size = os.path.getsize(detalle_path)
-            timeline_size = os.path.getsize(timeline_path)
-            st.info(f"📁 Archivos guardados:\n- Detalle: {detalle_size:,} bytes\n- Timeline: {timeline_size:,} bytes")
-        else:
-            st.error("❌ Error: No se pudieron guardar los archivos correctamente")
-            return
-        
-        # Copiar scripts de análisis al directorio temporal
-        scripts_originales = [
-            "AnalisisMDA.py",
-            "AnalisisCentral.py", 
-            "AnalisisFraude.py",
-            "AnalisisFraudeSalida.py",
-            "AnalisisServicios.py",
-            "AnalisisRedes.py"
-        ]
-        
-        # Scripts auxiliares que también se necesitan
-        scripts_auxiliares = [
-            "Analisis_timeline_mda.py",
-            "Analisis_timeline_fraude.py"
-        ]
-        
-        # Mostrar progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+    Args:
+        archivos: archivos subidos por entrada ('detalle', 'timeline')
+        claves: análisis a ejecutar (claves de Planificador.ANALIZADORES)
+        nivel_zip: nivel de compresión del ZIP (0-9)
+        formatos: formatos de salida adicionales al CSV (FormatosSalida.FORMATOS)
+    """
+    
+    # Mostrar progress bar
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    try:
+        # Parsear las entradas directamente desde lo subido (solo las columnas necesarias)
+        ejecucion = nueva_ejecucion(claves)
+        for entrada, archivo in archivos.items():
+            registrar_entrada(ejecucion, entrada, leer_buffer(
+                archivo.getvalue(), columnas=ejecucion['columnas'].get(entrada),
+                preferido=NOMBRES_ENTRADA[entrada]
+            ))
+        st.info("📁 Archivos leídos:\n" + "\n".join(
+            f"- {entrada.capitalize()}: {len(ejecucion['artefactos'][entrada]):,} registros" for entrada in archivos
+        ))
+        excluidas = [informe for informe in ejecucion['validacion'].values() if informe['excluidas']]
+        if excluidas:
+            st.warning("🧹 Filas excluidas por la validación:\n" + "\n".join(texto_informe(informe) for informe in excluidas))
         
-        try:
-            total_scripts = len(scripts_originales)
-            
-            # Primero copiar todos los scripts auxiliares
-            for script_aux in scripts_auxiliares:
-                if os.path.exists(script_aux):
-                    script_aux_temp = os.path.join(temp_dir, script_aux)
-                    shutil.copy2(script_aux, script_aux_temp)
-            
-            for i, script in enumerate(scripts_originales):
-                status_text.text(f"🔄 Ejecutando {script.replace('.py', '').replace('Analisis', 'Análisis ')}...")
-                
-                # Copiar script al directorio temporal
-                script_temp = os.path.join(temp_dir, script)
-                shutil.copy2(script, script_temp)
+        with tempfile.TemporaryDirectory(prefix='analisis_colas_') as temporal, \
+                salida_en(temporal), formatos_salida(formatos):
+            for i, clave in enumerate(claves):
+                nombre = ANALIZADORES[clave]['nombre']
+                status_text.text(f"🔄 Ejecutando Análisis {nombre}...")
                 
-                # Ejecutar script en el directorio temporal
-                resultado = subprocess.run(
-                    [sys.executable, script_temp],
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True
-                )
+                consola = io.StringIO()
+                with contextlib.redirect_stdout(consola):
+                    exitoso = ejecutar_analizador(ejecucion, clave)
                 
-                if resultado.returncode == 0:
-                    st.success(f"✅ {script} completado")
+                if exitoso:
+                    st.success(f"✅ {nombre} completado")
                 else:
-                    st.error(f"❌ Error en {script}")
-                    with st.expander(f"Ver detalles del error - {script}"):
-                        if resultado.stderr:
-                            st.code(resultado.stderr)
-                        if resultado.stdout:
-                            st.code(resultado.stdout)
+                    st.error(f"❌ Error en {nombre}")
+                    with st.expander(f"Ver detalles del error - {nombre}"):
+                        st.code(ejecucion['analizadores'][clave]['error'])
+                        if consola.getvalue():
+                            st.code(consola.getvalue())
                 
                 # Actualizar progress bar
-                progress_bar.progress((i + 1) / total_scripts)
-            
-            # Verificar archivos generados
-            archivos_generados = []
-            archivos_esperados = [
-                "Analisis_Mesa_Ayuda_Por_Intervalos.csv",
-                "Analisis_Central_Por_intervalos.csv",
-                "Analisis_Fraude_Por_intervalos.csv", 
-                "Analisis_FraudeOut_Por_intervalos.csv",
-                "Analisis_Servicios_Por_intervalos.csv",
-                "Analisis_Redes_Por_intervalos.csv"
-            ]
-            
-            exportados_dir = os.path.join(temp_dir, "ExportadosGenerados")
+                progress_bar.progress((i + 1) / len(claves))
             
-            for archivo in archivos_esperados:
-                archivo_path = os.path.join(exportados_dir, archivo)
-                if os.path.exists(archivo_path):
-                    archivos_generados.append((archivo, archivo_path))
+            # Resultados generados, en el orden de los análisis seleccionados
+            archivos_esperados = archivos_de_salida([ANALIZADORES[clave]['archivo'] for clave in claves], formatos)
+            archivos_generados = [(archivo, os.path.join(temporal, archivo)) for archivo in archivos_esperados
+                                  if os.path.exists(os.path.join(temporal, archivo))]
             
             status_text.text("✅ ¡Procesamiento completado!")
             
             if archivos_generados:
                 st.success(f"🎉 **¡Análisis completado!** Se generaron {len(archivos_generados)} archivos")
                 
-                # Crear ZIP con todos los archivos
-                zip_buffer = io.BytesIO()
-                
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for archivo_nombre, archivo_path in archivos_generados:
-                        zip_file.write(archivo_path, archivo_nombre)
-                
-                zip_buffer.seek(0)
+                # Crear ZIP con todos los archivos, comprimiendo por fragmentos directo al disco
+                ruta_zip = os.path.join(temporal, 'Analisis_Colas.zip')
+                escribir_zip(ruta_zip, archivos_generados, nivel=nivel_zip)
                 
                 # Botón de descarga
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                st.download_button(
-                    label="📥 **DESCARGAR TODOS LOS ANÁLISIS (.ZIP)**",
-                    data=zip_buffer.getvalue(),
-                    file_name=f"Analisis_Colas_{timestamp}.zip",
-                    mime="application/zip",
-                    use_container_width=True,
-                    type="primary"
-                )
+                with open(ruta_zip, 'rb') as zip_archivo:
+                    st.download_button(
+                        label="📥 **DESCARGAR TODOS LOS ANÁLISIS (.ZIP)**",
+                        data=zip_archivo,
+                        file_name=f"Analisis_Colas_{timestamp}.zip",
+                        mime="application/zip",
+                        use_container_width=True,
+                        type="primary"
+                    )
                 
-                # Mostrar detalles de archivos generados
+                # Mostrar detalles de archivos generados (se descargan dentro del ZIP)
                 with st.expander("📋 Archivos generados"):
-                    for archivo_nombre, archivo_path in archivos_generados:
-                        tamaño = os.path.getsize(archivo_path)
-                        st.write(f"📄 **{archivo_nombre}** - {tamaño:,} bytes")
-                        
-                        # Permitir descarga individual
-                        with open(archivo_path, "rb") as f:
-                            st.download_button(
-                                f"Descargar {archivo_nombre}",
-                                data=f.read(),
-                                file_name=archivo_nombre,
-                                mime="text/csv",
-                                key=f"download_{archivo_nombre}"
-                            )
+                    for archivo_nombre, ruta in archivos_generados:
+                        st.write(f"📄 **{archivo_nombre}** - {os.path.getsize(ruta):,} bytes")
                 
             else:
                 st.error("❌ No se pudo generar ningún archivo de análisis")
-                
-        except Exception as e:
-            st.error(f"❌ Error durante el procesamiento: {str(e)}")
+            
+    except Exception as e:
+        st.error(f"❌ Error durante el procesamiento: {str(e)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
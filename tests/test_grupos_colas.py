@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la nómina temporal de GruposColas"""
+
+import pytest
+
+from GruposColas import AGENTES_CENTRAL, AGENTES_EXCLUIDOS_MDA, grupo_tiene_agentes, lista_nomina, nomina_temporal
+
+
+def test_nomina_vacia_se_restaura():
+    original = list(AGENTES_CENTRAL)
+    with nomina_temporal({'central': []}):
+        assert AGENTES_CENTRAL == []
+        assert lista_nomina('central') is AGENTES_CENTRAL
+        assert not grupo_tiene_agentes('central')
+    assert AGENTES_CENTRAL == original
+
+    # La lista sigue disponible para reemplazos posteriores
+    with nomina_temporal({'central': ['Otro Agente']}):
+        assert AGENTES_CENTRAL == ['Otro Agente']
+    assert AGENTES_CENTRAL == original
+
+
+def test_nomina_se_restaura_si_el_bloque_falla():
+    central, excluidos = list(AGENTES_CENTRAL), list(AGENTES_EXCLUIDOS_MDA)
+    with pytest.raises(RuntimeError):
+        with nomina_temporal({'central': [], 'mda': []}):
+            raise RuntimeError("falla del análisis")
+    assert AGENTES_CENTRAL == central
+    assert AGENTES_EXCLUIDOS_MDA == excluidos
+
+
+def test_grupo_sin_nomina():
+    with pytest.raises(ValueError):
+        with nomina_temporal({'fraude': []}):
+            pass
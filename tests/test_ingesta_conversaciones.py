@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la conversión de horas de IngestaConversaciones"""
+
+import pandas as pd
+
+from IngestaConversaciones import _a_fecha_hora
+
+
+def test_iso_utc_con_milisegundos():
+    fechas = _a_fecha_hora(pd.Series(['2025-10-13T15:40:00.123Z', '2025-10-13T15:41:00.5Z']), 'America/Lima')
+    assert fechas.tolist() == [pd.Timestamp('2025-10-13 10:40:00.123'), pd.Timestamp('2025-10-13 10:41:00.5')]
+
+
+def test_iso_con_desplazamiento():
+    fechas = _a_fecha_hora(pd.Series(['2025-10-13T15:40:00.123-05:00', '2025-10-13T22:10:00+02:00']), 'America/Lima')
+    assert fechas.tolist() == [pd.Timestamp('2025-10-13 15:40:00.123'), pd.Timestamp('2025-10-13 15:10:00')]
+
+
+def test_iso_mezclado_con_y_sin_zona():
+    fechas = _a_fecha_hora(pd.Series(['2025-10-13T15:40:00Z', '2025-10-13 09:00:00', None, 'texto']), 'America/Lima')
+    assert fechas.iloc[0] == pd.Timestamp('2025-10-13 10:40:00')
+    assert fechas.iloc[1] == pd.Timestamp('2025-10-13 09:00:00')
+    assert fechas.iloc[2:].isna().all()
+
+
+def test_formato_genesys_sin_cambios():
+    fechas = _a_fecha_hora(pd.Series(['13/10/25 15:40:00']))
+    assert fechas.tolist() == [pd.Timestamp('2025-10-13 15:40:00')]
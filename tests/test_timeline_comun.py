@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del conteo de agentes por intervalo de Analisis_timeline_comun"""
+
+from Analisis_timeline_comun import RegistroTurno, contar_agentes_por_intervalo
+
+HORA = 3600
+
+
+def test_sin_registros():
+    assert contar_agentes_por_intervalo([], 0).sum() == 0
+
+
+def test_minimo_por_registro():
+    registros = [
+        RegistroTurno(0, 10 * HORA, 10 * HORA + 4 * 60),         # 4 minutos: no cuenta
+        RegistroTurno(1, 10 * HORA + 60, 10 * HORA + 6 * 60),    # 5 minutos: cuenta
+        RegistroTurno(2, 10 * HORA + 25 * 60, 11 * HORA + 10 * 60),
+    ]
+    conteos = contar_agentes_por_intervalo(registros, 3)
+    assert conteos[20] == 2  # 10:00-10:30: agente 1 y agente 2 (5 minutos)
+    assert conteos[21] == 1  # 10:30-11:00: agente 2 completo
+    assert conteos[22] == 1  # 11:00-11:30: agente 2, 10 minutos
+    assert conteos.sum() == 4
+
+
+def test_cruces_de_medianoche():
+    registros = [
+        RegistroTurno(0, -HORA, HORA + 20 * 60),         # desde el día anterior: solo intervalos completos
+        RegistroTurno(1, 23 * HORA + 10 * 60, 25 * HORA),  # hacia el día siguiente
+        RegistroTurno(2, 23 * HORA + 50 * 60, None),       # sin fin: hasta las 23:59:59
+    ]
+    conteos = contar_agentes_por_intervalo(registros, 3)
+    assert list(conteos[:3]) == [1, 1, 0]
+    assert list(conteos[46:]) == [1, 2]
+
+    # Mesa de Ayuda: el intervalo en que empieza el cruce no cuenta
+    conteos = contar_agentes_por_intervalo(registros, 3, cruce_completo=True)
+    assert list(conteos[46:]) == [0, 2]